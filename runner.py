@@ -1,56 +1,289 @@
 """Main script to run all other modules in project."""
+import argparse
 import os
-import scripts.sqlite as sq
-import scripts.pdf_downloader as pd
-from scripts.pdf_scraper import scrape_pdf
 
 CIA_PAGE = """https://www.cia.gov/library/publications/resources/the-world-factbook/docs/one_page_summaries.html"""
 
-links = pd.scrape_pdf_links(CIA_PAGE)  # make list with links for PDF
-print("Downloading PDFs...")
-
 PDF_FOLDER_PATH = "pdf1"
 
-if not os.path.exists(PDF_FOLDER_PATH):
-    os.mkdir(PDF_FOLDER_PATH)
+DB_FILE = "data/summaries.db"  # path to DB file
+
+
+def download(pdf_folder, archive=None):
+    """Download all PDFs from CIA page to folder.
+
+    Network modules are imported here, so runs without download stage
+    don't pay for their import.
+
+    Args:
+        pdf_folder (str): path to folder for saving PDF.
+        archive (str): path to pack file, optional. If given, PDFs are
+            written to the pack instead of the folder.
+    """
+    # pylint: disable=import-outside-toplevel
+    import scripts.pdf_downloader as pd
+    from scripts.http_cache import HttpCache
+    from scripts.pdf_store import PdfStore
+
+    if not os.path.exists(pdf_folder):
+        os.mkdir(pdf_folder)
+
+    # metadata of earlier downloads, used to skip unchanged files
+    http_cache = HttpCache.for_folder(pdf_folder)
+    pdf_store = PdfStore.for_folder(pdf_folder)
+    run_start = pdf_store.begin_run()
+
+    # make list with links for PDF
+    links = pd.scrape_pdf_links(CIA_PAGE, http_cache)
+    print("Downloading PDFs...")
 
-for block in links:
-    if len(block) == 4:
-        # download PDF 4 at a time
-        pd.download_pdf_multi(block, PDF_FOLDER_PATH)
+    # flatten blocks and download all PDFs over one shared session
+    links = [item for block in links for item in block]
+    if archive is None:
+        pd.download_pdfs(links, pdf_folder, cache=http_cache,
+                         store=pdf_store)
     else:
-        for item in block:
-            # download PDF from last block one by one
-            pd.download_pdf_single(item[0], item[1], PDF_FOLDER_PATH)
+        pd.download_pdfs(links, pdf_folder, cache=http_cache,
+                         archive_path=archive)
 
-print("Finished downloading all PDFs")
+    print("Finished downloading all PDFs")
+    if archive is None:
+        changed = pdf_store.changed_since(run_start)
+        print(f"Changed since last run: {len(changed)}")
 
 
-print("Starting scraping PDFs for text...")
-data_containers = scrape_pdf(PDF_FOLDER_PATH)  # scrape data to lists
-print("Finished preparing objects")
+def scrape_and_load(pdf_folder, db_file, workers=1, text_cache=True,
+                    incremental=False, regions_file=None, backend=None,
+                    recycle_after=None, max_worker_mb=None,
+                    retry_quarantined=False):
+    """Scrape PDFs in folder and write data to sqlite DB.
 
-tables = [
-    "Country overview",
-    "Natural resources",
-    "Export partners",
-    "Import partners",
-    "Ethnicity",
-    "Language",
-    "Religion",
-]
+    PDFs failing to scrape or load are copied to quarantine next to the
+    folder with a record of the error, rows of other countries are
+    committed.
 
-if not os.path.exists("data"):
-    os.mkdir("data")
+    Args:
+        pdf_folder (str): path to folder, containing PDFs, or to archive
+            with PDFs.
+        db_file (str): path to DB file.
+        workers (int): number of processes scraping PDFs.
+        text_cache (bool): reuse text extracted on earlier runs.
+        incremental (bool): scrape only new and changed PDFs and replace
+            rows of their countries in existing DB.
+        regions_file (str): JSON file with regions of pages holding the
+            fields, optional. Text outside of them isn't analysed.
+        backend (str): name of backend converting PDF to text, default
+            one if None.
+        recycle_after (int): replace worker process after this number of
+            PDFs, optional.
+        max_worker_mb (float): replace worker process once its memory is
+            over this limit, MB, optional.
+        retry_quarantined (bool): scrape only PDFs, which failed on
+            earlier runs.
+    """
+    # pylint: disable=import-outside-toplevel
+    import sqlite3
+    import scripts.sqlite as sq
+    from scripts import pdf_archive
+    from scripts.pdf_scraper import DEFAULT_BACKEND, iter_countries
+    from scripts.quarantine import Quarantine
+    from scripts.scrape_costs import CostHistory
+    from scripts.text_cache import TextCache
 
-DB_FILE = "data/summaries.db"  # path to DB file
+    cache = TextCache.for_folder(pdf_folder) if text_cache else None
+    quarantine = Quarantine.for_folder(pdf_folder)
+    backend = backend or DEFAULT_BACKEND
+    regions = None
+    if regions_file is not None:
+        from scripts.region_extract import load_regions
+        regions = load_regions(regions_file)
+
+    if incremental:
+        from scripts.incremental import scrape_incremental
+        if os.path.dirname(db_file):
+            os.makedirs(os.path.dirname(db_file), exist_ok=True)
+        scrape_incremental(pdf_folder, db_file, workers, cache, regions,
+                           backend, quarantine, retry_quarantined)
+        return
+
+    names = None
+    if retry_quarantined:
+        with pdf_archive.open_corpus(pdf_folder) as corpus:
+            names = [name for name in quarantine.names()
+                     if name in corpus.names]
+        print(f"Retrying {len(names)} quarantined PDFs")
+
+    if os.path.dirname(db_file) and not os.path.exists(
+            os.path.dirname(db_file)):
+        os.mkdir(os.path.dirname(db_file))
+
+    sq.create_db(db_file)  # check DB file, create file if it doesn't exist
+    print("Finished creating db")
+
+    def quarantine_failure(name, error, trace):
+        print(f"{name}: failed to scrape ({error!r}), quarantined")
+        quarantine.add(pdf_folder, name, "scrape", error, trace)
+
+    if recycle_after is not None or max_worker_mb is not None:
+        from scripts.bounded_scrape import iter_countries_bounded
+        max_rss = None if max_worker_mb is None else max_worker_mb * 2 ** 20
+        countries = iter_countries_bounded(
+            pdf_folder, workers, recycle_after, max_rss, names,
+            text_cache=cache, regions=regions, backend=backend,
+            on_error=quarantine_failure)
+    else:
+        countries = iter_countries(pdf_folder, workers, cache, regions,
+                                   backend,
+                                   CostHistory.for_folder(pdf_folder),
+                                   names, quarantine_failure)
+
+    print("Starting scraping PDFs for text...")
+    loaded = []
+    # every country is written as soon as it is scraped, rows of all
+    # countries are committed together
+    with sq.connect_to_db(db_file) as conn:
+        cur = conn.cursor()
+        # explicit transaction, otherwise every savepoint of
+        # sq.replace_country() would be committed on its own
+        cur.execute("BEGIN")
+        for bundle in countries:
+            try:
+                sq.replace_country(cur, bundle.tables())
+            except sqlite3.Error as error:
+                print(f"{bundle.source}: failed to write ({error!r}), "
+                      f"quarantined")
+                quarantine.add(pdf_folder, bundle.source, "load", error)
+                continue
+            loaded.append(bundle.source)
+
+    # released only after the commit
+    for name in loaded:
+        quarantine.remove(name)
+
+    print(f"Finished filling up db: {len(loaded)} countries loaded, "
+          f"{len(quarantine.names())} PDFs in quarantine")
+
+
+def run_pipelined(pdf_folder, db_file, retry_quarantined=False):
+    """Download, scrape and load PDFs with overlapped stages.
+
+    Unchanged PDFs are scraped too if they aren't in DB yet or are
+    quarantined.
+
+    Args:
+        pdf_folder (str): path to folder for saving PDF.
+        db_file (str): path to DB file.
+        retry_quarantined (bool): scrape only PDFs, which failed on
+            earlier runs and were quarantined.
+    """
+    # pylint: disable=import-outside-toplevel
+    import scripts.pdf_downloader as pd
+    from scripts.http_cache import HttpCache
+    from scripts.pdf_store import PdfStore
+    from scripts.pipeline import run_pipeline
+    from scripts.quarantine import Quarantine
+
+    os.makedirs(pdf_folder, exist_ok=True)
+    if os.path.dirname(db_file):
+        os.makedirs(os.path.dirname(db_file), exist_ok=True)
+
+    http_cache = HttpCache.for_folder(pdf_folder)
+    pdf_store = PdfStore.for_folder(pdf_folder)
+    pdf_store.begin_run()
+
+    links = pd.scrape_pdf_links(CIA_PAGE, http_cache)
+    links = [item for block in links for item in block]
+    run_pipeline(links, pdf_folder, db_file,
+                 quarantine=Quarantine.for_folder(pdf_folder),
+                 retry_quarantined=retry_quarantined, cache=http_cache,
+                 store=pdf_store)
+
+
+def main():
+    """Parse command line arguments and run selected stages."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pdf-folder", default=PDF_FOLDER_PATH,
+                        help="folder for downloaded PDF files")
+    parser.add_argument("--archive", default=None,
+                        help="zip, tar or pack file with PDFs, used "
+                             "instead of the folder; downloads are "
+                             "written only to a pack, so zip and tar "
+                             "need --skip-download")
+    parser.add_argument("--db-file", default=DB_FILE,
+                        help="path to sqlite DB file")
+    parser.add_argument("--skip-download", action="store_true",
+                        help="only scrape PDFs already in the folder")
+    parser.add_argument("--download-only", action="store_true",
+                        help="only download PDFs, don't scrape them")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of processes scraping PDFs")
+    parser.add_argument("--no-text-cache", action="store_true",
+                        help="extract text of every PDF again instead of "
+                             "using cached text")
+    parser.add_argument("--incremental", action="store_true",
+                        help="scrape only new and changed PDFs and replace "
+                             "their rows in existing DB")
+    parser.add_argument("--regions", default=None,
+                        help="JSON file with page regions holding the "
+                             "fields, made by scripts.region_extract")
+    parser.add_argument("--backend", default=None,
+                        help="backend converting PDF to text, see "
+                             "scripts.text_backends")
+    parser.add_argument("--recycle-after", type=int, default=None,
+                        help="replace scraping process after this number "
+                             "of PDFs")
+    parser.add_argument("--max-worker-mb", type=float, default=None,
+                        help="replace scraping process once its memory is "
+                             "over this limit, MB")
+    parser.add_argument("--retry-quarantined", action="store_true",
+                        help="scrape only PDFs, which failed on earlier "
+                             "runs and were quarantined")
+    parser.add_argument("--parser-stats", action="store_true",
+                        help="print calls and time of every field parser, "
+                             "counted only with --workers 1")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="scrape and load every PDF as soon as it is "
+                             "downloaded, unchanged ones too if they "
+                             "aren't in DB or are quarantined")
+    parser.add_argument("--daemon", action="store_true",
+                        help="keep running and refresh DB on schedule")
+    parser.add_argument("--interval", type=float, default=24 * 60 * 60,
+                        help="seconds between refreshes in daemon mode")
+    args = parser.parse_args()
+
+    if args.archive and not (args.skip_download or args.daemon
+                             or args.pipeline):
+        # pylint: disable=import-outside-toplevel
+        from scripts.pdf_archive import is_read_only_archive
+        if is_read_only_archive(args.archive):
+            parser.error("downloads are written only to a pack file, add "
+                         "--skip-download to scrape a zip or tar archive")
+
+    if args.daemon:
+        # pylint: disable=import-outside-toplevel
+        from scripts.daemon import run_daemon
+        run_daemon(CIA_PAGE, args.pdf_folder, args.db_file, args.interval)
+        return
+
+    if args.pipeline:
+        run_pipelined(args.pdf_folder, args.db_file, args.retry_quarantined)
+        return
+
+    if not args.skip_download:
+        download(args.pdf_folder, args.archive)
+
+    if not args.download_only:
+        scrape_and_load(args.archive or args.pdf_folder, args.db_file,
+                        args.workers, not args.no_text_cache,
+                        args.incremental, args.regions, args.backend,
+                        args.recycle_after, args.max_worker_mb,
+                        args.retry_quarantined)
 
-sq.create_db(DB_FILE)  # check DB file, create file if it doesn't exist
-print("Finished creating db")
+    if args.parser_stats:
+        # pylint: disable=import-outside-toplevel
+        from scripts.pdf_scraper import print_parser_stats
+        print_parser_stats()
 
-with sq.connect_to_db(DB_FILE) as conn:  # open connection, write to DB
-    cur = conn.cursor()
-    for i in zip(tables, data_containers):
-        sq.write_to_db(cur, i[0], i[1])
 
-print("Finished filling up db")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""Benchmark of download throughput against local stand-in server.
+
+Drives scrape_pdf_links() and the download functions against
+FakeFactbookServer and reports files/sec, p50/p99 latency and bytes/sec
+for every concurrency setting. The former download loop, blocks of four
+files with a barrier after every block, is kept here as the baseline.
+Both are paced by the same unlimited scheduler, so only the way of
+downloading is measured.
+
+Run from the project root with `python -m scripts.bench_download`.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+import scripts.pdf_downloader as pd
+from scripts.download_engine import DownloadEngine, DownloadResult
+from scripts.fake_factbook import FakeFactbookServer, make_fake_pdfs
+from scripts.request_scheduler import RequestScheduler
+
+
+def percentile(values, share):
+    """Return value at given share of sorted values, nearest rank.
+
+    Args:
+        values (list of float): measured values.
+        share (float): share between 0 and 1.
+
+    Returns:
+        float.
+
+    Examples:
+        >>>print(percentile([1, 2, 3, 4], 0.5))
+        2
+    """
+    values = sorted(values)
+    rank = max(0, min(len(values) - 1, round(share * len(values)) - 1))
+    return values[rank]
+
+
+def unpaced_scheduler():
+    """Return scheduler retrying requests without pacing them."""
+    return RequestScheduler(rate=1e6, burst=1e6, backoff_base=0.01)
+
+
+def run_engine(links, concurrency):
+    """Download links with DownloadEngine at fixed concurrency.
+
+    Args:
+        links (list): list of lists made of country name and link.
+        concurrency (int): number of requests in flight.
+
+    Returns:
+        Tuple of list of DownloadResult objects and wall time, seconds.
+    """
+    folder = tempfile.mkdtemp()
+    # fixed limit, so only concurrency is measured
+    engine = DownloadEngine(concurrency, concurrency, float("inf"),
+                            scheduler=unpaced_scheduler())
+    try:
+        start = time.perf_counter()
+        results = engine.download(links, folder)
+        return results, time.perf_counter() - start
+    finally:
+        shutil.rmtree(folder)
+
+
+def fetch_whole(session, scheduler, link):
+    """Download whole body of link into memory.
+
+    Returns:
+        Tuple of body, or None if download failed or is incomplete, and
+        time, seconds.
+    """
+    start = time.perf_counter()
+    try:
+        response = scheduler.get(session, link)
+        content = response.content if response.status_code == 200 else None
+        # body cut by the server counts as a failed download
+        if content is not None and len(content) < int(
+                response.headers.get("Content-Length", 0)):
+            content = None
+    # one failed file is counted, not raised
+    except Exception:  # pylint: disable=broad-except
+        content = None
+    return content, time.perf_counter() - start
+
+
+def run_blocks(links):
+    """Download links the way the project did before DownloadEngine.
+
+    Every block of four links gets a new session, its files are
+    requested together and kept in memory, and the next block starts
+    only after all four are written.
+
+    Returns:
+        Tuple of list of DownloadResult objects and wall time, seconds.
+    """
+    folder = tempfile.mkdtemp()
+    scheduler = unpaced_scheduler()
+    results = []
+    try:
+        start = time.perf_counter()
+        for first in range(0, len(links), 4):
+            block = links[first: first + 4]
+            with requests.Session() as session, \
+                    ThreadPoolExecutor(max_workers=len(block)) as pool:
+                pages = list(pool.map(
+                    lambda item, session=session: fetch_whole(
+                        session, scheduler, item[1]), block))
+
+            for (country, link), (content, seconds) in zip(block, pages):
+                if content is None:
+                    results.append(DownloadResult(country, link, "failed",
+                                                  0, seconds))
+                    continue
+                with open(os.path.join(folder, country + ".pdf"),
+                          "wb") as pdf_file:
+                    pdf_file.write(content)
+                results.append(DownloadResult(country, link, "downloaded",
+                                              len(content), seconds))
+        return results, time.perf_counter() - start
+    finally:
+        shutil.rmtree(folder)
+
+
+def report(label, results, seconds):
+    """Print throughput and latency for one run."""
+    latencies = [result.seconds for result in results]
+    size = sum(result.size for result in results)
+    failed = sum(result.status == "failed" for result in results)
+    print(f"{label:>16}: {len(results) / seconds:7.1f} files/s, "
+          f"p50 {percentile(latencies, 0.5) * 1000:7.1f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:7.1f} ms, "
+          f"{size / seconds / 1e6:7.2f} MB/s, {failed} failed")
+
+
+def main():
+    """Run benchmark for every concurrency setting."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=260)
+    parser.add_argument("--size", type=int, default=300 * 1024)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--bandwidth", type=float, default=5e6,
+                        help="bandwidth cap per response, bytes/sec")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--reset-rate", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, nargs="+",
+                        default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    source_folder = tempfile.mkdtemp()
+    make_fake_pdfs(source_folder, args.files, args.size)
+
+    # index is fetched without injected faults, so the whole corpus is
+    # measured
+    server = FakeFactbookServer(source_folder, latency=args.latency,
+                                bandwidth=args.bandwidth)
+    try:
+        with server:
+            links = pd.scrape_pdf_links(server.index_url)
+            links = [item for block in links for item in block]
+            if len(links) != args.files:
+                raise RuntimeError(f"index has {len(links)} of {args.files} "
+                                   f"files")
+            server.error_rate = args.error_rate
+            server.reset_rate = args.reset_rate
+            print(f"{len(links)} files of {args.size} bytes, "
+                  f"latency {args.latency}s, bandwidth {args.bandwidth} B/s")
+
+            report("blocks of 4", *run_blocks(links))
+            for concurrency in args.concurrency:
+                report(f"engine x{concurrency}",
+                       *run_engine(links, concurrency))
+
+            print(f"Server stats: {server.stats}")
+    finally:
+        shutil.rmtree(source_folder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""Micro-benchmark of split_percents() against its former version.
+
+Former version looked every element up with list.index() and deleted
+empty names from the list it was iterating, which skipped the element
+after every deleted one. Inputs are recorded while scraping a corpus,
+and synthetic lists of growing length show how time scales.
+
+Run from the project root with `python -m scripts.bench_split_percents pdf1`.
+"""
+import argparse
+import copy
+import time
+import scripts.pdf_scraper as ps
+from scripts import pdf_archive
+
+#: list of int: lengths of synthetic lists
+SIZES = [10, 100, 1000, 10000]
+
+
+def legacy_split_percents(field_name, a_list):
+    """split_percents() before it was made linear, kept for comparison."""
+    return_list = []
+    language_list = []
+    if a_list is None and field_name == "Language":
+        return [[None, None, False]]
+
+    if a_list is None:
+        return [[None, None]]
+
+    for element in a_list:
+
+        if element[:4] == "and ":
+            element = element[4:]
+        elif element[:5] == "also ":
+            element = element[5:]
+        elif element[:9] == "but also ":
+            element = element[9:]
+        elif element[:11] == "there is a ":
+            element = element[11:]
+
+        if field_name == "Language":
+
+            element = element.replace(";", ",")
+
+            officiality = "official" in element
+
+            element = element.replace(" (official)", "")
+
+        element = element.strip()
+
+        element_listed = element.split()
+
+        index = [element_listed.index(i) for i in element_listed if "%" in i]
+
+        try:
+            index = index[0]
+
+            if field_name == "Religion":
+                if (not element_listed[index - 1].isalpha()
+                        and "non-" not in element_listed[index - 1]
+                        and "/" not in element_listed[index - 1]):
+
+                    percentage = "".join(element_listed[index - 1: index + 1])
+                    parted = " ".join(element_listed[: index - 1])
+                else:
+                    percentage = element_listed[index]
+                    parted = " ".join(element_listed[:index])
+
+            else:
+                percentage = element_listed[index]
+                parted = " ".join(element_listed[:index])
+
+        except IndexError:
+            percentage = None
+            parted = " ".join(element_listed)
+
+        try:
+            percentage = percentage.replace("%", "")
+            percentage = float(percentage)
+        except (AttributeError, ValueError):
+            pass
+
+        # for Language we build two identical lists, since we need value
+        # country+language to be unique and we need to remove duplicates
+
+        if field_name == "Language":
+            return_list.append([parted, percentage, officiality])
+            language_list.append([parted, percentage, officiality])
+        else:
+            return_list.append([parted, percentage])
+
+    # we remove duplicate languages from main list, by turning it to
+    # dictionary with the language + percent as a key
+    if field_name == "Language":
+        return_list = list(dict((x[0] + str(x[1]), x)
+                                for x in return_list).values())
+
+        # To check that the language official status isn't lost, we
+        # compare elements from the second list, wich we didn't modify.
+        # If the language with official status was removed as a duplicate
+        # we replace it in the main list
+        for item in language_list:
+            if item not in return_list and item[2] == "Yes":
+                item_index = return_list.index(item[:2] + ["No"])
+                return_list[item_index] = item
+
+    for item in return_list:
+        if item[0] == "":
+            del return_list[return_list.index(item)]
+
+    return return_list
+
+
+def record_inputs(path_to_pdf):
+    """Return arguments split_percents() is called with for corpus.
+
+    Args:
+        path_to_pdf (str): path to folder or archive with PDFs.
+
+    Returns:
+        list of tuples made of field name and list of str.
+    """
+    calls = []
+    split_percents = ps.split_percents
+
+    def recording(field_name, a_list, *args):
+        calls.append((field_name, copy.deepcopy(a_list)))
+        return split_percents(field_name, a_list, *args)
+
+    ps.split_percents = recording
+    try:
+        with pdf_archive.open_corpus(path_to_pdf) as corpus:
+            for name in sorted(corpus.names):
+                with corpus.open(name) as pdf_file:
+                    try:
+                        ps.scrape_text(ps.extract_pdf_text(pdf_file))
+                    except Exception:  # pylint: disable=broad-except
+                        continue
+    finally:
+        ps.split_percents = split_percents
+    return calls
+
+
+def synthetic_inputs(size):
+    """Return Language, Religion and Imports lists of given length.
+
+    Two of every ten elements have no name, like after a trailing comma,
+    so the former version skips some of them.
+    """
+    items = [f"name {number} {number % 97}.5%" if number % 10 > 1 else ""
+             for number in range(size)]
+    return [("Language", items), ("Religion", items), ("Imports", items)]
+
+
+def best_time(func, calls, repeat):
+    """Return best time of calling func with every call, seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        arguments = copy.deepcopy(calls)
+        start = time.perf_counter()
+        for field_name, a_list in arguments:
+            func(field_name, a_list)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def compare(label, calls, repeat=5):
+    """Print time of both versions and number of different results."""
+    different = sum(
+        legacy_split_percents(field_name, copy.deepcopy(a_list))
+        != ps.split_percents(field_name, copy.deepcopy(a_list))
+        for field_name, a_list in calls)
+    legacy = best_time(legacy_split_percents, calls, repeat)
+    current = best_time(ps.split_percents, calls, repeat)
+
+    batch = float("inf")
+    for _ in range(repeat):
+        arguments = copy.deepcopy(calls)
+        start = time.perf_counter()
+        ps.split_percents_batch(arguments)
+        batch = min(batch, time.perf_counter() - start)
+
+    print(f"{label}: {len(calls)} calls, former {legacy * 1000:.2f} ms, "
+          f"current {current * 1000:.2f} ms "
+          f"(x{legacy / max(current, 1e-9):.1f}), batch "
+          f"{batch * 1000:.2f} ms, {different} results differ")
+
+
+def main():
+    """Run benchmark over corpus and synthetic lists."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("corpus", nargs="?", default=None,
+                        help="folder or archive with PDFs, optional")
+    args = parser.parse_args()
+
+    if args.corpus is not None:
+        compare("corpus", record_inputs(args.corpus))
+    for size in SIZES:
+        compare(f"{size} elements", synthetic_inputs(size),
+                repeat=1 if size > 1000 else 5)
+
+
+if __name__ == "__main__":
+    main()
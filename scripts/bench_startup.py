@@ -0,0 +1,62 @@
+"""Script measuring startup time of the downloader and the command line.
+
+Importing `scripts.pdf_downloader` no longer imports `requests_html`
+with pyppeteer and its HTML stack, and even `requests` is imported only
+when the first request is sent. `requests_html` isn't a dependency any
+more, so the former import can't be timed, `import requests` shows the
+part of the cost that is now deferred.
+
+Run from the project root with `python -m scripts.bench_startup`.
+"""
+import statistics
+import subprocess
+import sys
+import time
+
+#: dict: label and command measured in a fresh interpreter
+COMMANDS = {
+    "python only": [sys.executable, "-c", "pass"],
+    "import requests (deferred)": [sys.executable, "-c", "import requests"],
+    "import scripts.pdf_downloader": [sys.executable, "-c",
+                                      "import scripts.pdf_downloader"],
+    "python runner.py --help": [sys.executable, "runner.py", "--help"],
+}
+
+
+def time_command(command, runs):
+    """Return median wall-clock time of command in new interpreter.
+
+    Args:
+        command (list of str): command line to run.
+        runs (int): number of runs.
+
+    Returns:
+        float: median time, seconds, or None if command fails.
+    """
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        process = subprocess.run(command, stdout=subprocess.DEVNULL,
+                                 stderr=subprocess.DEVNULL, check=False)
+        timings.append(time.perf_counter() - start)
+        if process.returncode != 0:
+            return None
+    return statistics.median(timings)
+
+
+def main(runs=10):
+    """Print median startup time for every command.
+
+    Args:
+        runs (int): number of runs for each command.
+    """
+    for label, command in COMMANDS.items():
+        median = time_command(command, runs)
+        if median is None:
+            print(f"{label}: failed")
+        else:
+            print(f"{label}: {median * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
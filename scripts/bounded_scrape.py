@@ -0,0 +1,266 @@
+"""Module with memory-bounded scraping in recycled worker processes.
+
+pdfminer keeps fonts and layout objects alive between documents, so
+memory of a long-living worker only grows. Here every worker exits
+after given number of documents or once its resident memory crosses
+the limit, and a fresh process takes its place. Results are handed over
+one country at a time, so the caller can write them out instead of
+holding the whole corpus.
+"""
+import multiprocessing
+import os
+import pickle
+import queue
+import resource
+import time
+import traceback
+from scripts import pdf_archive
+from scripts.pdf_scraper import DEFAULT_BACKEND, scrape_document
+from scripts.storage_classes import CountryBundle
+
+#: float: time between checks of dead workers, seconds
+POLL_INTERVAL = 1.0
+
+
+def rss_bytes():
+    """Return resident memory of this process, bytes.
+
+    Peak memory is returned where /proc isn't available.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes(who=resource.RUSAGE_SELF):
+    """Return peak resident memory of this process or its children."""
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+def worker_loop(path_to_pdf, tasks, results, max_documents, max_rss,
+                options):
+    """Scrape PDFs from tasks queue until recycling is due.
+
+    Args:
+        path_to_pdf (str): path to folder or archive with PDFs.
+        tasks (multiprocessing.Queue): names of PDFs, None to stop.
+        results (multiprocessing.Queue): messages for parent process.
+        max_documents (int): number of PDFs after which worker exits,
+            no limit if None.
+        max_rss (int): resident memory after which worker exits, bytes,
+            no limit if None.
+        options (tuple): text cache, regions and backend passed to
+            scrape_document().
+    """
+    pid = os.getpid()
+    documents = 0
+
+    while True:
+        name = tasks.get()
+        if name is None:
+            results.put(("exit", pid, None, peak_rss_bytes()))
+            return
+
+        results.put(("start", pid, name, None))
+        try:
+            result = scrape_document(path_to_pdf, name, *options)[0]
+        except Exception as error:  # pylint: disable=broad-except
+            trace = traceback.format_exc()
+            # error is sent as it is, so its type reaches the quarantine
+            try:
+                pickle.loads(pickle.dumps(error))
+            except Exception:  # pylint: disable=broad-except
+                error = RuntimeError(f"{name}: failed to scrape "
+                                     f"({error!r})")
+            results.put(("error", pid, name, (error, trace)))
+        else:
+            results.put(("done", pid, name, result))
+
+        documents += 1
+        if ((max_documents is not None and documents >= max_documents)
+                or (max_rss is not None and rss_bytes() > max_rss)):
+            results.put(("exit", pid, None, peak_rss_bytes()))
+            return
+
+
+class BoundedScraper:
+    """Class scraping corpus in worker processes recycled by memory.
+
+    After a run, attributes hold number of recycled workers and their
+    peak memory for the report.
+    """
+
+    def __init__(self, workers=1, max_documents=None, max_rss=None,
+                 text_cache=None, regions=None, backend=DEFAULT_BACKEND,
+                 on_error=None):
+        #: int: number of worker processes
+        self.workers = workers
+        #: int: documents scraped by a worker before it is replaced
+        self.max_documents = max_documents
+        #: int: resident memory of a worker before it is replaced, bytes
+        self.max_rss = max_rss
+        #: tuple: text cache, regions and backend for scrape_document()
+        self.options = (text_cache, regions, backend)
+        #: callable: called with name of PDF, exception and traceback of
+        #: worker when PDF fails to scrape, exception is raised if None
+        self.on_error = on_error
+        #: int: number of workers replaced with fresh ones
+        self.recycled = 0
+        #: int: highest peak memory reported by a worker, bytes
+        self.worker_peak = 0
+        self._processes = {}
+        self._working = {}
+        self._finished = {}
+        self._started = 0
+
+    def _start_worker(self, path_to_pdf, tasks, results):
+        process = multiprocessing.Process(
+            target=worker_loop, daemon=True,
+            args=(path_to_pdf, tasks, results, self.max_documents,
+                  self.max_rss, self.options))
+        process.start()
+        self._processes[process.pid] = process
+
+    def iter_countries(self, path_to_pdf, names=None):
+        """Scrape PDFs and yield data of one country at a time.
+
+        Countries are yielded sorted by name of PDF. PDFs are handed to
+        workers in the same order and only few of them ahead, so memory
+        of the parent doesn't depend on corpus size either.
+
+        Args:
+            path_to_pdf (str): path to folder or archive with PDFs.
+            names (list of str): names of PDFs to scrape, all PDFs of the
+                corpus if None.
+
+        Yields:
+            CountryBundle objects.
+        """
+        if names is None:
+            with pdf_archive.open_corpus(path_to_pdf) as corpus:
+                names = corpus.names
+        names = sorted(names)
+
+        tasks = multiprocessing.Queue()
+        results = multiprocessing.Queue()
+        submitted = 0
+
+        for _ in range(min(self.workers, len(names))):
+            self._start_worker(path_to_pdf, tasks, results)
+
+        try:
+            for yielded, name in enumerate(names):
+                while name not in self._finished:
+                    # submitted but not yielded PDFs are kept in bounds
+                    while (submitted < len(names)
+                           and submitted - yielded < 2 * self.workers):
+                        tasks.put(names[submitted])
+                        submitted += 1
+                    self._receive(results, path_to_pdf, tasks, len(names))
+
+                result = self._finished.pop(name)
+                if isinstance(result, Exception):
+                    if self.on_error is None:
+                        raise result
+                    self.on_error(name, result, result.trace)
+                    continue
+                yield CountryBundle.from_lists(result, name)
+
+            # workers report their peak memory on exit
+            for _ in self._processes:
+                tasks.put(None)
+            while self._processes:
+                self._receive(results, path_to_pdf, tasks, len(names))
+        finally:
+            for process in self._processes.values():
+                process.terminate()
+            self._processes.clear()
+
+    def _receive(self, results, path_to_pdf, tasks, total):
+        """Wait for one message from workers and act on it.
+
+        Args:
+            results (multiprocessing.Queue): messages of workers.
+            path_to_pdf (str): path to folder or archive with PDFs.
+            tasks (multiprocessing.Queue): names of PDFs for workers.
+            total (int): number of PDFs in corpus.
+        """
+        try:
+            kind, pid, name, value = results.get(timeout=POLL_INTERVAL)
+        except queue.Empty:
+            self._check_dead(path_to_pdf, tasks, results, total)
+            return
+
+        if kind == "start":
+            self._working[pid] = name
+            self._started += 1
+        elif kind == "done":
+            del self._working[pid]
+            self._finished[name] = value
+        elif kind == "error":
+            del self._working[pid]
+            error, error.trace = value
+            self._finished[name] = error
+        elif kind == "exit":
+            self.worker_peak = max(self.worker_peak, value)
+            self._processes.pop(pid).join()
+            # recycled worker is replaced while PDFs are left
+            if self._started < total:
+                self.recycled += 1
+                self._start_worker(path_to_pdf, tasks, results)
+
+    def _check_dead(self, path_to_pdf, tasks, results, total):
+        """Handle workers killed by signal or crash and replace them.
+
+        Worker killed in the middle of a PDF fails the PDF: error is
+        raised, or passed to on_error if it is set.
+        """
+        for pid, process in list(self._processes.items()):
+            if process.is_alive() or process.exitcode == 0:
+                continue
+            if pid in self._working:
+                error = RuntimeError(f"worker {pid} died with exit code "
+                                     f"{process.exitcode} while scraping "
+                                     f"{self._working[pid]}")
+                if self.on_error is None:
+                    raise error
+                error.trace = None
+                self._finished[self._working.pop(pid)] = error
+            del self._processes[pid]
+            if self._started < total:
+                self._start_worker(path_to_pdf, tasks, results)
+
+    def print_report(self, seconds):
+        """Print recycled workers and peak memory."""
+        print(f"Scraped in {seconds:.2f}s, {self.recycled} workers "
+              f"recycled, peak memory: main "
+              f"{peak_rss_bytes() / 2 ** 20:.0f} MB, worker "
+              f"{self.worker_peak / 2 ** 20:.0f} MB")
+
+
+def iter_countries_bounded(path_to_pdf, workers=1, max_documents=None,
+                           max_rss=None, names=None, **options):
+    """Yield countries scraped by recycled workers and report memory.
+
+    Args:
+        path_to_pdf (str): path to folder or archive with PDFs.
+        workers (int): number of worker processes.
+        max_documents (int): documents scraped by a worker before it is
+            replaced, optional.
+        max_rss (int): resident memory of a worker before it is
+            replaced, bytes, optional.
+        names (list of str): names of PDFs to scrape, all PDFs of the
+            corpus if None.
+        **options: text_cache, regions, backend and on_error.
+
+    Yields:
+        CountryBundle objects.
+    """
+    scraper = BoundedScraper(workers, max_documents, max_rss, **options)
+    start = time.perf_counter()
+    yield from scraper.iter_countries(path_to_pdf, names)
+    scraper.print_report(time.perf_counter() - start)
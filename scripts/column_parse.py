@@ -0,0 +1,327 @@
+"""Module scraping many countries at once, numeric fields by columns.
+
+All texts are segmented first. Then Population, Population Growth,
+Urbanization, Literacy, GDP (PPP) and GDP per capita are parsed as
+columns: texts of a field of all countries are joined with newlines,
+and its pattern runs once over the whole column instead of once per
+country. Values are made from matches by the same functions the
+scalar parsers use, so results are the same as of scrape_text().
+Texts not matching the pattern, and missing fields, fall back to the
+scalar parser.
+
+Run from the project root with `python -m scripts.column_parse pdf1`
+to check results and time against scrape_text().
+"""
+import argparse
+import re
+import time
+from bisect import bisect_right
+import scripts.pdf_scraper as ps
+from scripts import pdf_archive
+
+#: str: country parsed by the scalar parser of Population only
+NO_POPULATION = "FRENCH SOUTHERN AND ANTARCTIC LANDS"
+
+
+def column_pattern(pattern):
+    r"""Return pattern for a column of texts joined with newlines.
+
+    Text of a field is made of words joined with single spaces, so \s
+    limited to whitespace other than newline matches the same inside a
+    text, and no match can run from one text to the next. The rest of
+    the text is taken into the match, so search goes on from the next
+    text right away.
+    """
+    return re.compile("(?:" + pattern.pattern.replace(r"\s", r"[^\S\n]")
+                      + r")[^\n]*", pattern.flags | re.MULTILINE)
+
+
+# per_capita_field() takes text before the first " (" and at most five
+# characters after it, which stop at the next " ("
+PER_CAPITA_PATTERN = column_pattern(
+    re.compile(r"^(.*?) \(((?:(?! \().){0,5})"))
+
+
+def per_capita_match_values(match):
+    """Return year and GDP per capita from match of PER_CAPITA_PATTERN."""
+    return ps.per_capita_values(match[1], match[2])
+
+
+#: dict: numeric field as a key, tuple of pattern for its column and
+#: function making value of the field from a match as value
+NUMERIC_COLUMNS = {
+    "Literacy": (column_pattern(ps.LITERACY_PATTERN), ps.literacy_values),
+    "Urbanization": (column_pattern(ps.URBANIZATION_PATTERN),
+                     ps.urbanization_values),
+    "Population Growth": (column_pattern(ps.POPULATION_GROWTH_PATTERN),
+                          ps.population_growth_values),
+    "GDP (Purchasing Power Parity)": (column_pattern(ps.GDP_PATTERN),
+                                      ps.gdp_values),
+    "GDP per capita (Purchasing Power Parity)": (PER_CAPITA_PATTERN,
+                                                 per_capita_match_values),
+}
+
+# Population has pattern of its own for numbers written in words
+BIG_POPULATION_COLUMN = (column_pattern(ps.BIG_POPULATION_PATTERN),
+                         ps.big_population_values)
+POPULATION_COLUMN = (column_pattern(ps.POPULATION_PATTERN),
+                     ps.population_values)
+
+#: list of str: fields parsed by columns
+COLUMN_FIELDS = list(NUMERIC_COLUMNS) + ["Population"]
+
+
+def column_matches(pattern, column):
+    """Return the first match of pattern in every text of column.
+
+    Args:
+        pattern (re.Pattern): pattern made by column_pattern().
+        column (list of str): texts of one field, without newlines.
+
+    Returns:
+        list: re.Match or None for every text, in order of column.
+
+    Examples:
+        >>>pattern = column_pattern(ps.LITERACY_PATTERN)
+        >>>print([m and m[1] for m in column_matches(pattern, ["99% (2015)",
+        "none", "86.5% (2018)"])])
+        ['99%', None, '86.5%']
+    """
+    starts = []
+    offset = 0
+    for text in column:
+        starts.append(offset)
+        offset += len(text) + 1
+
+    matches = [None] * len(column)
+    for match in pattern.finditer("\n".join(column)):
+        row = bisect_right(starts, match.start()) - 1
+        if matches[row] is None:
+            matches[row] = match
+    return matches
+
+
+def column_groups(field_name, countries, column):
+    """Return rows of column parsed together, with pattern and function.
+
+    Args:
+        field_name (str): name of numeric field.
+        countries (list of str): names of countries, one for every row.
+        column (list of str): texts of the field, None if missing.
+
+    Returns:
+        List of tuples of list of row indexes, pattern and function.
+    """
+    rows = [row for row, text in enumerate(column) if text is not None]
+    if field_name != "Population":
+        return [(rows, *NUMERIC_COLUMNS[field_name])]
+
+    rows = [row for row in rows if countries[row] != NO_POPULATION]
+    big = [row for row in rows
+           if "million" in column[row] or "billion" in column[row]]
+    small = sorted(set(rows) - set(big))
+    return [(big, *BIG_POPULATION_COLUMN), (small, *POPULATION_COLUMN)]
+
+
+def parse_column(field_name, countries, column):
+    """Parse texts of one numeric field of all countries.
+
+    Rows without a match, or with a match values can't be made of, are
+    parsed by the scalar parser of the field. Calls aren't counted in
+    parser stats, see scrape_texts().
+
+    Args:
+        field_name (str): name of numeric field.
+        countries (list of str): names of countries, one for every row.
+        column (list of str): texts of the field, None if missing.
+
+    Returns:
+        Tuple of two lists: value of field for every row, or exception
+        raised by its scalar parser, and time spent on every row,
+        seconds. Time of a regex pass is shared evenly by its rows.
+    """
+    values = [None] * len(column)
+    seconds = [0.0] * len(column)
+    parsed = [False] * len(column)
+
+    for rows, pattern, make_values in column_groups(field_name, countries,
+                                                    column):
+        start = time.perf_counter()
+        matches = column_matches(pattern, [column[row] for row in rows])
+        for row, match in zip(rows, matches):
+            if match is None:
+                continue
+            try:
+                values[row] = make_values(match)
+            except (AttributeError, IndexError, TypeError, ValueError):
+                continue
+            parsed[row] = True
+        share = (time.perf_counter() - start) / max(1, len(rows))
+        for row in rows:
+            seconds[row] += share
+
+    parser = ps.field_parser(field_name)
+    for row, text in enumerate(column):
+        if parsed[row]:
+            continue
+        start = time.perf_counter()
+        try:
+            values[row] = parser.parse(countries[row], text, field_name)
+        except Exception as error:  # pylint: disable=broad-except
+            values[row] = error
+        seconds[row] += time.perf_counter() - start
+
+    return values, seconds
+
+
+def scrape_texts(texts, on_error=None):
+    """Scrape data for many countries, numeric fields by columns.
+
+    Parser stats count every field of a text once, by the path whose
+    result is kept: columns, or scrape_text() the text falls back to.
+
+    Args:
+        texts (list of str): texts of PDFs, as returned by
+            extract_pdf_text().
+        on_error (callable): called with index of text and exception
+            when text fails to scrape, and None is returned for it.
+            Exception is raised if None.
+
+    Returns:
+        list: result of scrape_text() for every text, in order of texts.
+    """
+    segmented = []
+    for text in texts:
+        try:
+            segmented.append(ps.segment_text(text))
+        except Exception as error:  # pylint: disable=broad-except
+            segmented.append(error)
+    rows = [item for item in segmented if not isinstance(item, Exception)]
+
+    countries = [country_id for country_id, _, _ in rows]
+    columns = {field_name: parse_column(
+        field_name, countries, [field_texts[field_name]
+                                for _, _, field_texts in rows])
+               for field_name in COLUMN_FIELDS}
+
+    results = []
+    row = 0
+    for index, item in enumerate(segmented):
+        try:
+            if isinstance(item, Exception):
+                raise item
+            country_id, last_update, field_texts = item
+            values = {}
+            timings = []
+            for field_name in ps.FIELDS[::-1]:
+                parser = ps.field_parser(field_name)
+                if field_name in columns:
+                    value = columns[field_name][0][row]
+                    if isinstance(value, Exception):
+                        # scalar scraping raises the same error it does
+                        # without columns, and counts its own calls
+                        value = ps.scrape_text(texts[index])
+                        break
+                    values[field_name] = value
+                    timings.append((parser, columns[field_name][1][row]))
+                else:
+                    start = time.perf_counter()
+                    values[field_name] = parser.parse(
+                        country_id, field_texts[field_name], field_name)
+                    timings.append((parser, time.perf_counter() - start))
+            else:
+                value = ps.build_records(country_id, last_update, values)
+                for parser, seconds in timings:
+                    parser.record(seconds)
+            results.append(value)
+        except Exception as error:  # pylint: disable=broad-except
+            if on_error is None:
+                raise
+            on_error(index, error)
+            results.append(None)
+        if not isinstance(item, Exception):
+            row += 1
+
+    return results
+
+
+def best_time(func, repeat=5):
+    """Return the best of few wall times of func(), seconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def result_values(result):
+    """Return attributes of class objects of scraped result, comparable."""
+    return [[vars(item) for item in table] for table in result]
+
+
+def scalar_texts(texts):
+    """Return scrape_text() of every text, or repr of its exception."""
+    results = []
+    for text in texts:
+        try:
+            results.append(result_values(ps.scrape_text(text)))
+        except Exception as error:  # pylint: disable=broad-except
+            results.append(repr(error))
+    return results
+
+
+def main():
+    """Compare column parsing with scrape_text() over a corpus."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("path_to_pdf",
+                        help="folder or archive with PDFs")
+    args = parser.parse_args()
+
+    with pdf_archive.open_corpus(args.path_to_pdf) as corpus:
+        texts = []
+        for name in sorted(corpus.names):
+            with corpus.open(name) as pdf_file:
+                texts.append(ps.extract_pdf_text(pdf_file))
+
+    errors = {}
+    expected = scalar_texts(texts)
+    found = scrape_texts(texts, on_error=lambda index, error: errors.update(
+        {index: repr(error)}))
+    found = [errors[index] if result is None else result_values(result)
+             for index, result in enumerate(found)]
+    different = sum(a != b for a, b in zip(expected, found))
+    print(f"{len(texts)} texts, {len(errors)} failed, {different} results "
+          f"differ")
+
+    texts = [text for text, result in zip(texts, expected)
+             if not isinstance(result, str)]
+
+    def column_values():
+        segmented = [ps.segment_text(text) for text in texts]
+        countries = [country_id for country_id, _, _ in segmented]
+        for field_name in COLUMN_FIELDS:
+            parse_column(field_name, countries,
+                         [field_texts[field_name]
+                          for _, _, field_texts in segmented])
+
+    def scalar_values():
+        for text in texts:
+            country_id, _, field_texts = ps.segment_text(text)
+            for field_name in COLUMN_FIELDS:
+                ps.field_parser(field_name)(
+                    country_id, field_texts[field_name], field_name)
+
+    scalar = best_time(scalar_values)
+    column = best_time(column_values)
+    print(f"numeric fields with segmentation: scalar {scalar * 1000:.1f} "
+          f"ms, columns {column * 1000:.1f} ms")
+    scalar = best_time(lambda: [ps.scrape_text(text) for text in texts])
+    column = best_time(lambda: scrape_texts(texts))
+    print(f"whole texts: scalar {scalar * 1000:.1f} ms, columns "
+          f"{column * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
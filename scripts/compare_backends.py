@@ -0,0 +1,172 @@
+"""Harness comparing data scraped with different text backends.
+
+Every PDF of the corpus is converted to text by every backend and
+scraped. Records of the reference backend are matched with records of
+the others by the primary key of their table and compared field by
+field.
+Conversion time of every backend is reported as well.
+
+Run from the project root with
+`python -m scripts.compare_backends pdf1 --backends pdfminer pdfminer-nolayout`.
+"""
+import argparse
+import time
+import scripts.storage_classes as sc
+from scripts import pdf_archive
+from scripts.pdf_scraper import scrape_text
+from scripts.sqlite import TABLES
+from scripts.text_backends import available_backends, get_backend
+
+
+#: dict: class of record as a key, names of attributes making the
+#: primary key of its table in DB as value
+RECORD_KEYS = {
+    sc.CountryGeneral: ("name",),
+    sc.CountryNaturalResources: ("country", "resource"),
+    sc.CountryLanguage: ("country_name", "language", "officiality"),
+    sc.CountryReligion: ("country_name", "religion"),
+    sc.CountryEthnicity: ("country_name", "ethnicity"),
+    sc.CountryImportPartners: ("country_name", "import_partner"),
+    sc.CountryExportPartners: ("country_name", "export_partner"),
+}
+
+
+def record_key(record):
+    """Return values identifying record, as primary key of its table.
+
+    Examples:
+        >>>print(record_key(CountryLanguage("PERU", "Spanish", 82.9, True,
+        2017)))
+        ('PERU', 'Spanish', True)
+    """
+    return tuple(getattr(record, name) for name in RECORD_KEYS[type(record)])
+
+
+def diff_records(reference, other):
+    """Return differences between two results of scrape_text().
+
+    Args:
+        reference (list): result of reference backend.
+        other (list): result of compared backend.
+
+    Returns:
+        list of tuples made of table, key of record, name of attribute
+        and both values. Missing records have None as attribute.
+    """
+    differences = []
+
+    for table, expected, actual in zip(TABLES, reference, other):
+        expected = {record_key(record): vars(record) for record in expected}
+        actual = {record_key(record): vars(record) for record in actual}
+
+        for key in sorted(set(expected) | set(actual), key=repr):
+            if key not in actual or key not in expected:
+                differences.append((table, key, None,
+                                    key in expected, key in actual))
+                continue
+            for name, value in expected[key].items():
+                if actual[key][name] != value:
+                    differences.append((table, key, name, value,
+                                        actual[key][name]))
+
+    return differences
+
+
+def run_backend(backend, pdf_file):
+    """Convert PDF with backend and scrape it.
+
+    Returns:
+        Tuple of scraped data or error text, and conversion time,
+        seconds.
+    """
+    start = time.perf_counter()
+    try:
+        text = get_backend(backend)(pdf_file)
+    except Exception as error:  # pylint: disable=broad-except
+        return f"conversion failed: {error!r}", time.perf_counter() - start
+    seconds = time.perf_counter() - start
+
+    try:
+        return scrape_text(text), seconds
+    except Exception as error:  # pylint: disable=broad-except
+        return f"scraping failed: {error!r}", seconds
+
+
+def compare(path_to_pdf, backends, show=5):
+    """Compare backends over corpus and print report.
+
+    Args:
+        path_to_pdf (str): path to folder or archive with PDFs.
+        backends (list of str): names of backends, first is reference.
+        show (int): number of differences printed for every backend.
+
+    Returns:
+        dict: name of backend as a key, dict with time, numbers of equal
+        and failed PDFs and differences by attribute as value.
+    """
+    report = {backend: {"seconds": 0.0, "equal": 0, "failed": 0,
+                        "fields": {}, "examples": []}
+              for backend in backends}
+    documents = 0
+
+    with pdf_archive.open_corpus(path_to_pdf) as corpus:
+        for name in sorted(corpus.names):
+            documents += 1
+            results = {}
+            for backend in backends:
+                with corpus.open(name) as pdf_file:
+                    results[backend], seconds = run_backend(backend,
+                                                            pdf_file)
+                report[backend]["seconds"] += seconds
+
+            reference = results[backends[0]]
+            for backend in backends:
+                entry = report[backend]
+                if isinstance(results[backend], str):
+                    entry["failed"] += 1
+                    entry["examples"].append((name, results[backend]))
+                    continue
+                if isinstance(reference, str):
+                    continue
+
+                differences = diff_records(reference, results[backend])
+                entry["equal"] += not differences
+                for table, key, attribute, *values in differences:
+                    field = f"{table}.{attribute or 'record'}"
+                    entry["fields"][field] = entry["fields"].get(field, 0) + 1
+                    entry["examples"].append((name, (key, attribute,
+                                                     *values)))
+
+    for backend in backends:
+        entry = report[backend]
+        print(f"{backend}: {entry['seconds']:.2f}s, "
+              f"{documents / max(entry['seconds'], 1e-9):.1f} PDFs/s, "
+              f"x{report[backends[0]]['seconds'] / max(entry['seconds'], 1e-9):.2f}"
+              f" of {backends[0]}, {entry['equal']} of {documents} equal, "
+              f"{entry['failed']} failed")
+        for field, count in sorted(entry["fields"].items(),
+                                   key=lambda item: -item[1]):
+            print(f"    {field}: {count} differences")
+        for example in entry["examples"][:show]:
+            print(f"    {example[0]}: {example[1]}")
+
+    return report
+
+
+def main():
+    """Compare backends given in command line."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("corpus", help="folder or archive with PDFs")
+    parser.add_argument("--backends", nargs="+", default=None,
+                        help="backends to compare, first is reference; "
+                             "all installed ones by default")
+    parser.add_argument("--show", type=int, default=5,
+                        help="differences printed for every backend")
+    args = parser.parse_args()
+
+    backends = args.backends or available_backends()
+    compare(args.corpus, backends, args.show)
+
+
+if __name__ == "__main__":
+    main()
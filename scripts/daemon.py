@@ -0,0 +1,97 @@
+"""Module with service mode, refreshing the DB on a schedule."""
+import os
+import time
+import scripts.pdf_downloader as pd
+import scripts.sqlite as sq
+from scripts.http_cache import HttpCache
+from scripts.incremental import scrape_incremental
+from scripts.pdf_store import PdfStore
+from scripts.quarantine import Quarantine
+from scripts.text_cache import TextCache
+
+
+def refresh(cia_page, pdf_folder, db_file, http_cache, pdf_store,
+            text_cache=None, quarantine=None):
+    """Run single refresh cycle.
+
+    Checks index page and downloads changed PDFs. What to scrape is
+    decided by comparing the folder with the manifest in DB, so PDFs,
+    which failed on earlier cycles or were in the folder before the
+    first one, are scraped too. Rows of all scraped countries are
+    replaced in a single transaction, failed PDFs are quarantined.
+
+    Args:
+        cia_page (str): link to the page, containing PDF files.
+        pdf_folder (str): path to folder for saving PDF.
+        db_file (str): path to DB file.
+        http_cache (HttpCache): cache for conditional requests.
+        pdf_store (PdfStore): content-addressed store of PDFs.
+        text_cache (TextCache): cache of extracted text, optional.
+        quarantine (Quarantine): keeps failed PDFs, optional.
+
+    Returns:
+        dict: time of every stage, seconds, and number of changed and
+        failed countries.
+    """
+    timings = {}
+    start = time.perf_counter()
+
+    links = pd.scrape_pdf_links(cia_page, http_cache)
+    links = [item for block in links for item in block]
+    pd.download_pdfs(links, pdf_folder, cache=http_cache, store=pdf_store)
+    timings["download"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    counts = scrape_incremental(pdf_folder, db_file, text_cache=text_cache,
+                                quarantine=quarantine)
+    timings["scrape"] = time.perf_counter() - start
+
+    timings["changed"] = counts["replaced"] + counts["removed"]
+    timings["failed"] = counts["failed"]
+    return timings
+
+
+def run_daemon(cia_page, pdf_folder, db_file, interval, cycles=None):
+    """Refresh DB every interval seconds.
+
+    HTTP session, caches, PDF store, quarantine and parser settings are
+    created once and kept between cycles.
+
+    Args:
+        cia_page (str): link to the page, containing PDF files.
+        pdf_folder (str): path to folder for saving PDF.
+        db_file (str): path to DB file.
+        interval (float): time between starts of cycles, seconds.
+        cycles (int): number of cycles to run, runs forever if None.
+    """
+    os.makedirs(pdf_folder, exist_ok=True)
+    if os.path.dirname(db_file):
+        os.makedirs(os.path.dirname(db_file), exist_ok=True)
+    sq.create_db(db_file)
+
+    http_cache = HttpCache.for_folder(pdf_folder)
+    pdf_store = PdfStore.for_folder(pdf_folder)
+    text_cache = TextCache.for_folder(pdf_folder)
+    quarantine = Quarantine.for_folder(pdf_folder)
+
+    cycle = 0
+    while cycles is None or cycle < cycles:
+        cycle += 1
+        start = time.perf_counter()
+
+        try:
+            timings = refresh(cia_page, pdf_folder, db_file, http_cache,
+                              pdf_store, text_cache, quarantine)
+            print(f"Cycle {cycle}: {timings['changed']} changed, "
+                  f"{timings['failed']} failed, "
+                  f"download {timings['download']:.2f}s, "
+                  f"scrape and load {timings['scrape']:.2f}s")
+        # network errors are retried on the next cycle
+        except Exception as error:  # pylint: disable=broad-except
+            print(f"Cycle {cycle}: failed ({error!r})")
+
+        elapsed = time.perf_counter() - start
+        print(f"Cycle {cycle} finished in {elapsed:.2f}s")
+
+        if cycles is None or cycle < cycles:
+            time.sleep(max(0.0, interval - elapsed))
@@ -0,0 +1,403 @@
+"""Module with asynchronous engine for downloading PDF files."""
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from scripts.request_scheduler import RequestScheduler
+
+_SESSION = None
+_SESSION_POOL_SIZE = 0
+_SCHEDULER = None
+
+#: int: connections kept open to one host by the shared session
+POOL_SIZE = 16
+
+#: int: size of chunks for streaming downloads, bytes
+CHUNK_SIZE = 64 * 1024
+
+PDF_HEADER = b"%PDF-"
+PDF_EOF = b"%%EOF"
+#: int: how many bytes at the end of file are searched for PDF_EOF
+PDF_TAIL_SIZE = 1024
+
+
+def get_session(pool_size=POOL_SIZE):
+    """Return HTTP session shared by all downloads in the process.
+
+    Sharing one session means sharing one connection pool, so the
+    connection to the source host is reused for every file. requests is
+    imported here, so modules of the project can be imported without
+    loading network libraries.
+
+    Pool of requests keeps only 10 connections to a host by default,
+    connections of more concurrent requests would be closed after every
+    request. Pool is enlarged when more connections are asked for.
+
+    Args:
+        pool_size (int): number of concurrent requests to one host.
+
+    Returns:
+        requests.Session object.
+    """
+    global _SESSION, _SESSION_POOL_SIZE
+    # pylint: disable=import-outside-toplevel
+    if _SESSION is None:
+        import requests
+        _SESSION = requests.Session()
+
+    if pool_size > _SESSION_POOL_SIZE:
+        from requests.adapters import HTTPAdapter
+        adapter = HTTPAdapter(pool_maxsize=pool_size)
+        _SESSION.mount("http://", adapter)
+        _SESSION.mount("https://", adapter)
+        _SESSION_POOL_SIZE = pool_size
+    return _SESSION
+
+
+def get_scheduler():
+    """Return request scheduler shared by all downloads in the process.
+
+    Returns:
+        RequestScheduler object.
+    """
+    global _SCHEDULER
+    if _SCHEDULER is None:
+        _SCHEDULER = RequestScheduler()
+    return _SCHEDULER
+
+
+class DownloadResult:
+    """Class for storing the outcome of a single PDF download."""
+
+    def __init__(self, country, link, status, size, seconds, error=None):
+        #: str: name of the country
+        self.country = country
+        #: str: link to the PDF file
+        self.link = link
+        #: str: "downloaded", "unchanged", "not modified" or "failed"
+        self.status = status
+        #: int: number of bytes received
+        self.size = size
+        #: float: wall-clock time of the download, seconds
+        self.seconds = seconds
+        #: str: error description for failed downloads
+        self.error = error
+
+
+class AdaptiveLimit:
+    """Concurrency limit adjusted by observed latency and errors.
+
+    Limit grows by one after each fast response and is halved after an
+    error or a response slower than the latency target.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=16, latency_target=2.0):
+        #: int: current number of requests allowed in flight
+        self.limit = max(minimum, min(initial, maximum))
+        #: int: lower bound for the limit
+        self.minimum = minimum
+        #: int: upper bound for the limit
+        self.maximum = maximum
+        #: float: latency, seconds, above which the limit is reduced
+        self.latency_target = latency_target
+
+    def on_success(self, seconds):
+        """Update limit after a successful request.
+
+        Args:
+            seconds (float): latency of the request.
+        """
+        if seconds > self.latency_target:
+            self.limit = max(self.minimum, self.limit // 2)
+        else:
+            self.limit = min(self.maximum, self.limit + 1)
+
+    def on_error(self):
+        """Update limit after a failed request."""
+        self.limit = max(self.minimum, self.limit // 2)
+
+
+def check_pdf(file_path, expected_size=None):
+    """Check that file looks like a complete PDF.
+
+    Only cheap checks are made: size of the file, PDF header at the
+    start and end-of-file marker near the end.
+
+    Args:
+        file_path (str): path to the file.
+        expected_size (int): expected size of the file, bytes, optional.
+
+    Returns:
+        bool: True if file passes all checks.
+    """
+    size = os.path.getsize(file_path)
+
+    if expected_size is not None and size != expected_size:
+        return False
+
+    with open(file_path, "rb") as pdf_file:
+        header = pdf_file.read(len(PDF_HEADER))
+        pdf_file.seek(max(0, size - PDF_TAIL_SIZE))
+        tail = pdf_file.read()
+
+    return header == PDF_HEADER and PDF_EOF in tail
+
+
+def expected_length(response, offset):
+    """Return full size of the body from response headers or None.
+
+    Args:
+        response (Response): response with status 200 or 206.
+        offset (int): number of bytes already on disk.
+
+    Returns:
+        int or None.
+    """
+    if response.status_code == 206:
+        # Content-Range has form "bytes 100-199/200"
+        total = response.headers.get("Content-Range", "").split("/")[-1]
+        return int(total) if total.isdigit() else None
+
+    length = response.headers.get("Content-Length")
+    if length is not None and offset == 0:
+        return int(length)
+    return None
+
+
+def fetch_pdf(session, country, link, path_to_folder, cache=None,
+              scheduler=None, store=None, archive=None, attempt=0):
+    """Download single PDF with the given session and save it to folder.
+
+    Body is streamed in chunks to a hidden partial file, which is renamed
+    to `<country>.pdf` only after it passes check_pdf(). If partial file
+    is left from an interrupted download, only the missing part is
+    requested with HTTP Range.
+
+    When cache is given and the file already exists, request is sent
+    as a conditional GET and the file isn't rewritten if server answers
+    with 304.
+
+    Request is paced and retried by scheduler. If connection breaks in
+    the middle of the body, download is resumed from the partial file.
+
+    Args:
+        session (requests.Session): session used for the request.
+        country (str): name of country.
+        link (str): link to PDF corresponding to country.
+        path_to_folder (str): path to folder for saving PDF.
+        cache (HttpCache): cache with HTTP metadata, optional.
+        scheduler (RequestScheduler): scheduler for the request, shared
+            scheduler is used if not given.
+        store (PdfStore): content-addressed store, optional. With store
+            file with unchanged content isn't rewritten.
+        archive (PackWriter): pack file, optional. With archive file is
+            written to the pack instead of the folder.
+        attempt (int): number of earlier attempts broken mid-body.
+
+    Returns:
+        Tuple of str and int - "downloaded", "unchanged" or "not
+        modified" and number of bytes received.
+    """
+    file_path = os.path.join(path_to_folder, country + ".pdf")
+    part_path = os.path.join(path_to_folder, "." + country + ".pdf.part")
+
+    if archive is not None:
+        exists = country + ".pdf" in archive
+    else:
+        exists = os.path.exists(file_path)
+
+    offset = 0
+    if os.path.exists(part_path):
+        offset = os.path.getsize(part_path)
+
+    headers = {}
+    if offset > 0:
+        headers["Range"] = f"bytes={offset}-"
+        if cache is not None and cache.partial_validator(link):
+            headers["If-Range"] = cache.partial_validator(link)
+    elif cache is not None and exists:
+        headers = cache.conditional_headers(link)
+
+    scheduler = scheduler or get_scheduler()
+    response = scheduler.get(session, link, headers=headers, stream=True)
+
+    try:
+        if response.status_code == 304:
+            return "not modified", 0
+
+        if response.status_code == 416:
+            # partial file doesn't match the file on server, start over
+            os.remove(part_path)
+            response.close()
+            return fetch_pdf(session, country, link, path_to_folder, cache,
+                             scheduler, store, archive, attempt)
+
+        response.raise_for_status()
+
+        if response.status_code != 206:
+            offset = 0
+            if cache is not None:
+                cache.set_partial_validator(link, response.headers)
+
+        size = expected_length(response, offset)
+        received = 0
+
+        try:
+            with open(part_path, "ab" if offset else "wb") as pdf_file:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    pdf_file.write(chunk)
+                    received += len(chunk)
+
+            # server can close connection early without an error
+            if size is not None and os.path.getsize(part_path) < size:
+                raise ConnectionError(f"{country}: body is incomplete")
+        # requests exceptions are subclasses of IOError
+        except OSError:
+            if not scheduler.wait_before_retry(attempt):
+                raise
+            response.close()
+            return fetch_pdf(session, country, link, path_to_folder, cache,
+                             scheduler, store, archive, attempt + 1)
+    finally:
+        response.close()
+
+    if not check_pdf(part_path, size):
+        os.remove(part_path)
+        raise ValueError(f"{country}: downloaded file is not a complete PDF")
+
+    if archive is not None:
+        archive.add(country + ".pdf", part_path)
+        os.remove(part_path)
+        status = "downloaded"
+    elif store is None:
+        os.replace(part_path, file_path)
+        status = "downloaded"
+    elif store.add(country, part_path, link, file_path):
+        status = "downloaded"
+    else:
+        status = "unchanged"
+
+    if cache is not None:
+        cache.update(link, response.headers, offset + received)
+
+    return status, received
+
+
+class DownloadEngine:
+    """Engine downloading many PDF files over one shared session.
+
+    Keeps up to `limit` requests in flight at any moment instead of
+    waiting for a whole block of files before starting the next one.
+    """
+
+    def __init__(self, concurrency=4, max_concurrency=16,
+                 latency_target=2.0, session=None, cache=None,
+                 scheduler=None, store=None, archive=None):
+        #: AdaptiveLimit: current concurrency limit
+        self.limit = AdaptiveLimit(concurrency, 1, max_concurrency,
+                                   latency_target)
+        #: int: size of the thread pool running the requests
+        self.max_concurrency = max_concurrency
+        #: session shared by all requests of the engine
+        self.session = session or get_session(max_concurrency)
+        #: HttpCache: cache for conditional requests, optional
+        self.cache = cache
+        #: RequestScheduler: scheduler pacing and retrying requests
+        self.scheduler = scheduler or get_scheduler()
+        #: PdfStore: content-addressed store for downloaded files
+        self.store = store
+        #: PackWriter: pack file receiving downloaded files, optional
+        self.archive = archive
+
+    def download(self, links, path_to_folder, on_result=None):
+        """Download all PDFs from links to folder.
+
+        Args:
+            links (list): each element is a list made of two str -
+                country name and link to corresponding PDF file.
+            path_to_folder (str): path to folder for saving PDF.
+            on_result (callable): function called with DownloadResult as
+                soon as each file is finished, optional. It is called in
+                a worker thread and may block.
+
+        Returns:
+            List of DownloadResult objects in the same order as links.
+        """
+        self.scheduler.start_deadline()
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(
+                self._download_all(links, path_to_folder, on_result))
+        finally:
+            loop.close()
+            if self.cache is not None:
+                self.cache.save()
+            if self.store is not None:
+                self.store.save()
+
+    async def _download_all(self, links, path_to_folder, on_result):
+        in_flight = asyncio.Condition()
+        state = {"running": 0}
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+
+            async def worker(country, link):
+                async with in_flight:
+                    await in_flight.wait_for(
+                        lambda: state["running"] < self.limit.limit)
+                    state["running"] += 1
+
+                start = time.perf_counter()
+                try:
+                    status, size = await asyncio.get_running_loop(
+                    ).run_in_executor(pool, fetch_pdf, self.session, country,
+                                      link, path_to_folder, self.cache,
+                                      self.scheduler, self.store,
+                                      self.archive)
+                    seconds = time.perf_counter() - start
+                    self.limit.on_success(seconds)
+                    result = DownloadResult(country, link, status, size,
+                                            seconds)
+                # one failed file shouldn't stop the rest of downloads
+                except Exception as error:  # pylint: disable=broad-except
+                    self.limit.on_error()
+                    result = DownloadResult(
+                        country, link, "failed", 0,
+                        time.perf_counter() - start, repr(error))
+
+                async with in_flight:
+                    state["running"] -= 1
+                    in_flight.notify_all()
+
+                if on_result is not None:
+                    await asyncio.get_running_loop().run_in_executor(
+                        pool, on_result, result)
+
+                return result
+
+            return await asyncio.gather(
+                *(worker(country, link) for country, link in links))
+
+
+def print_timings(results):
+    """Print per-file timings and summary for finished downloads.
+
+    Args:
+        results (list): list of DownloadResult objects.
+    """
+    for result in results:
+        line = f"{result.country}: {result.status} " \
+               f"{result.size} bytes in {result.seconds:.2f}s"
+        if result.error is not None:
+            line += f" ({result.error})"
+        print(line)
+
+    total_size = sum(result.size for result in results)
+    counts = {status: 0 for status in ("downloaded", "unchanged",
+                                       "not modified", "failed")}
+    for result in results:
+        counts[result.status] += 1
+
+    print(f"Downloaded {counts['downloaded']} files, {total_size} bytes, "
+          f"{counts['unchanged']} unchanged, "
+          f"{counts['not modified']} not modified, {counts['failed']} failed")
@@ -0,0 +1,291 @@
+"""Module with local stand-in for the factbook page and its PDF files.
+
+Server serves the one-page summaries index and a folder of PDFs with
+configurable latency, bandwidth cap and error rates. It supports ETag,
+Last-Modified and Range requests, so every path of the downloader can
+be exercised without hitting the real site.
+
+Run from the project root with `python -m scripts.fake_factbook pdf1`.
+"""
+import argparse
+import hashlib
+import html
+import os
+import random
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote
+
+INDEX_PATH = "/library/publications/resources/the-world-factbook/docs/" \
+             "one_page_summaries.html"
+
+#: int: size of chunks written to the socket, bytes
+WRITE_CHUNK = 16 * 1024
+
+
+def make_fake_pdfs(path_to_folder, count, size):
+    """Create folder with synthetic PDF files.
+
+    Files aren't real documents, but pass check_pdf() of the
+    downloader.
+
+    Args:
+        path_to_folder (str): path to created folder.
+        count (int): number of files.
+        size (int): size of every file, bytes.
+    """
+    os.makedirs(path_to_folder, exist_ok=True)
+
+    for number in range(count):
+        body = f"%PDF-1.4\n% fake country {number}\n".encode()
+        tail = b"\n%%EOF\n"
+        filler = os.urandom(max(0, size - len(body) - len(tail)))
+        file_path = os.path.join(path_to_folder, f"COUNTRY {number:03}.pdf")
+        with open(file_path, "wb") as pdf_file:
+            pdf_file.write(body + filler + tail)
+
+
+class FactbookHandler(BaseHTTPRequestHandler):
+    """Request handler for FakeFactbookServer."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Serve index page or a PDF file."""
+        server = self.server
+        server.count("requests")
+
+        if server.latency:
+            time.sleep(server.latency)
+
+        if random.random() < server.error_rate:
+            server.count("errors")
+            self.send_response(503)
+            self.send_header("Retry-After", str(server.retry_after))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if self.path == INDEX_PATH:
+            self.send_body(server.index_page(), "text/html; charset=utf-8")
+        elif self.path.startswith("/docs/"):
+            self.send_pdf(unquote(self.path[len("/docs/"):]))
+        else:
+            self.send_error(404)
+
+    def send_body(self, body, content_type, status=200, headers=None):
+        """Send body, writing it in chunks under bandwidth cap.
+
+        Args:
+            body (bytes): body of the response.
+            content_type (str): value of Content-Type header.
+            status (int): status of the response.
+            headers (dict): additional headers.
+        """
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        # connection is dropped in the middle of body to test resume
+        reset = random.random() < self.server.reset_rate
+        if reset:
+            self.server.count("resets")
+            body = body[: len(body) // 2]
+
+        for start in range(0, len(body), WRITE_CHUNK):
+            chunk = body[start: start + WRITE_CHUNK]
+            self.wfile.write(chunk)
+            if self.server.bandwidth:
+                time.sleep(len(chunk) / self.server.bandwidth)
+
+        self.server.count("bytes", len(body))
+        if reset:
+            self.close_connection = True
+
+    def send_pdf(self, name):
+        """Send PDF file, answering conditional and Range requests.
+
+        Args:
+            name (str): name of the file in PDF folder.
+        """
+        file_path = os.path.join(self.server.pdf_folder, name)
+        if os.path.sep in name or not os.path.isfile(file_path):
+            self.send_error(404)
+            return
+
+        with open(file_path, "rb") as pdf_file:
+            body = pdf_file.read()
+
+        headers = {"Accept-Ranges": "bytes"} if self.server.ranges else {}
+        etag = None
+        last_modified = formatdate(os.path.getmtime(file_path),
+                                   usegmt=True)
+        headers["Last-Modified"] = last_modified
+
+        if self.server.etags:
+            etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+            headers["ETag"] = etag
+
+        if self.not_modified(etag, os.path.getmtime(file_path)):
+            self.server.count("not_modified")
+            self.send_response(304)
+            for header, value in headers.items():
+                self.send_header(header, value)
+            self.end_headers()
+            return
+
+        range_header = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if (self.server.ranges and range_header
+                and if_range in (None, etag, last_modified)):
+            self.send_range(body, range_header, headers)
+            return
+
+        self.server.count("files")
+        self.send_body(body, "application/pdf", headers=headers)
+
+    def not_modified(self, etag, mtime):
+        """Return True if conditional headers match the file."""
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return etag is not None and if_none_match == etag
+
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(mtime) <= since
+
+        return False
+
+    def send_range(self, body, range_header, headers):
+        """Send part of body requested with Range header."""
+        try:
+            first, last = range_header.split("=", 1)[1].split("-", 1)
+            first = int(first)
+            last = int(last) if last else len(body) - 1
+        except ValueError:
+            first, last = len(body), len(body)
+
+        if first >= len(body) or last < first:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{len(body)}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.server.count("ranges")
+        headers["Content-Range"] = f"bytes {first}-{last}/{len(body)}"
+        self.send_body(body[first: last + 1], "application/pdf", 206,
+                       headers)
+
+
+class FakeFactbookServer(ThreadingHTTPServer):
+    """Local HTTP server imitating the factbook site.
+
+    Can be used as a context manager, which serves requests in a
+    background thread.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, pdf_folder, port=0, latency=0.0, bandwidth=None,
+                 error_rate=0.0, reset_rate=0.0, etags=True, ranges=True,
+                 retry_after=0):
+        super().__init__(("127.0.0.1", port), FactbookHandler)
+        #: str: folder with served PDF files
+        self.pdf_folder = pdf_folder
+        #: float: delay before every response, seconds
+        self.latency = latency
+        #: float: bandwidth cap for every response, bytes per second
+        self.bandwidth = bandwidth
+        #: float: share of requests answered with 503
+        self.error_rate = error_rate
+        #: int or str: Retry-After header sent with 503, seconds or
+        #: HTTP date
+        self.retry_after = retry_after
+        #: float: share of responses dropped in the middle of body
+        self.reset_rate = reset_rate
+        #: bool: send ETag header and answer If-None-Match
+        self.etags = etags
+        #: bool: answer Range requests
+        self.ranges = ranges
+        #: dict: counters of served requests
+        self.stats = {"requests": 0, "files": 0, "ranges": 0,
+                      "not_modified": 0, "errors": 0, "resets": 0,
+                      "bytes": 0}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """str: URL of the server root."""
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    @property
+    def index_url(self):
+        """str: URL of the one-page summaries index."""
+        return self.base_url + INDEX_PATH
+
+    def count(self, name, value=1):
+        """Increase counter in stats."""
+        with self._lock:
+            self.stats[name] += value
+
+    def index_page(self):
+        """Return index page with a link for every PDF in folder."""
+        blocks = []
+        for name in sorted(os.listdir(self.pdf_folder)):
+            if name.endswith(".pdf"):
+                blocks.append(
+                    f'<div class="country-name"><a href="/docs/'
+                    f'{quote(name)}">{html.escape(name[:-4])}</a></div>')
+
+        return ("<html><body>\n" + "\n".join(blocks)
+                + "\n</body></html>\n").encode("utf-8")
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+        self._thread.join()
+
+
+def main():
+    """Serve PDF folder until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("pdf_folder", help="folder with PDF files")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--bandwidth", type=float, default=None)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--reset-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeFactbookServer(args.pdf_folder, args.port, args.latency,
+                                args.bandwidth, args.error_rate,
+                                args.reset_rate)
+    print(f"Serving {server.index_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Module with persistent cache of HTTP metadata for conditional GET."""
+import json
+import os
+import threading
+from scripts.sidecar import sidecar_path
+
+
+class HttpCache:
+    """Class storing ETag, Last-Modified and size for each URL.
+
+    Cache is kept as a JSON file and used to send conditional requests,
+    so files that didn't change upstream aren't downloaded again.
+    """
+
+    def __init__(self, cache_file):
+        #: str: path to JSON file with cached metadata
+        self.cache_file = cache_file
+        #: dict: metadata for every URL, URL is a key
+        self.entries = {}
+        self._lock = threading.Lock()
+
+        if os.path.exists(cache_file):
+            with open(cache_file, encoding="utf-8") as file:
+                self.entries = json.load(file)
+
+    @classmethod
+    def for_folder(cls, path_to_folder):
+        """Return cache stored next to PDF folder.
+
+        Args:
+            path_to_folder (str): path to folder with PDF files.
+
+        Returns:
+            HttpCache object.
+        """
+        return cls(sidecar_path(path_to_folder, "http_cache.json"))
+
+    def get(self, url):
+        """Return cached metadata for URL or None."""
+        with self._lock:
+            return self.entries.get(url)
+
+    def conditional_headers(self, url):
+        """Return headers for conditional request of URL.
+
+        Args:
+            url (str): requested URL.
+
+        Returns:
+            dict: If-None-Match and If-Modified-Since headers, empty if
+            URL isn't cached.
+        """
+        entry = self.get(url)
+        headers = {}
+
+        if entry is None:
+            return headers
+
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        return headers
+
+    def update(self, url, headers, content_length, **extra):
+        """Store metadata from successful response.
+
+        Args:
+            url (str): requested URL.
+            headers (dict): headers of the response.
+            content_length (int): size of the received body, bytes.
+            **extra: additional values to keep with the entry.
+        """
+        entry = {
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "content_length": content_length,
+        }
+        entry.update(extra)
+
+        with self._lock:
+            self.entries[url] = entry
+
+    def partial_validator(self, url):
+        """Return validator of partially downloaded body of URL or None.
+
+        Validator is sent as If-Range header, so server returns the rest
+        of the body only if it didn't change since download started.
+        """
+        entry = self.get(url)
+        if entry is None:
+            return None
+        return entry.get("partial_validator")
+
+    def set_partial_validator(self, url, headers):
+        """Remember ETag or Last-Modified of a body being downloaded.
+
+        Args:
+            url (str): requested URL.
+            headers (dict): headers of the response.
+        """
+        validator = headers.get("ETag") or headers.get("Last-Modified")
+
+        with self._lock:
+            entry = self.entries.setdefault(url, {})
+            entry["partial_validator"] = validator
+
+    def save(self):
+        """Write cache to JSON file, replacing the old one atomically."""
+        temp_file = self.cache_file + ".tmp"
+
+        with self._lock:
+            with open(temp_file, "w", encoding="utf-8") as file:
+                json.dump(self.entries, file, indent=1, sort_keys=True)
+
+        os.replace(temp_file, self.cache_file)
@@ -0,0 +1,209 @@
+"""Module with incremental scrape of PDF corpus into existing DB.
+
+DB keeps manifest with SHA-256 of the PDF and parser version every
+country was scraped with. Only PDFs that are new, changed or scraped by
+an older parser are parsed again, and rows of their countries are
+replaced in a single transaction together with the manifest.
+"""
+import sqlite3
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+import scripts.sqlite as sq
+from scripts import pdf_archive
+from scripts.pdf_scraper import (DEFAULT_BACKEND, PARSER_VERSION,
+                                 extract_pdf_text, scrape_document,
+                                 scrape_text)
+from scripts.text_cache import pdf_sha256
+
+
+def find_changed(path_to_pdf, manifest):
+    """Return hashes of all PDFs and names of PDFs to scrape again.
+
+    Args:
+        path_to_pdf (str): path to folder or archive with PDFs.
+        manifest (dict): manifest read from DB, see sq.read_manifest().
+
+    Returns:
+        Tuple of dict with name of PDF as a key and its SHA-256 as value,
+        and list of names of new or changed PDFs.
+    """
+    hashes = {}
+    changed = []
+
+    with pdf_archive.open_corpus(path_to_pdf) as corpus:
+        for name in sorted(corpus.names):
+            with corpus.open(name) as pdf_file:
+                hashes[name] = pdf_sha256(pdf_file)
+
+            entry = manifest.get(name)
+            if (entry is None or entry["sha256"] != hashes[name]
+                    or entry["parser_version"] != PARSER_VERSION):
+                changed.append(name)
+
+    return hashes, changed
+
+
+def report_failure(name, error, _trace=None):
+    """Print error of PDF, which failed to scrape."""
+    print(f"{name}: failed to scrape ({error!r})")
+
+
+def scrape_changed(path_to_pdf, names, workers=1, text_cache=None,
+                   regions=None, backend=DEFAULT_BACKEND,
+                   on_error=report_failure):
+    """Scrape PDFs with given names, skipping the ones that fail.
+
+    Args:
+        path_to_pdf (str): path to folder or archive with PDFs.
+        names (list of str): names of PDFs to scrape.
+        workers (int): number of worker processes.
+        text_cache (TextCache): cache of extracted text, optional.
+        regions (dict): boxes holding the fields, optional.
+        backend (str): name of backend converting PDF to text.
+        on_error (callable): called with name of PDF, exception and
+            traceback or None for every PDF, which failed to scrape.
+
+    Returns:
+        dict: name of PDF as a key, result of scrape_text() as value.
+    """
+    scraped = {}
+
+    if workers > 1 and len(names) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(scrape_document, path_to_pdf, name,
+                                       text_cache, regions, backend)
+                       for name in names]
+            for name, future in zip(names, futures):
+                try:
+                    scraped[name] = future.result()[0]
+                # broken PDF is retried on the next run
+                except Exception as error:  # pylint: disable=broad-except
+                    on_error(name, error, getattr(error, "trace", None))
+        return scraped
+
+    with pdf_archive.open_corpus(path_to_pdf) as corpus:
+        for name in names:
+            try:
+                with corpus.open(name) as pdf_file:
+                    scraped[name] = scrape_text(
+                        extract_pdf_text(pdf_file, text_cache, regions,
+                                         backend))
+            # broken PDF is retried on the next run
+            except Exception as error:  # pylint: disable=broad-except
+                on_error(name, error, traceback.format_exc())
+
+    return scraped
+
+
+def provided_elsewhere(manifest, removed, name):
+    """Return True if country of PDF is scraped from another PDF too.
+
+    Args:
+        manifest (dict): manifest read from DB.
+        removed (list of str): names of PDFs no longer in corpus.
+        name (str): name of PDF, which country is checked.
+
+    Returns:
+        bool.
+    """
+    country_id = manifest[name]["country_id"]
+    return any(entry["country_id"] == country_id
+               for other, entry in manifest.items()
+               if other != name and other not in removed)
+
+
+def scrape_incremental(path_to_pdf, db_file, workers=1, text_cache=None,
+                       regions=None, backend=DEFAULT_BACKEND,
+                       quarantine=None, retry_quarantined=False):
+    """Scrape new and changed PDFs and replace their rows in DB.
+
+    Rows of countries whose PDF disappeared from the corpus are deleted.
+    PDFs failing to scrape or load are skipped, the rest is committed.
+
+    Args:
+        path_to_pdf (str): path to folder or archive with PDFs.
+        db_file (str): path to DB file.
+        workers (int): number of worker processes.
+        text_cache (TextCache): cache of extracted text, optional.
+        regions (dict): boxes holding the fields, optional.
+        backend (str): name of backend converting PDF to text.
+        quarantine (Quarantine): keeps failed PDFs with their errors and
+            releases them once they are loaded, optional.
+        retry_quarantined (bool): scrape only quarantined PDFs.
+
+    Returns:
+        dict: numbers of unchanged, replaced, removed and failed PDFs.
+    """
+    sq.create_db(db_file)
+    start = time.perf_counter()
+
+    with sq.connect_to_db(db_file) as conn:
+        cur = conn.cursor()
+        sq.create_manifest(cur)
+        manifest = sq.read_manifest(cur)
+
+    hashes, changed = find_changed(path_to_pdf, manifest)
+    removed = [name for name in manifest if name not in hashes]
+    if retry_quarantined:
+        changed = [name for name in changed
+                   if quarantine is not None and quarantine.get(name)]
+    print(f"{len(changed)} of {len(hashes)} PDFs changed, "
+          f"{len(removed)} removed")
+
+    on_error = report_failure
+    if quarantine is not None:
+        def on_error(name, error, trace):
+            report_failure(name, error)
+            quarantine.add(path_to_pdf, name, "scrape", error, trace)
+
+    scraped = scrape_changed(path_to_pdf, changed, workers, text_cache,
+                             regions, backend, on_error)
+    failed = len(changed) - len(scraped)
+    loaded = []
+
+    # all countries are committed at once or none of them
+    with sq.connect_to_db(db_file) as conn:
+        cur = conn.cursor()
+        # explicit transaction, otherwise every savepoint of
+        # sq.replace_country() would be committed on its own
+        cur.execute("BEGIN")
+
+        for name in removed:
+            if not provided_elsewhere(manifest, removed, name):
+                sq.delete_country(cur, manifest[name]["country_id"])
+            sq.delete_manifest(cur, name)
+
+        for name, data_containers in scraped.items():
+            country_id = data_containers[0][0].name
+            try:
+                sq.replace_country(cur, data_containers)
+            except sqlite3.Error as error:
+                failed += 1
+                print(f"{country_id}: failed to write ({error!r})")
+                if quarantine is not None:
+                    quarantine.add(path_to_pdf, name, "load", error)
+                continue
+
+            # PDF may now name the country differently
+            old_entry = manifest.get(name)
+            if (old_entry is not None
+                    and old_entry["country_id"] != country_id
+                    and not provided_elsewhere(manifest, removed, name)):
+                sq.delete_country(cur, old_entry["country_id"])
+            sq.write_manifest(cur, name, country_id, hashes[name],
+                              PARSER_VERSION)
+            loaded.append(name)
+
+    # released only after the commit, PDFs gone from corpus as well
+    if quarantine is not None:
+        for name in loaded + [name for name in quarantine.names()
+                              if name not in hashes]:
+            quarantine.remove(name)
+
+    counts = {"unchanged": len(hashes) - len(changed),
+              "replaced": len(changed) - failed, "removed": len(removed),
+              "failed": failed}
+    print(f"Incremental scrape finished in "
+          f"{time.perf_counter() - start:.2f}s: {counts}")
+    return counts
@@ -0,0 +1,325 @@
+"""Sweep of LAParams values over characters cached once per PDF.
+
+Interpreting PDF and computing character boxes is the same for every
+LAParams, only grouping of characters into lines and boxes depends on
+them. Characters of every PDF are recorded once, cached on disk by PDF
+hash and pdfminer version, and grouping is re-run for every combination of parameters in a
+pool of processes.
+
+Every combination is scored by number of fields SEGMENTER finds,
+number of PDFs scraped without errors, number of PDFs giving same data
+as current LA_PARAMS and layout time.
+
+Run from the project root with
+`python -m scripts.laparams_sweep pdf1 --char-margin 2 3 4`.
+"""
+import argparse
+import itertools
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pdfminer
+from pdfminer.converter import PDFLayoutAnalyzer
+from pdfminer.layout import (LAParams, LTChar, LTComponent, LTContainer,
+                             LTFigure, LTLayoutContainer, LTPage, LTText,
+                             LTTextBox)
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+from pdfminer.utils import open_filename
+from scripts import pdf_archive
+from scripts.pdf_scraper import LA_PARAMS, SEGMENTER, scrape_text
+from scripts.sidecar import sidecar_path
+from scripts.text_cache import pdf_sha256
+
+#: int: version of format of recorded pages, part of cache key
+CHAR_FORMAT = 1
+
+#: list of str: LAParams attributes, which can be swept
+SWEPT = ["line_overlap", "char_margin", "line_margin", "word_margin",
+         "boxes_flow"]
+
+# documents loaded by worker processes, see load_documents()
+_DOCUMENTS = []
+
+
+class CharRecorder(PDFLayoutAnalyzer):
+    """Layout analyzer recording characters of pages without grouping.
+
+    Pages are kept as tuples: media box and items, where item is either
+    ("c", bbox, text) for a character or ("f", name, bbox, matrix,
+    items) for a figure. Paths and images are skipped, same as
+    TextConverter does.
+    """
+
+    def __init__(self, rsrcmgr):
+        super().__init__(rsrcmgr, laparams=None)
+        #: list of tuples: recorded pages
+        self.pages = []
+
+    def paint_path(self, gstate, stroke, fill, evenodd, path):
+        pass
+
+    def render_image(self, name, stream):
+        pass
+
+    def receive_layout(self, ltpage):
+        self.pages.append((ltpage.bbox, record_items(ltpage)))
+
+
+def record_items(container):
+    """Return items of page or figure as tuples."""
+    items = []
+    for item in container:
+        if isinstance(item, LTChar):
+            items.append(("c", item.bbox, item.get_text()))
+        elif isinstance(item, LTFigure):
+            items.append(("f", item.name, item.bbox, item.matrix,
+                          record_items(item)))
+    return items
+
+
+def record_chars(pdf_file):
+    """Return characters of every page of PDF, see CharRecorder."""
+    with open_filename(pdf_file, "rb") as file:
+        manager = PDFResourceManager()
+        device = CharRecorder(manager)
+        interpreter = PDFPageInterpreter(manager, device)
+        for page in PDFPage.get_pages(file):
+            interpreter.process_page(page)
+        return device.pages
+
+
+class CachedChar(LTChar):
+    """Character rebuilt from cache, without font and matrix.
+
+    Layout analysis uses only box and text of characters.
+    """
+
+    # pylint: disable=super-init-not-called
+    def __init__(self, bbox, text):
+        LTText.__init__(self)
+        LTComponent.__init__(self, bbox)
+        self._text = text
+
+
+def build_items(container, items):
+    """Add characters and figures rebuilt from tuples to container."""
+    for item in items:
+        if item[0] == "c":
+            container.add(CachedChar(item[1], item[2]))
+        else:
+            figure = LTFigure.__new__(LTFigure)
+            LTLayoutContainer.__init__(figure, item[2])
+            figure.name, figure.matrix = item[1], item[3]
+            build_items(figure, item[4])
+            container.add(figure)
+
+
+def render_text(ltpage):
+    """Return text of analysed page, same as TextConverter writes it."""
+    parts = []
+
+    def render(item):
+        if isinstance(item, LTContainer):
+            for child in item:
+                render(child)
+        elif isinstance(item, LTText):
+            parts.append(item.get_text())
+        if isinstance(item, LTTextBox):
+            parts.append("\n")
+
+    render(ltpage)
+    parts.append("\f")
+    return "".join(parts)
+
+
+def layout_text(pages, laparams):
+    """Group cached characters with laparams and return text.
+
+    Args:
+        pages (list): pages recorded by CharRecorder.
+        laparams (LAParams): parameters of layout analysis.
+
+    Returns:
+        Tuple of str and time of layout analysis, seconds.
+    """
+    text = []
+    seconds = 0.0
+    for number, (mediabox, items) in enumerate(pages, 1):
+        ltpage = LTPage(number, mediabox)
+        build_items(ltpage, items)
+
+        start = time.perf_counter()
+        ltpage.analyze(laparams)
+        seconds += time.perf_counter() - start
+
+        text.append(render_text(ltpage))
+    return "".join(text), seconds
+
+
+def load_chars(path_to_pdf, names):
+    """Return recorded characters of PDFs, using cache next to corpus.
+
+    Args:
+        path_to_pdf (str): path to folder or archive with PDFs.
+        names (list of str): names of PDFs.
+
+    Cached characters are reused only if recorded by the same pdfminer
+    version, which computes their boxes.
+
+    Returns:
+        list of tuples made of name of PDF and its pages.
+    """
+    cache_folder = sidecar_path(path_to_pdf, "char_cache")
+    version = f"{pdfminer.__version__}-{CHAR_FORMAT}"
+    os.makedirs(cache_folder, exist_ok=True)
+    documents = []
+
+    with pdf_archive.open_corpus(path_to_pdf) as corpus:
+        for name in names:
+            with corpus.open(name) as pdf_file:
+                cache_file = os.path.join(
+                    cache_folder, f"{pdf_sha256(pdf_file)}-{version}.pickle")
+                if os.path.exists(cache_file):
+                    with open(cache_file, "rb") as file:
+                        pages = pickle.load(file)
+                else:
+                    pages = record_chars(pdf_file)
+                    with open(cache_file + ".part", "wb") as file:
+                        pickle.dump(pages, file, pickle.HIGHEST_PROTOCOL)
+                    os.replace(cache_file + ".part", cache_file)
+            documents.append((name, pages))
+
+    return documents
+
+
+def count_fields(text):
+    """Return number of fields SEGMENTER finds in text."""
+    country_id, _, rest = text.partition("\n")
+    try:
+        names = SEGMENTER.segment(rest.split(), country_id).names
+    # text without section headers
+    except (IndexError, ValueError):
+        return 0
+    return sum(1 for value in names.values() if value)
+
+
+def scraped(text):
+    """Return scraped data as comparable values, None if scraping fails."""
+    try:
+        return [[vars(item) for item in items] for items in scrape_text(text)]
+    except Exception:  # pylint: disable=broad-except
+        return None
+
+
+def load_documents(documents_file):
+    """Load pickled documents in worker process."""
+    with open(documents_file, "rb") as file:
+        _DOCUMENTS.extend(pickle.load(file))
+
+
+def score(values, reference=None):
+    """Score single combination of LAParams over loaded documents.
+
+    Args:
+        values (tuple): values of SWEPT attributes.
+        reference (list): scraped data of every document with current
+            LA_PARAMS, optional.
+
+    Returns:
+        dict: values, found fields, parsed and same documents and
+        layout time, seconds.
+    """
+    laparams = LAParams(**dict(zip(SWEPT, values)),
+                        detect_vertical=LA_PARAMS.detect_vertical,
+                        all_texts=LA_PARAMS.all_texts)
+    result = {"values": values, "fields": 0, "parsed": 0, "same": 0,
+              "layout": 0.0, "data": []}
+
+    for number, (_, pages) in enumerate(_DOCUMENTS):
+        text, seconds = layout_text(pages, laparams)
+        data = scraped(text)
+        result["layout"] += seconds
+        result["fields"] += count_fields(text)
+        result["parsed"] += data is not None
+        if reference is not None:
+            result["same"] += data is not None and data == reference[number]
+        else:
+            result["data"].append(data)
+
+    return result
+
+
+def sweep(path_to_pdf, grid, workers=None):
+    """Score every combination of LAParams values.
+
+    Args:
+        path_to_pdf (str): path to folder or archive with PDFs.
+        grid (dict): SWEPT attribute as a key, list of values as value.
+        workers (int): number of worker processes, all CPUs if None.
+
+    Returns:
+        list of dicts returned by score(), best first.
+    """
+    with pdf_archive.open_corpus(path_to_pdf) as corpus:
+        names = sorted(corpus.names)
+
+    start = time.perf_counter()
+    documents = load_chars(path_to_pdf, names)
+    print(f"Characters of {len(documents)} PDFs loaded in "
+          f"{time.perf_counter() - start:.2f}s")
+
+    documents_file = sidecar_path(path_to_pdf, "char_cache.pickle")
+    with open(documents_file, "wb") as file:
+        pickle.dump(documents, file, pickle.HIGHEST_PROTOCOL)
+
+    current = tuple(getattr(LA_PARAMS, name) for name in SWEPT)
+    combinations = list(itertools.product(*(grid[name] for name in SWEPT)))
+
+    try:
+        with ProcessPoolExecutor(workers, initializer=load_documents,
+                                 initargs=(documents_file,)) as executor:
+            reference = executor.submit(score, current).result()
+            reference["same"] = reference["parsed"]
+            results = [reference] + list(executor.map(
+                score, [values for values in combinations
+                        if values != current],
+                itertools.repeat(reference.pop("data"))))
+    finally:
+        os.remove(documents_file)
+
+    for result in results:
+        result.pop("data", None)
+        result["current"] = result["values"] == current
+    return sorted(results, key=lambda item: (-item["parsed"],
+                                             -item["fields"],
+                                             item["layout"]))
+
+
+def main():
+    """Run sweep over values given in command line and print results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("corpus", help="folder or archive with PDFs")
+    for name in SWEPT:
+        parser.add_argument("--" + name.replace("_", "-"), type=float,
+                            nargs="+", default=[getattr(LA_PARAMS, name)])
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--top", type=int, default=20,
+                        help="number of printed combinations")
+    args = parser.parse_args()
+
+    grid = {name: getattr(args, name) for name in SWEPT}
+    results = sweep(args.corpus, grid, args.workers)
+
+    print(" ".join(f"{name:>12}" for name in SWEPT)
+          + "  fields parsed   same  layout")
+    for result in results[: args.top]:
+        print(" ".join(f"{value:>12}" for value in result["values"])
+              + f"  {result['fields']:>6} {result['parsed']:>6} "
+                f"{result['same']:>6} {result['layout']:>6.2f}s"
+              + (" (current)" if result["current"] else ""))
+
+
+if __name__ == "__main__":
+    main()
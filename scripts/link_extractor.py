@@ -0,0 +1,79 @@
+"""Module for extracting PDF links from the one-page summaries page."""
+import codecs
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+
+class CountryLinkParser(HTMLParser):
+    """Streaming parser collecting links from `div.country-name` blocks.
+
+    Page can be fed in chunks, links are collected as soon as the
+    closing tag of every block is seen.
+    """
+
+    def __init__(self, base_url):
+        super().__init__(convert_charrefs=True)
+        #: str: URL of the page, used to make links absolute
+        self.base_url = base_url
+        #: list: list of lists made of two str - country name and link
+        self.links = []
+        self._depth = 0
+        self._text = []
+        self._href = None
+
+    def handle_starttag(self, tag, attrs):
+        if self._depth:
+            if tag == "div":
+                self._depth += 1
+            elif tag == "a" and self._href is None:
+                self._href = dict(attrs).get("href")
+            return
+
+        if tag == "div" and "country-name" in \
+                (dict(attrs).get("class") or "").split():
+            self._depth = 1
+            self._text = []
+            self._href = None
+
+    def handle_endtag(self, tag):
+        if not self._depth or tag != "div":
+            return
+
+        self._depth -= 1
+        if self._depth == 0 and self._href is not None:
+            name = " ".join("".join(self._text).split())
+            self.links.append([name, urljoin(self.base_url, self._href)])
+
+    def handle_data(self, data):
+        if self._depth:
+            self._text.append(data)
+
+
+def extract_country_links(chunks, base_url, encoding="utf-8"):
+    """Extract country names and PDF links from page.
+
+    Args:
+        chunks (iterable of bytes): content of the page.
+        base_url (str): URL of the page.
+        encoding (str): encoding of the page.
+
+    Returns:
+        List of lists. Each nested list is made of two str - country
+        name and absolute link to PDF file.
+
+    Examples:
+        >>>print(extract_country_links([b'<div class="country-name">'
+        b'<a href="../docs/AF.pdf">Afghanistan</a></div>'],
+        "https://host/library/page.html"))
+        [['Afghanistan', 'https://host/docs/AF.pdf']]
+    """
+    parser = CountryLinkParser(base_url)
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+
+    for chunk in chunks:
+        parser.feed(decoder.decode(chunk))
+
+    parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+
+    return parser.links
@@ -0,0 +1,478 @@
+"""Module for reading PDF corpus from a folder or a single archive file.
+
+Supported sources are a folder with PDF files, zip and tar archives and
+pack files written by PackWriter. Members of uncompressed archives are
+read straight from the memory-mapped archive, without extracting them
+to disk or memory first. Only bytes pdfminer reads are copied.
+"""
+import io
+import json
+import mmap
+import os
+import shutil
+import struct
+import tarfile
+import threading
+import zipfile
+
+#: bytes: last bytes of every pack file
+PACK_MAGIC = b"PDFPACK1"
+#: struct: length of JSON index, stored before PACK_MAGIC
+PACK_INDEX_SIZE = struct.Struct("<Q")
+#: struct: part of zip local file header up to name and extra lengths
+ZIP_LOCAL_HEADER = struct.Struct("<4s22xHH")
+#: float: share of bytes of replaced files and old indexes in a pack,
+#: above which PackWriter.close() rewrites the pack without them
+COMPACT_SHARE = 0.5
+#: int: size of chunks copied between files, bytes
+COPY_CHUNK = 1024 * 1024
+
+
+class BufferReader(io.RawIOBase):
+    """Read-only file object over a buffer.
+
+    Buffer isn't copied as a whole, read() copies only requested bytes
+    and readinto() copies them straight to the given buffer.
+    """
+
+    def __init__(self, buffer):
+        super().__init__()
+        self._buffer = memoryview(buffer)
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self._position = offset
+        elif whence == io.SEEK_CUR:
+            self._position += offset
+        else:
+            self._position = len(self._buffer) + offset
+        self._position = max(0, self._position)
+        return self._position
+
+    def read(self, size=-1):
+        end = len(self._buffer) if size is None or size < 0 \
+            else min(len(self._buffer), self._position + size)
+        data = self._buffer[self._position: end].tobytes()
+        self._position = max(self._position, end)
+        return data
+
+    def readinto(self, buffer):
+        end = min(len(self._buffer), self._position + len(buffer))
+        size = max(0, end - self._position)
+        memoryview(buffer).cast("B")[:size] = \
+            self._buffer[self._position: self._position + size]
+        self._position += size
+        return size
+
+    def close(self):
+        # memoryview is released, so the underlying mmap can be closed
+        self._buffer.release()
+        super().close()
+
+
+def map_file(file_path):
+    """Return read-only memory map of the whole file."""
+    with open(file_path, "rb") as file:
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class FolderCorpus:
+    """Corpus of PDF files in a folder."""
+
+    def __init__(self, path):
+        #: str: path to the folder
+        self.path = path
+        #: list of str: names of PDF files in the folder
+        self.names = [name for name in os.listdir(path)
+                      if name.endswith(".pdf")]
+
+    def open(self, name):
+        """Return file object for PDF with given name."""
+        return open(os.path.join(self.path, name), "rb")
+
+    def close(self):
+        """Nothing to release for a folder."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class ZipCorpus(FolderCorpus):
+    """Corpus of PDF files in a zip archive."""
+
+    def __init__(self, path):  # pylint: disable=super-init-not-called
+        self.path = path
+        self._zip = zipfile.ZipFile(path)
+        self._map = map_file(path)
+        self._members = {info.filename: info for info in self._zip.infolist()
+                         if info.filename.endswith(".pdf")}
+        self.names = list(self._members)
+
+    def open(self, name):
+        """Return file object for member, read from map if it is stored."""
+        info = self._members[name]
+
+        # encrypted or compressed members are decompressed in memory
+        if info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 1:
+            return io.BytesIO(self._zip.read(info))
+
+        signature, name_size, extra_size = ZIP_LOCAL_HEADER.unpack_from(
+            self._map, info.header_offset)
+        if signature != b"PK\x03\x04":
+            raise zipfile.BadZipFile(f"bad local header of {name}")
+
+        start = info.header_offset + ZIP_LOCAL_HEADER.size + name_size \
+            + extra_size
+        return BufferReader(memoryview(self._map)[start: start
+                                                  + info.file_size])
+
+    def close(self):
+        self._zip.close()
+        self._map.close()
+
+
+class TarCorpus(FolderCorpus):
+    """Corpus of PDF files in a tar archive."""
+
+    def __init__(self, path):  # pylint: disable=super-init-not-called
+        self.path = path
+        self._tar = tarfile.open(path)
+        self._members = {}
+        for member in self._tar.getmembers():
+            if not (member.isfile() and member.name.endswith(".pdf")):
+                continue
+            # PDFs are known by file name, as in a folder
+            name = os.path.basename(member.name)
+            if name in self._members:
+                self._tar.close()
+                raise ValueError(f"{path} has more than one {name}")
+            self._members[name] = member
+        self.names = list(self._members)
+
+        # only uncompressed archive can be memory-mapped
+        try:
+            with tarfile.open(path, "r:"):
+                self._map = map_file(path)
+        except tarfile.ReadError:
+            self._map = None
+
+    def open(self, name):
+        """Return file object for member, read from map if uncompressed."""
+        member = self._members[name]
+
+        if self._map is None:
+            return io.BytesIO(self._tar.extractfile(member).read())
+
+        return BufferReader(memoryview(self._map)[
+            member.offset_data: member.offset_data + member.size])
+
+    def close(self):
+        self._tar.close()
+        if self._map is not None:
+            self._map.close()
+
+
+def read_pack_index(buffer, end=None):
+    """Return index of pack file and size of its data part.
+
+    Args:
+        buffer (bytes-like): content of the pack file.
+        end (int): position just after PACK_MAGIC of the read trailer,
+            end of buffer if None.
+
+    Returns:
+        Tuple of dict and int. Dict has file names as keys and lists of
+        offset and size as values.
+    """
+    end = len(buffer) if end is None else end
+    if end == 0:
+        return {}, 0
+
+    if buffer[end - len(PACK_MAGIC): end] != PACK_MAGIC:
+        raise ValueError("file is not a PDF pack")
+
+    index_end = end - len(PACK_MAGIC) - PACK_INDEX_SIZE.size
+    (index_size,) = PACK_INDEX_SIZE.unpack_from(buffer, index_end)
+    index_start = index_end - index_size
+    if index_start < 0:
+        raise ValueError("file is not a PDF pack")
+
+    index = json.loads(bytes(buffer[index_start: index_end]))
+    return index, index_start
+
+
+def find_pack_index(buffer):
+    """Return index of pack file from its last complete trailer.
+
+    Writer killed before close() leaves its new files after the trailer
+    of the previous run. Such files are ignored, and the pack keeps the
+    files it had before.
+
+    Args:
+        buffer (mmap or bytes): content of the pack file.
+
+    Returns:
+        Tuple of dict, size of data part and position just after the
+        trailer, None if no complete trailer is found.
+    """
+    end = len(buffer)
+    while end >= len(PACK_MAGIC):
+        if buffer[end - len(PACK_MAGIC): end] == PACK_MAGIC:
+            # PACK_MAGIC may happen to be inside a PDF, trailer counts
+            # only if its index fits into data before it
+            try:
+                index, data_end = read_pack_index(buffer, end)
+                if all(offset + size <= data_end
+                       for offset, size in index.values()):
+                    return index, data_end, end
+            except (AttributeError, TypeError, ValueError, struct.error):
+                pass
+        end = buffer.rfind(PACK_MAGIC, 0, end - 1)
+        if end < 0:
+            return None
+        end += len(PACK_MAGIC)
+    return None
+
+
+class PackCorpus(FolderCorpus):
+    """Corpus of PDF files in a pack file written by PackWriter."""
+
+    def __init__(self, path):  # pylint: disable=super-init-not-called
+        self.path = path
+        self._map = map_file(path)
+        found = find_pack_index(self._map)
+        if found is None:
+            self._map.close()
+            raise ValueError(f"{path} is not a PDF pack")
+        self._index = found[0]
+        self.names = list(self._index)
+
+    def open(self, name):
+        """Return file object for member, read from the map."""
+        offset, size = self._index[name]
+        return BufferReader(memoryview(self._map)[offset: offset + size])
+
+    def close(self):
+        self._map.close()
+
+
+def open_corpus(path):
+    """Return corpus object for folder or archive.
+
+    Args:
+        path (str): path to folder, zip, tar or pack file.
+
+    Returns:
+        Corpus object with `names` list and `open(name)` method.
+    """
+    if os.path.isdir(path):
+        return FolderCorpus(path)
+    if is_pack(path):
+        return PackCorpus(path)
+    if zipfile.is_zipfile(path):
+        return ZipCorpus(path)
+    if tarfile.is_tarfile(path):
+        return TarCorpus(path)
+    # pack, whose writer was killed, is read up to its last trailer
+    if os.path.getsize(path) and has_pack_index(path):
+        return PackCorpus(path)
+    raise ValueError(f"{path} is not a folder, zip, tar or pack file")
+
+
+def is_pack(path):
+    """Return True if file ends with PACK_MAGIC."""
+    with open(path, "rb") as file:
+        file.seek(0, io.SEEK_END)
+        if file.tell() < len(PACK_MAGIC):
+            return False
+        file.seek(-len(PACK_MAGIC), io.SEEK_END)
+        return file.read() == PACK_MAGIC
+
+
+#: tuple of str: endings of zip and tar archives, which are read only
+READ_ONLY_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2",
+                      ".tar.xz")
+
+
+def is_read_only_archive(path):
+    """Return True if path is a zip or tar archive, not a pack file.
+
+    Downloads are written only to pack files, zip and tar archives can
+    only be scraped.
+    """
+    if not os.path.isfile(path):
+        return path.lower().endswith(READ_ONLY_SUFFIXES)
+    if is_pack(path):
+        return False
+    return zipfile.is_zipfile(path) or tarfile.is_tarfile(path)
+
+
+def has_pack_index(path):
+    """Return True if file has a complete pack trailer anywhere."""
+    with map_file(path) as content:
+        return find_pack_index(content) is not None
+
+
+def iter_documents(path):
+    """Yield name and open file object for every PDF in corpus.
+
+    Every file object is closed when the next one is requested.
+
+    Args:
+        path (str): path to folder, zip, tar or pack file.
+
+    Yields:
+        Tuple of str and file object.
+    """
+    with open_corpus(path) as corpus:
+        for name in corpus.names:
+            with corpus.open(name) as pdf_file:
+                yield name, pdf_file
+
+
+def write_pack_trailer(file, index):
+    """Write index, its length and PACK_MAGIC at the end of pack file.
+
+    Index reaches the disk before the rest of the trailer, which makes
+    it the valid index of the pack.
+
+    Args:
+        file (file object): pack file open for writing.
+        index (dict): file names as keys and lists of offset and size as
+            values.
+    """
+    index = json.dumps(index, sort_keys=True).encode("utf-8")
+    file.write(index)
+    file.flush()
+    os.fsync(file.fileno())
+    file.write(PACK_INDEX_SIZE.pack(len(index)))
+    file.write(PACK_MAGIC)
+    file.flush()
+    os.fsync(file.fileno())
+
+
+def copy_range(source, target, size):
+    """Copy size bytes from current position of source to target."""
+    while size > 0:
+        chunk = source.read(min(COPY_CHUNK, size))
+        if not chunk:
+            raise ValueError("pack file is shorter than its index")
+        target.write(chunk)
+        size -= len(chunk)
+
+
+class PackWriter:
+    """Class appending PDF files to a pack file.
+
+    Pack file is PDFs written one after another, followed by JSON index
+    with offset and size of every file, length of the index and
+    PACK_MAGIC. Adding a file with existing name points index to the new
+    copy.
+
+    Old index isn't overwritten: new files are appended after it, and
+    close() writes the new index and trailer after them. Until the new
+    trailer is written, readers find the old one, so a killed writer
+    only loses files it added.
+
+    Replaced files and old indexes stay in the pack as dead bytes. Once
+    they are over COMPACT_SHARE of the pack, close() copies live files
+    to a new pack, which replaces the old one.
+    """
+
+    def __init__(self, pack_path):
+        #: str: path to pack file
+        self.pack_path = pack_path
+        self._lock = threading.Lock()
+
+        if not os.path.exists(pack_path):
+            open(pack_path, "wb").close()
+
+        #: dict: index of files in the pack
+        self.index, pack_end = {}, 0
+        if os.path.getsize(pack_path):
+            with map_file(pack_path) as content:
+                found = find_pack_index(content)
+                # first writer of the pack was killed before close()
+                first_run = content[:len(b"%PDF-")] == b"%PDF-"
+            if found is not None:
+                self.index, _, pack_end = found
+            elif not first_run:
+                raise ValueError(f"{pack_path} is not a PDF pack")
+
+        self._file = open(pack_path, "r+b")
+
+        # files added by a killed writer are dropped, the last complete
+        # trailer stays valid until close() writes the next one
+        self._file.seek(pack_end)
+        self._file.truncate()
+
+    def __contains__(self, name):
+        with self._lock:
+            return name in self.index
+
+    def add(self, name, file_path):
+        """Append file to the pack.
+
+        Args:
+            name (str): name of the file in the pack.
+            file_path (str): path to the file.
+        """
+        with self._lock, open(file_path, "rb") as source:
+            offset = self._file.tell()
+            shutil.copyfileobj(source, self._file)
+            self.index[name] = [offset, self._file.tell() - offset]
+
+    def close(self):
+        """Write index and close pack file, compacting it if needed.
+
+        Files and index reach the disk before the trailer, which makes
+        them the valid content of the pack.
+        """
+        with self._lock:
+            data_size = self._file.tell()
+            live_size = sum(size for _, size in self.index.values())
+            if data_size and (data_size - live_size) / data_size \
+                    > COMPACT_SHARE:
+                self._compact()
+            else:
+                write_pack_trailer(self._file, self.index)
+            self._file.close()
+
+    def _compact(self):
+        """Write live files to a new pack, which replaces the old one.
+
+        Old pack stays valid until it is replaced, and readers, which
+        mapped it, keep reading it.
+        """
+        temp_path = self.pack_path + ".tmp"
+        index = {}
+
+        with open(temp_path, "wb") as new_file:
+            for name, (offset, size) in sorted(self.index.items(),
+                                               key=lambda item: item[1]):
+                self._file.seek(offset)
+                index[name] = [new_file.tell(), size]
+                copy_range(self._file, new_file, size)
+            write_pack_trailer(new_file, index)
+
+        os.replace(temp_path, self.pack_path)
+        self.index = index
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -1,13 +1,77 @@
 """Module for scraping CIA page for links and downloading PDF files."""
-import os
-from requests_html import HTMLSession, AsyncHTMLSession
+from scripts.link_extractor import extract_country_links
+from scripts.pdf_archive import PackWriter
+from scripts.download_engine import (CHUNK_SIZE, DownloadEngine,
+                                     expected_length, fetch_pdf,
+                                     get_scheduler, get_session,
+                                     print_timings)
 
 
-def scrape_pdf_links(cia_page):
+def fetch_links(cia_page, cache=None, scheduler=None, attempt=0):
+    """Download CIA page and return links from it.
+
+    Page is parsed while it is downloaded, chunk by chunk. If connection
+    breaks before the whole body arrives, page is requested again, and
+    links of the incomplete page are neither returned nor cached.
+
+    Args:
+        cia_page (str): link to the page, containing PDF files.
+        cache (HttpCache): cache with HTTP metadata, optional.
+        scheduler (RequestScheduler): scheduler for the request, shared
+            scheduler is used if not given.
+        attempt (int): number of earlier attempts broken mid-body.
+
+    Returns:
+        List of lists made of two str - country name and link to PDF
+        file.
+    """
+    headers = {}
+    if cache is not None and cache.get(cia_page) is not None:
+        headers = cache.conditional_headers(cia_page)
+
+    scheduler = scheduler or get_scheduler()
+    page = scheduler.get(get_session(), cia_page, headers=headers,
+                         stream=True)
+
+    try:
+        page.raise_for_status()
+        if page.status_code == 304:
+            return cache.get(cia_page)["links"]
+
+        size = expected_length(page, 0)
+        try:
+            links = extract_country_links(page.iter_content(CHUNK_SIZE),
+                                          page.url, page.encoding or "utf-8")
+
+            # server can close connection early without an error, raw
+            # stream counts bytes before decoding, as Content-Length does
+            if size is not None and page.raw.tell() < size:
+                raise ConnectionError("index page is incomplete")
+        # requests exceptions are subclasses of IOError
+        except OSError:
+            if not scheduler.wait_before_retry(attempt):
+                raise
+            page.close()
+            return fetch_links(cia_page, cache, scheduler, attempt + 1)
+    finally:
+        page.close()
+
+    if cache is not None:
+        cache.update(cia_page, page.headers, page.raw.tell(), links=links)
+        cache.save()
+
+    return links
+
+
+def scrape_pdf_links(cia_page, cache=None):
     """Scrape CIA page for PDF links and return them as dict.
 
+    When cache is given, page is requested with conditional GET and
+    links are taken from cache if page didn't change.
+
     Args:
         cia_page (str): link to the page, containing PDF files.
+        cache (HttpCache): cache with HTTP metadata, optional.
 
     Returns:
         List of lists. Each nested list contains 4 elements, each element
@@ -17,84 +81,85 @@ def scrape_pdf_links(cia_page):
     link_blocks = []
     links_temp = []
 
-    session = HTMLSession()
-    source = session.get(cia_page).html  # downloading page as html
-
-    country_data = source.find("div.country-name")
+    # every run, e.g. cycle of the daemon, gets the whole deadline
+    scheduler = get_scheduler()
+    scheduler.start_deadline()
+    links = fetch_links(cia_page, cache, scheduler)
 
     count = 0
-    for country in country_data:
-        links_temp.append([country.text, list(country.absolute_links)[0]])
+    for country in links:
+        links_temp.append(country)
         count += 1
         if count % 4 == 0:
             link_blocks.append(links_temp)
             links_temp = []
-        elif count % 4 != 0 and count == len(list(country_data)):
+        elif count % 4 != 0 and count == len(links):
             link_blocks.append(links_temp)
 
     return link_blocks
 
 
-def download_pdf_single(country, link, path_to_folder):
+def download_pdf_single(country, link, path_to_folder, cache=None):
     """Take country and link and download single PDF.
 
     Args:
         country (str): name of country.
         link (str): link to PDF corresponding to country.
         path_to_folder (str): path to folder for saving PDF.
+        cache (HttpCache): cache for conditional requests, optional.
     """
 
-    file_name = country + ".pdf"
-    file_path = os.path.join(path_to_folder, file_name)
+    fetch_pdf(get_session(), country, link, path_to_folder, cache)
+    if cache is not None:
+        cache.save()
 
-    # downloading files using HTMLsession
-    with open(file_path, "wb") as pdf_file:
-        pdf_as_page = HTMLSession().get(link)
-        pdf_file.write(pdf_as_page.content)
 
-
-def download_pdf_multi(block, path_to_folder):
-    """Take list of links and download them five files at a time.
+def download_pdf_multi(block, path_to_folder, cache=None):
+    """Take list of links and download them concurrently.
 
     Args:
-        block (list): contains 5 elements, each element is a list made of
-            two str - country name and link to corresponding PDF file.
+        block (list): each element is a list made of two str - country
+            name and link to corresponding PDF file.
         path_to_folder (str): path to folder for saving PDF.
-    """
-    async_ses = AsyncHTMLSession()
+        cache (HttpCache): cache for conditional requests, optional.
 
-    link1 = block[0][1]
-    link2 = block[1][1]
-    link3 = block[2][1]
-    link4 = block[3][1]
-
-    async def downloader1():
-        pdf_as_page = await async_ses.get(link1)
-        return pdf_as_page
-
-    async def downloader2():
-        pdf_as_page = await async_ses.get(link2)
-        return pdf_as_page
-
-    async def downloader3():
-        pdf_as_page = await async_ses.get(link3)
-        return pdf_as_page
-
-    async def downloader4():
-        pdf_as_page = await async_ses.get(link4)
-        return pdf_as_page
-
-    pages_return = async_ses.run(
-        downloader1, downloader2, downloader3, downloader4, )
+    Returns:
+        List of DownloadResult objects.
+    """
+    return DownloadEngine(concurrency=len(block), cache=cache).download(
+        block, path_to_folder)
 
-    counter = 0
-    for page in pages_return:
 
-        file_name = [i[0] for i in block if page.url == i[1]]
-        file_name = file_name[0] + ".pdf"
+def download_pdfs(links, path_to_folder, concurrency=4, max_concurrency=16,
+                  latency_target=2.0, cache=None, store=None,
+                  archive_path=None):
+    """Download all PDFs over one session with bounded concurrency.
 
-        file_path = os.path.join(path_to_folder, file_name)
+    Args:
+        links (list): each element is a list made of two str - country
+            name and link to corresponding PDF file.
+        path_to_folder (str): path to folder for saving PDF.
+        concurrency (int): number of requests in flight at start.
+        max_concurrency (int): upper bound for requests in flight.
+        latency_target (float): latency, seconds, above which number of
+            requests in flight is reduced.
+        cache (HttpCache): cache for conditional requests, optional.
+        store (PdfStore): content-addressed store, optional.
+        archive_path (str): path to pack file, optional. If given, PDFs
+            are written to the pack and folder only keeps partial files.
 
-        with open(file_path, "wb") as pdf_file:
-            pdf_file.write(page.content)
-        counter += 1
+    Returns:
+        List of DownloadResult objects.
+    """
+    archive = None if archive_path is None else PackWriter(archive_path)
+    engine = DownloadEngine(concurrency, max_concurrency, latency_target,
+                            cache=cache, store=store, archive=archive)
+    try:
+        results = engine.download(links, path_to_folder)
+    finally:
+        if archive is not None:
+            archive.close()
+
+    print_timings(results)
+    engine.scheduler.print_stats()
+    return results
@@ -1,87 +1,89 @@
 """Module for converting PDF to text and scraping data from it."""
+import json
 import os
 import re
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import pdfminer
 from pdfminer import high_level, layout
 import scripts.storage_classes as sc
-
-
-def create_index(fields, text_split, country_id):
-    """Return dictionary with index for every field name.
-
-    Args:
-        fields (list of str): list of field names.
-        text_split (list of str): text split to list, where every word
-            is an element of list.
-        country_id (str): name of the country, used to handle minor
-            errors in text while indexing specific countries.
-
-    Returns:
-        dict: dictionary, with field name as a key and list as a value.
-        Each list contains two int. First int - index of a first word of
-        a field name in text as list, second int is an index +1 of a last
-        word of a field name in text as list.
-
-    Examples:
-        >>>print(create_index(["Climate", "Natural Resources"],
-        ["Climate", "and", "Natural", "Resources"], "Russia"))
-        {"Climate":[0,1], "Natural Resources":[2,4]}
-    """
-    index_dict = {}
-
-    # deleting unnecessary headers in text_split
-    del text_split[text_split.index("GOVERNMENT")]
-    del text_split[text_split.index("GEOGRAPHY")]
-
-    pep_soc = [
-        (i, i + 3)
-        for i in range(len(text_split))
-        if text_split[i: i + 3] == ["PEOPLE", "&", "SOCIETY"]
-    ]
-    del text_split[pep_soc[0][0]: pep_soc[0][1]]
-
-    if "'Economic', 'Overview'" in str(text_split):
-        del text_split[text_split.index("ECONOMY")]
-
-    for item in fields:
-
-        item_list = item.split()
-
-        # this part handles some exception for some pages that contain
-        # errors in naming
-        if country_id == "GERMANY" and item == "GDP (Purchasing Power Parity)":
-            item_list = "GDP Purchasing Power Parity)".split()
-        elif country_id == "MOLDOVA" and item == "US Ambassador":
-            item_list = ["Ambassador"]
-        elif country_id == "IRAQ" and item == "Area":
-            item_list = ["Area,"]
-        elif country_id == "IRAQ" and item == "Urbanization":
-            item_list = ["2003Urbanization"]
-        elif (country_id in ("TURKMENISTAN", "MAURITIUS")
-              and item == "Economic Overview"):
-            item_list = ["ECONOMY"]
-
-        # This part finds indexes for every field name.
-        # While searching, indexes stored inside a tuple inside a list.
-        # In most cases there is only one tuple for each field name, but
-        # there are some exceptions.
-        index = [
-            (i, i + len(item_list))
-            for i in range(len(text_split))
-            if text_split[i: i + len(item_list)] == item_list
-        ]
-
-        # If there are more than one occurrence of the field name in text
-        # list will have more than one tuple.
-        # When this happens we use first tuple as index, except for the
-        # field "US Ambassador" where we always use second tuple.
-        if len(index) > 1 and item == "US Ambassador":
-            index = list(index[1])
-        elif len(index) > 0:
-            index = list(index[0])
-
-        index_dict[item] = index
-
-    return index_dict
+from scripts import pdf_archive
+from scripts.scrape_costs import CostHistory, document_stats
+from scripts.segmenter import FieldSegmenter
+from scripts.text_cache import params_key
+
+# making parameters for PDFminer for this specific PDFs
+LA_PARAMS = layout.LAParams(
+    line_overlap=0.4,
+    char_margin=3.0,
+    line_margin=1.0,
+    word_margin=0.15,
+    boxes_flow=0.3,
+    detect_vertical=False,
+    all_texts=False,
+)
+
+# version of text parsing, increase it when scraped rows change, so
+# incremental scrape parses every PDF again
+PARSER_VERSION = 2
+
+# name of backend converting PDF to text, see scripts.text_backends
+DEFAULT_BACKEND = "pdfminer"
+
+# key of cached text, changes with any parameter or pdfminer version
+TEXT_PARAMS = params_key(LA_PARAMS, pdfminer.__version__)
+
+# corpora opened by scrape_document() in this process, path is a key
+_CORPORA = {}
+
+# defining fields
+FIELDS = [
+    "Chief of State",
+    "Head of Government",
+    "Government Type",
+    "Capital",
+    "Legislature",
+    "Judiciary",
+    "Ambassador to US",
+    "US Ambassador",
+    "Area",
+    "Climate",
+    "Natural Resources",
+    "Economic Overview",
+    "GDP (Purchasing Power Parity)",
+    "GDP per capita (Purchasing Power Parity)",
+    "Exports",
+    "Imports",
+    "Population",
+    "Population Growth",
+    "Ethnicity",
+    "Language",
+    "Religion",
+    "Urbanization",
+    "Literacy",
+]
+
+
+# field names misspelled in PDFs of some countries, country and field
+# as a key, name in PDF as value
+FIELD_ALIASES = {
+    ("GERMANY", "GDP (Purchasing Power Parity)"):
+        "GDP Purchasing Power Parity)",
+    ("MOLDOVA", "US Ambassador"): "Ambassador",
+    ("IRAQ", "Area"): "Area,",
+    ("IRAQ", "Urbanization"): "2003Urbanization",
+    ("TURKMENISTAN", "Economic Overview"): "ECONOMY",
+    ("MAURITIUS", "Economic Overview"): "ECONOMY",
+}
+
+# field names, headers and date marker compiled once for all PDFs
+SEGMENTER = FieldSegmenter(FIELDS, FIELD_ALIASES)
+
+
+# leading words removed from elements by split_percent(), only the
+# first matching one
+PERCENT_PREFIXES = ("and ", "also ", "but also ", "there is a ")
 
 
 def convert_big_str_numbers(big_num):
@@ -119,12 +121,71 @@ def convert_big_str_numbers(big_num):
     return int(big_num)
 
 
+def split_percent(element, language=False, religion=False):
+    """Split single str to name, number as a float and official status.
+
+    Args:
+        element (str): name with a percentage, like "Russian 65%".
+        language (bool): element is a language, official status is
+            added.
+        religion (bool): element is a religion, number may be split by
+            a space.
+
+    Returns:
+        list: str and float or None, and bool for language.
+
+    Examples:
+        >>>print(split_percent("and Russian 65% (official)", True))
+        ['Russian', 65.0, True]
+    """
+    for prefix in PERCENT_PREFIXES:
+        if element.startswith(prefix):
+            element = element[len(prefix):]
+            break
+
+    if language:
+        element = element.replace(";", ",")
+        officiality = "official" in element
+        element = element.replace(" (official)", "")
+
+    element_listed = element.split()
+    # word with the first % is the last word up to it
+    percent = element.find("%")
+    index = len(element[: percent + 1].split()) - 1 if percent >= 0 else None
+
+    if index is None:
+        percentage = None
+        parted = " ".join(element_listed)
+
+    elif (religion and not element_listed[index - 1].isalpha()
+          and "non-" not in element_listed[index - 1]
+          and "/" not in element_listed[index - 1]):
+        percentage = "".join(element_listed[index - 1: index + 1])
+        parted = " ".join(element_listed[: index - 1])
+
+    else:
+        percentage = element_listed[index]
+        parted = " ".join(element_listed[:index])
+
+    if percentage is not None:
+        percentage = percentage.replace("%", "")
+        try:
+            percentage = float(percentage)
+        except ValueError:
+            pass
+
+    if language:
+        return [parted, percentage, officiality]
+    return [parted, percentage]
+
+
 def split_percents(field_name, a_list):
     """Split each element in a list of str to str and float/None.
 
     Takes a list of str, in each element searches for number and coverts
     it to a list of two elements - a string and a number as a float, if
     number is found. If number is not found, second element is a None.
+    Every element is read once, see split_percent().
 
     Args:
         field_name (str): name of the field for handling special cases.
@@ -147,814 +208,1010 @@ def split_percents(field_name, a_list):
 
 
     """
-    return_list = []
-    language_list = []
-    if a_list is None and field_name == "Language":
-        return [[None, None, False]]
+    language = field_name == "Language"
 
     if a_list is None:
-        return [[None, None]]
+        return [[None, None, False]] if language else [[None, None]]
 
-    for element in a_list:
+    religion = field_name == "Religion"
+    return drop_unnamed([split_percent(element, language, religion)
+                         for element in a_list], language)
 
-        if element[:4] == "and ":
-            element = element[4:]
-        elif element[:5] == "also ":
-            element = element[5:]
-        elif element[:9] == "but also ":
-            element = element[9:]
-        elif element[:11] == "there is a ":
-            element = element[11:]
 
-        if field_name == "Language":
+def drop_unnamed(return_list, language=False):
+    """Remove duplicate languages and elements without a name.
 
-            element = element.replace(";", ",")
+    Args:
+        return_list (list of lists): split elements.
+        language (bool): elements are languages.
 
-            officiality = "official" in element
+    Returns:
+        list of lists.
+    """
+    # language + percent is a key, so the first position and the last
+    # official status of a language are kept
+    if language:
+        return_list = list({item[0] + str(item[1]): item
+                            for item in return_list}.values())
 
-            element = element.replace(" (official)", "")
+    # elements without a name, like after a trailing comma
+    return [item for item in return_list if item[0] != ""]
 
-        element = element.strip()
 
-        element_listed = element.split()
+def split_percents_batch(batch):
+    """Split lists of many fields and countries in one call.
 
-        index = [element_listed.index(i) for i in element_listed if "%" in i]
+    Args:
+        batch (iterable of tuples): field name and list of str, same as
+            split_percents() takes them.
 
-        try:
-            index = index[0]
+    Returns:
+        list of results of split_percents(), in order of batch.
 
-            if field_name == "Religion":
-                if (not element_listed[index - 1].isalpha()
-                        and "non-" not in element_listed[index - 1]
-                        and "/" not in element_listed[index - 1]):
+    Examples:
+        >>>print(split_percents_batch([("Religion", ["other 2%"]),
+        ("Imports", ["China 20%", "other 2%"])]))
+        [[['other', 2.0]], [['China', 20.0], ['other', 2.0]]]
+    """
+    return [split_percents(field_name, a_list) for field_name, a_list in batch]
+
+
+# patterns of field parsers, compiled once at import
+LITERACY_PATTERN = re.compile(r"([0-9\.]{0,4}%).*\((20..)")
+URBANIZATION_PATTERN = re.compile(
+    r"\s?([0-9\. ]{1,5}\%).*\((20..)\)?.*urbanization: ([\-0-9\. ]{1,5}\%)"
+)
+POPULATION_GROWTH_PATTERN = re.compile(r"([\-\.0-9 ]*\%).*(20\d\d)")
+BIG_POPULATION_PATTERN = re.compile(
+    r"([0-9\.,]*)\s(million|billion).*\((.*)est"
+)
+POPULATION_PATTERN = re.compile(r"([0-9\,]*) \((.*) est")
+ACTIVITY_PATTERN = re.compile(
+    r"(\$[0-9\.]*)\s(billion|million|trillion)\s.(\d\d\d\d)"
+)
+PARTNERS_YEAR_PATTERN = re.compile(r"\s\(.*?\)")
+GDP_PATTERN = re.compile(
+    r"(\$[0-9\.]+)\s(bi+llion|million|trillion)\s\((20[0-9]{2})"
+)
+YEAR_PATTERN = re.compile(r"\d\d\d\d")
+DOUBLE_PARENTHESES_PATTERN = re.compile(r"\(.*?\)\)")
+RELIGION_NOTE_PATTERN = re.compile(r"\(.*?\)1?")
+LANGUAGE_YEAR_PATTERN = re.compile(r"\s\((\d\d\d\d) (est.|census)\)")
+PARENTHESES_PATTERN = re.compile(r"\(.*?\)")
+ETHNICITY_YEAR_PATTERN = re.compile(r"\s\((\d\d\d\d).*?\)1?")
+ETHNICITY_NOTE_PATTERN = re.compile(r"\s?\(.*?\)\s?")
+
+
+def literacy_field(field_data):
+    """Take data as str and return it as  list with float and int.
+
+    Takes literacy data and extracts two data points -  year of the
+    last update of data and share of literate population.
 
-                    percentage = "".join(element_listed[index - 1: index + 1])
-                    parted = " ".join(element_listed[: index - 1])
-                else:
-                    percentage = element_listed[index]
-                    parted = " ".join(element_listed[:index])
+    Args:
+        field_data (str): data for the current field.
 
-            else:
-                percentage = element_listed[index]
-                parted = " ".join(element_listed[:index])
+    Returns:
+        list: contains two elements, int and float.
 
-        except IndexError:
-            percentage = None
-            parted = " ".join(element_listed)
+    Example:
+        >>>print(literacy_field('94.7% (2018)')
+        [2018, 94.7]
+    """
+    if field_data is None:
+        return [None, None]
+    return literacy_values(LITERACY_PATTERN.search(field_data))
 
-        try:
-            percentage = percentage.replace("%", "")
-            percentage = float(percentage)
-        except (AttributeError, ValueError):
-            pass
 
-        # for Language we build two identical lists, since we need value
-        # country+language to be unique and we need to remove duplicates
+def literacy_values(match):
+    """Return year and share of literate population from match.
 
-        if field_name == "Language":
-            return_list.append([parted, percentage, officiality])
-            language_list.append([parted, percentage, officiality])
-        else:
-            return_list.append([parted, percentage])
+    Args:
+        match (re.Match): match of LITERACY_PATTERN.
 
-    # we remove duplicate languages from main list, by turning it to
-    # dictionary with the language + percent as a key
-    if field_name == "Language":
-        return_list = list(dict((x[0] + str(x[1]), x)
-                                for x in return_list).values())
+    Returns:
+        list: contains two elements, int and float.
+    """
+    lit_year = match[2]
+    lit_percent = match[1]
 
-        # To check that the language official status isn't lost, we
-        # compare elements from the second list, wich we didn't modify.
-        # If the language with official status was removed as a duplicate
-        # we replace it in the main list
-        for item in language_list:
-            if item not in return_list and item[2] == "Yes":
-                item_index = return_list.index(item[:2] + ["No"])
-                return_list[item_index] = item
+    try:
+        lit_percent = float(lit_percent.replace("%", ""))
+        lit_year = int(lit_year)
 
-    for item in return_list:
-        if item[0] == "":
-            del return_list[return_list.index(item)]
+    except (ValueError, AttributeError):
+        pass
 
-    return return_list
+    return [lit_year, lit_percent]
 
 
-def format_field_data(field_name):
-    """Take field name and return appropriate function to format data.
+def urbanization_field(field_data):
+    """Take data as str and return it as list with int and float.
+
+    Takes urbanization data and extracts three data points - year of
+    the last update of data, share of urban population and annual
+    rate of change of urbanization for 2015-2020.
 
     Args:
-        field_name (str): name of the current field.
+        field_data (str): data for the current field.
 
     Returns:
-        Another function.
+        list: contains three elements, int and two floats.
+
+    Example:
+        >>>print(urbanization_field('urban population: 62.2% of total
+        population (2020)rate of urbanization: 1.71% annual rate of
+        change (2015-20 est.)'))
+        [2020, 62.2, 1.71]
     """
+    if field_data is None:
+        return [None, None, None]
+    return urbanization_values(URBANIZATION_PATTERN.search(field_data))
 
-    def literacy_field(field_data):
-        """Take data as str and return it as  list with float and int.
 
-        Takes literacy data and extracts two data points -  year of the
-        last update of data and share of literate population.
+def urbanization_values(match):
+    """Return year, share of urban population and its rate from match.
 
-        Args:
-            field_data (str): data for the current field.
+    Args:
+        match (re.Match): match of URBANIZATION_PATTERN.
 
-        Returns:
-            list: contains two elements, int and float.
+    Returns:
+        list: contains three elements, int and two floats.
+    """
+    if match[3][0] != ".":
+        rate_urb = match[3].replace(" ", "")
+    else:
+        rate_urb = "0" + match[3].replace(" ", "")
 
-        Example:
-            >>>print(literacy_field('94.7% (2018)')
-            [2018, 94.7]
-        """
-        if field_data is None:
-            lit_year, lit_percent = field_data, field_data
-        else:
-            pattern = re.compile(r"([0-9\.]{0,4}%).*\((20..)")
-            match = re.search(pattern, field_data)
-            lit_year = match[2]
-            lit_percent = match[1]
+    urb_pop = match[1].replace(" ", "")
+    urb_pop_year = match[2]
+    try:
+        rate_urb = float(rate_urb[:-1])
+        urb_pop = float(urb_pop[:-1])
+        urb_pop_year = int(urb_pop_year)
+    except (ValueError, TypeError):
+        pass
 
-        try:
-            lit_percent = float(lit_percent.replace("%", ""))
-            lit_year = int(lit_year)
+    return [urb_pop_year, urb_pop, rate_urb]
 
-        except (ValueError, AttributeError):
-            pass
 
-        return [lit_year, lit_percent]
+def population_growth_field(field_data):
+    """Take data as str and return it as a list with int and float.
+
+    Takes population growth data and extracts two data points - year
+    of the last update of data and population growth %
+
+    Args:
+        field_data (str): data for the current field.
+
+    Returns:
+        list: contains two elements, int and float.
+
+    Example:
+        >>>print(population_growth_field('1.16% (2020 est.)'))
+        [2020, 1.16]
+    """
+    if field_data is None:
+        return [None, None]
+    return population_growth_values(POPULATION_GROWTH_PATTERN.search(
+        field_data))
+
+
+def population_growth_values(match):
+    """Return year and population growth from match.
+
+    Args:
+        match (re.Match): match of POPULATION_GROWTH_PATTERN.
+
+    Returns:
+        list: contains two elements, int and float.
+    """
+    pop_grow_year = match[2]
+    if match[1][0] == ".":
+        pop_grow = "0" + match[1].replace(" ", "")
+    elif match[1][:2] == "-.":
+        pop_grow = "-0" + match[1].split("-.0", 1)[1]
+    else:
+        pop_grow = match[1].replace(" ", "")
+    try:
+        pop_grow = float(pop_grow[:-1])
+        pop_grow_year = int(pop_grow_year)
+    except (ValueError, TypeError):
+        pass
+    return [pop_grow_year, pop_grow]
 
-    def urbanization_field(field_data):
-        """Take data as str and return it as list with int and float.
 
-        Takes urbanization data and extracts three data points - year of
-        the last update of data, share of urban population and annual
-        rate of change of urbanization for 2015-2020.
+def population_field(country, field_data):
+    """Take data as str and return it as list with str and int.
 
-        Args:
-            field_data (str): data for the current field.
+    Takes country name and population data and extracts two data
+    points - year of the last update of data and population size
 
-        Returns:
-            list: contains three elements, int and two floats.
+    Args:
+        country (str): country name, used for handling exceptions.
+        field_data (str): data for the current field.
+
+    Returns:
+        list: contains two elements, str and int.
+
+    Example:
+        >>>print(population_field('7.2 million (July 2020 est.)'))
+        ['July 2020', 7200000]
+    """
+    if country == "FRENCH SOUTHERN AND ANTARCTIC LANDS":
+        return [None, 0]
+
+    if "million" in str(field_data) or "billion" in str(field_data):
+        return big_population_values(BIG_POPULATION_PATTERN.search(
+            field_data))
+    return population_values(POPULATION_PATTERN.search(field_data))
+
+
+def big_population_values(match):
+    """Return year and population written in millions or billions.
+
+    Args:
+        match (re.Match): match of BIG_POPULATION_PATTERN.
 
-        Example:
-            >>>print(urbanization_field('urban population: 62.2% of total
-            population (2020)rate of urbanization: 1.71% annual rate of
-            change (2015-20 est.)'))
-            [2020, 62.2, 1.71]
-        """
-        pattern = re.compile(
-            r"\s?([0-9\. ]{1,5}\%).*\((20..)\)?.*urbanization: ([\-0-9\. ]{1,5}\%)"
+    Returns:
+        list: contains two elements, str and int.
+    """
+    population = " ".join([match[1], match[2]])
+
+    population = convert_big_str_numbers(population)
+
+    pop_year = match[3].strip()
+    return [pop_year, int(population)]
+
+
+def population_values(match):
+    """Return year and population written in digits from match.
+
+    Args:
+        match (re.Match): match of POPULATION_PATTERN.
+
+    Returns:
+        list: contains two elements, str and int.
+    """
+    population = match[1].replace(",", "")
+
+    pop_year = match[2]
+    try:
+        pop_year = pop_year.strip()
+    except AttributeError:
+        pass
+    return [pop_year, int(population)]
+
+
+def imports_exports_field(country, field_data, field_name):
+    """Take imports|exports data and return it as a tuple.
+
+    This function takes data from imports|exports field and extracts
+    two lists from it.
+
+    Args:
+        country (str): name of country for handling exceptions.
+        field_data (str): data for the current field.
+        field_name (str): name of the current field for handling
+            exceptions.
+
+    Returns:
+        Tuple containing two lists.
+
+        First list has two elements - year of the last update of data
+        as int and size of activity as int.
+
+        Second list contains lists as elements. Each nested list has
+        four elements - country name as str, name of partner as str,
+        share of total activity for this partner as float, year of
+        the last update of data as int.
+
+    Example:
+        >>>print(imports_exports_field('ARMENIA', '$2.36 billion
+        (2017 est.)partners: Russia 24.2%, Bulgaria 12.8%,
+        Switzerland 12% (2017)', "Exports"))
+
+        ([2017, 2360000000], [['ARMENIA', 'Russia', 24.2, 2017],
+        ['ARMENIA', 'Bulgaria', 12.8, 2017],
+        ['ARMENIA', 'Switzerland', 12.0, 2017]])
+    """
+    if field_data is None:
+        activity_size, partners, act_year = (
+            field_data,
+            field_data,
+            field_data,
         )
-        match = re.search(pattern, str(field_data))
 
-        if field_data is None:
-            rate_urb, urb_pop_year, urb_pop = field_data, field_data, field_data
+    else:
+        match = ACTIVITY_PATTERN.search(field_data)
+
+        if field_name == "Imports" and country == "ETHIOPIA":
+            partners = field_data.split(") ")[1]
+
         else:
-            if match[3][0] != ".":
-                rate_urb = match[3].replace(" ", "")
-            else:
-                rate_urb = "0" + match[3].replace(" ", "")
+            # this block handles countries which don't have
+            # import|export partners written
+            try:
+                partners = field_data.split(
+                    "partners")[1].replace(": ", "")
+            except IndexError:
+                partners = None
 
-            urb_pop = match[1].replace(" ", "")
-            urb_pop_year = match[2]
         try:
-            rate_urb = float(rate_urb[:-1])
-            urb_pop = float(urb_pop[:-1])
-            urb_pop_year = int(urb_pop_year)
-        except (ValueError, TypeError):
+            act_year = match[3]
+            activity_size = f"{match[1]} {match[2]}"
+        # exception handles some country with error in formating
+        except TypeError:
+            act_year = field_data.split("(")[1][:5]
+            activity_size = "".join(field_data.split()[:2])
+
+    if act_year is not None:
+        act_year = int(act_year.strip())
+
+    if activity_size is not None:
+        activity_size = convert_big_str_numbers(activity_size)
+
+    if partners is not None and partners != 'N/A':
+        match = PARTNERS_YEAR_PATTERN.search(partners)
+
+        # we clean unnecessary info with year, which
+        # duplicates imports|export year of update
+        if field_name == "Imports" and country == "SUDAN":
             pass
+        else:
+            partners = partners.replace(match[0], "")
+
+        if field_name == "Imports" and country == "FRANCE":
+            partners = partners.replace("Belgium", "Belgium ")
 
-        return [urb_pop_year, urb_pop, rate_urb]
+        # returning , that were skipped in the text
+        partners = partners.replace("% ", "%,")
 
-    def population_growth_field(field_data):
-        """Take data as str and return it as a list with int and float.
+        partners = partners.split(",")
 
-        Takes population growth data and extracts two data points - year
-        of the last update of data and population growth %
+        # fixing forgotten % symbols
+        for item in partners:
+            ind = partners.index(item)
+            item = item.strip()
+            if item != "" and item is not None and item[-1] != "%":
+                item = item + "%"
+            partners[ind] = item
 
-        Args:
-            field_data (str): data for the current field.
+        # we create content for import|exports partners dictionary
+        # with percent_taker function
+        partners_listed = split_percents(field_name, partners)
+    else:
+        partners_listed = [[None, None]]
 
-        Returns:
-            list: contains two elements, int and float.
+    for partner in partners_listed:
+        partner[:0] = [country]
+        partner.append(act_year)
 
-        Example:
-            >>>print(population_growth_field('1.16% (2020 est.)'))
-            [2020, 1.16]
-        """
-        pattern = re.compile(r"([\-\.0-9 ]*\%).*(20\d\d)")
-        match = re.search(pattern, str(field_data))
+    return [act_year, activity_size], partners_listed
 
-        if field_data is None:
-            pop_grow_year, pop_grow = field_data, field_data
-        else:
-            pop_grow_year = match[2]
-            if match[1][0] == ".":
-                pop_grow = "0" + match[1].replace(" ", "")
-            elif match[1][:2] == "-.":
-                pop_grow = "-0" + match[1].split("-.0", 1)[1]
-            else:
-                pop_grow = match[1].replace(" ", "")
-        try:
-            pop_grow = float(pop_grow[:-1])
-            pop_grow_year = int(pop_grow_year)
-        except (ValueError, TypeError):
-            pass
-        return [pop_grow_year, pop_grow]
 
-    def population_field(country, field_data):
-        """Take data as str and return it as list with str and int.
+def area_field(country, field_data):
+    """Take data for area as str and return it as a list of float.
 
-        Takes country name and population data and extracts two data
-        points - year of the last update of data and population size
+    Args:
+        country (str): country name, used for handling exceptions.
+        field_data (str): data about current field.
 
-        Args:
-            country (str): country name, used for handling exceptions.
-            field_data (str): data for the current field.
+    Returns:
+        List of float.
+
+    Example:
+        >>>print(area_field('RUSSIA', 'Total: 17,098,242 sq km Land:
+        16,377,742 sq km Water: 720,500 sq km'))
+        [720500.0, 16377742.0, 17098242.0]
+    """
+    if country == "FRENCH SOUTHERN AND ANTARCTIC LANDS":
+        return [None, None, None]
 
-        Returns:
-            list: contains two elements, str and int.
+    total = field_data.lower().split("total: ")
+    total = total[1][: total[1].index(
+        " sq km")].replace(",", "")
 
-        Example:
-            >>>print(population_field('7.2 million (July 2020 est.)'))
-            ['July 2020', 7200000]
-        """
-        if country == "FRENCH SOUTHERN AND ANTARCTIC LANDS":
-            pop_year = None
-            population = "0"
+    if country == "GREENLAND":
+        return [None, None, float(total)]
 
-        else:
-            if "million" in str(field_data) or "billion" in str(field_data):
+    land = field_data.lower().split("land")
+    land = land[1][: land[1].index(" sq km")].replace(",", "")
+    land = land.replace(":", "").strip()
+    land = land.replace("-", "")
 
-                pattern = re.compile(
-                    r"([0-9\.,]*)\s(million|billion).*\((.*)est"
-                )
-                match = re.search(pattern, field_data)
+    if country == "SAUDI ARABIA":
+        total = convert_big_str_numbers(total)
+        land = convert_big_str_numbers(land)
 
-                population = " ".join([match[1], match[2]])
+    try:
+        water = field_data.lower().split("water: ")
+        water = water[1][: water[1].index(
+            " sq km")].replace(",", "")
+    except ValueError:
+        water = "0"
 
-                population = convert_big_str_numbers(population)
+    return [float(water), float(land), float(total)]
 
-                pop_year = match[3].strip()
 
-            else:
-                pattern = re.compile(r"([0-9\,]*) \((.*) est")
-                match = re.search(pattern, field_data)
+def gdp_ppp_field(field_data):
+    """Take data as str and return it as a list of int.
 
-                population = match[1].replace(",", "")
+    Args:
+        field_data (str): data for the current field.
 
-                pop_year = match[2]
-                try:
-                    pop_year = pop_year.strip()
-                except AttributeError:
-                    pass
-        return [pop_year, int(population)]
-
-    def imports_exports_field(country, field_data, field_name):
-        """Take imports|exports data and return it as a tuple.
-
-        This function takes data from imports|exports field and extracts
-        two lists from it.
-
-        Args:
-            country (str): name of country for handling exceptions.
-            field_data (str): data for the current field.
-            field_name (str): name of the current field for handling
-                exceptions.
-
-        Returns:
-            Tuple containing two lists.
-
-            First list has two elements - year of the last update of data
-            as int and size of activity as int.
-
-            Second list contains lists as elements. Each nested list has
-            four elements - country name as str, name of partner as str,
-            share of total activity for this partner as float, year of
-            the last update of data as int.
-
-        Example:
-            >>>print(imports_exports_field('ARMENIA', '$2.36 billion
-            (2017 est.)partners: Russia 24.2%, Bulgaria 12.8%,
-            Switzerland 12% (2017)', "Exports"))
-
-            ([2017, 2360000000], [['ARMENIA', 'Russia', 24.2, 2017],
-            ['ARMENIA', 'Bulgaria', 12.8, 2017],
-            ['ARMENIA', 'Switzerland', 12.0, 2017]])
-        """
-        if field_data is None:
-            activity_size, partners, act_year = (
-                field_data,
-                field_data,
-                field_data,
-            )
+    Returns:
+        List of int.
 
-        else:
-            pattern = re.compile(
-                r"(\$[0-9\.]*)\s(billion|million|trillion)\s.(\d\d\d\d)"
-            )
-            match = re.search(pattern, field_data)
+    Example:
+        >>>print(gdp_ppp_field('$20.44 billion (2017 est.)'))
+        [2017, 20440000000]
+    """
+    return gdp_values(GDP_PATTERN.search(str(field_data)))
 
-            if field_name == "Imports" and country == "ETHIOPIA":
-                partners = field_data.split(") ")[1]
 
-            else:
-                # this block handles countries which don't have
-                # import|export partners written
-                try:
-                    partners = field_data.split(
-                        "partners")[1].replace(": ", "")
-                except IndexError:
-                    partners = None
+def gdp_values(match):
+    """Return year and GDP from match, both None if nothing matched.
 
-            try:
-                act_year = match[3]
-                activity_size = f"{match[1]} {match[2]}"
-            # exception handles some country with error in formating
-            except TypeError:
-                act_year = field_data.split("(")[1][:5]
-                activity_size = "".join(field_data.split()[:2])
-
-        if act_year is not None:
-            act_year = int(act_year.strip())
-
-        if activity_size is not None:
-            activity_size = convert_big_str_numbers(activity_size)
-
-        if partners is not None and partners != 'N/A':
-            pattern = re.compile(r"\s\(.*?\)")
-            match = re.search(pattern, partners)
-
-            # we clean unnecessary info with year, which
-            # duplicates imports|export year of update
-            if field_name == "Imports" and country == "SUDAN":
-                pass
-            else:
-                partners = partners.replace(match[0], "")
-
-            if field_name == "Imports" and country == "FRANCE":
-                partners = partners.replace("Belgium", "Belgium ")
-
-            # returning , that were skipped in the text
-            partners = partners.replace("% ", "%,")
-
-            partners = partners.split(",")
-
-            # fixing forgotten % symbols
-            for item in partners:
-                ind = partners.index(item)
-                item = item.strip()
-                if item != "" and item is not None and item[-1] != "%":
-                    item = item + "%"
-                partners[ind] = item
-
-            # we create content for import|exports partners dictionary
-            # with percent_taker function
-            partners_listed = split_percents(field_name, partners)
+    Args:
+        match (re.Match): match of GDP_PATTERN or None.
+
+    Returns:
+        List of int.
+    """
+    try:
+        gdp = f"{match[1]} {match[2].replace('ii','i')}"
+        gdp_year = match[3]
+    except TypeError:
+        gdp, gdp_year = None, None
+
+    if gdp_year is not None:
+        gdp_year = int(gdp_year)
+
+    if gdp is not None:
+        gdp = convert_big_str_numbers(gdp)
+
+    return [gdp_year, gdp]
+
+
+def per_capita_field(field_data):
+    """Take data as str and return it as a list of int.
+
+    Args:
+        field_data (str): data for the current field.
+
+    Returns:
+        List of int.
+
+    Example:
+        >>>print(per_capita_field('$15,100 (2017 est.)'))
+        [2017, 15100]
+    """
+    if field_data is None:
+        return [None, None]
+
+    parts = field_data.split(" (")
+    return per_capita_values(parts[0], parts[1][:5])
+
+
+def per_capita_values(per_capita, per_capita_year):
+    """Return year and GDP per capita from parts of field text.
+
+    Args:
+        per_capita (str): text before the first " (".
+        per_capita_year (str): first five characters after it.
+
+    Returns:
+        List of int.
+    """
+    per_capita_year = per_capita_year.strip().replace(")", "")
+    per_capita = int(per_capita[1:].replace(",", ""))
+    per_capita_year = int(per_capita_year)
+
+    return [per_capita_year, per_capita]
+
+
+def natural_resources_field(country, field_data):
+    """Take data as str and return it as a list of lists.
+
+    Args:
+        country (str): country name forming return.
+        field_data (str): data for the current field.
+
+    Returns:
+        List of lists.
+
+        Each nested list contains two elements - country name and
+        resource name, both as str.
+
+    Example:
+        >>>print(natural_resources_field('URUGUAY', hydropower,
+        minor minerals'))
+        [['URUGUAY', 'hydropower'], ['URUGUAY', 'minor minerals']]
+    """
+    resource_list = field_data.split("note")[0]
+    resource_list = [resource.strip()
+                     for resource in resource_list.split(",")]
+
+    temp_resources = []
+
+    for resource in resource_list:
+
+        if resource[:4] == "and ":
+            resource = resource[4:]
+
+        if ";" in resource:
+            temp_resources.extend(resource.split(";"))
+        elif "(" in resource:
+            temp_resources.append(resource[: resource.find(" (")])
         else:
-            partners_listed = [[None, None]]
+            temp_resources.append(resource)
 
-        for partner in partners_listed:
-            partner[:0] = [country]
-            partner.append(act_year)
+    resource_list = [[country, item.strip()]
+                     for item in temp_resources if item != '']
 
-        return [act_year, activity_size], partners_listed
+    return resource_list
 
-    def area_field(country, field_data):
-        """Take data for area as str and return it as a list of float.
 
-        Args:
-            country (str): country name, used for handling exceptions.
-            field_data (str): data about current field.
+def religion_field(country, field_data, field_name):
+    """Take data as str and return it as list of lists.
 
-        Returns:
-            List of float.
+    Args:
+        country (str): for handling exceptions and forming return.
+        field_data (str): data for current field.
+        field_name (str): for passing to split_percents() func.
+
+    Return:
+        List of lists.
+
+        Each nested list contains four elements: country name as str,
+        religion name as str, share of population for religion as
+        float and year of the last update of data as int.
+
+    Example:
+        >>>print(religion_field('CHAD', 'Muslim 52%, Christian 44%
+        (2014-15 est.)', 'Religion'))
+        [['CHAD', 'Muslim', 52.0, 2014],
+        ['CHAD', 'Christian', 44.0, 2014]]
+    """
+    try:
+        religion_list = field_data.split("note")[0]
+    except AttributeError:
+        religion_list = field_data
 
-        Example:
-            >>>print(area_field('RUSSIA', 'Total: 17,098,242 sq km Land:
-            16,377,742 sq km Water: 720,500 sq km'))
-            [720500.0, 16377742.0, 17098242.0]
-        """
-        if country == "FRENCH SOUTHERN AND ANTARCTIC LANDS":
-            return [None, None, None]
+    match = YEAR_PATTERN.search(str(religion_list))
 
-        total = field_data.lower().split("total: ")
-        total = total[1][: total[1].index(
-            " sq km")].replace(",", "")
+    try:
+        year = int(match[0].strip())
+    except TypeError:
+        year = None
+
+    # handles specific formating for ukraine
+    if country == "UKRAINE":
+        religion_list = DOUBLE_PARENTHESES_PATTERN.sub("", religion_list)
+    # cleans code of things in parenthesis
+    if religion_list is not None:
+        religion_list = RELIGION_NOTE_PATTERN.sub("", religion_list)
+
+        religion_list = [
+            relig.strip() for relig in religion_list.split(",")
+        ]
 
-        if country == "GREENLAND":
-            return [None, None, float(total)]
+    religion_list = split_percents(field_name, religion_list)
 
-        land = field_data.lower().split("land")
-        land = land[1][: land[1].index(" sq km")].replace(",", "")
-        land = land.replace(":", "").strip()
-        land = land.replace("-", "")
+    for religion in religion_list:
+        religion[:0] = [country]
+        religion.append(year)
 
-        if country == "SAUDI ARABIA":
-            total = convert_big_str_numbers(total)
-            land = convert_big_str_numbers(land)
+    return religion_list
 
-        try:
-            water = field_data.lower().split("water: ")
-            water = water[1][: water[1].index(
-                " sq km")].replace(",", "")
-        except ValueError:
-            water = "0"
 
-        return [float(water), float(land), float(total)]
+def language_field(country, field_data, field_name):
+    """Take data as str and return it as list of lists.
 
-    def gdp_ppp_field(field_data):
-        """Take data as str and return it as a list of int.
+    Args:
+        country (str): for handling exceptions and forming return.
+        field_data (str): data for current field.
+        field_name (str): for passing to split_percents() func.
+
+    Return:
+        List of lists.
+
+        Each nested list contains five elements: country name as str,
+        language name as str, share of population for language as
+        float, official status for language in country as bool and
+        year of the last update of data as int.
+
+    Example:
+        >>>print(language_field('CHILE', 'Spanish 99.5% (official),
+        English 10.2%, indigenous 1%, other 2.3%, unspecified 0.2%1
+        (2012 est.)', 'Language'))
+        [['CHILE', 'Spanish', 99.5, True, 2012],
+        ['CHILE', 'English', 10.2, False, 2012],
+        ['CHILE', 'indigenous', 1.0, False, 2012],
+        ['CHILE', 'other', 2.3, False, 2012],
+        ['CHILE', 'unspecified', 0.2, False, 2012]]
+    """
+    language_list = field_data
 
-        Args:
-            field_data (str): data for the current field.
+    matches = LANGUAGE_YEAR_PATTERN.search(str(language_list))
 
-        Returns:
-            List of int.
+    try:
+        year = int(matches[1].strip())
+        language_list = LANGUAGE_YEAR_PATTERN.sub("", language_list)
+    except TypeError:
+        year = None
+
+    try:
+        language_list = language_list.split(" note")[0]
+        language_list = language_list.replace(";", ",")
+    except AttributeError:
+        pass
 
-        Example:
-            >>>print(gdp_ppp_field('$20.44 billion (2017 est.)'))
-            [2017, 20440000000]
-        """
-        pattern = re.compile(
-            r"(\$[0-9\.]+)\s(bi+llion|million|trillion)\s\((20[0-9]{2})"
+    matches = PARENTHESES_PATTERN.finditer(str(language_list))
+
+    for inst in matches:
+        language_list = language_list.replace(
+            inst.group(0), inst.group(0).replace(",", ";")
         )
-        match = re.search(pattern, str(field_data))
+    try:
+        language_list = language_list.replace("%1", "%")
+        language_list = [i.strip()
+                         for i in language_list.split(",")]
 
-        try:
-            gdp = f"{match[1]} {match[2].replace('ii','i')}"
-            gdp_year = match[3]
-        except TypeError:
-            gdp, gdp_year = None, None
+    except AttributeError:
+        language_list = None
 
-        if gdp_year is not None:
-            gdp_year = int(gdp_year)
+    # handles exception with formating on some countries
+    if country == "SPAIN":
+        language_list[4:] = [" ".join(language_list[4:])]
+    elif country == "KAZAKHSTAN":
+        language_list = language_list[0].split(
+            " and ") + language_list[1:]
+    elif country == "MOZAMBIQUE":
+        language_list[3] = language_list[3] + "%"
 
-        if gdp is not None:
-            gdp = convert_big_str_numbers(gdp)
+    language_list = split_percents(field_name, language_list)
+    for language in language_list:
+        language[:0] = [country]
+        language.append(year)
 
-        return [gdp_year, gdp]
+    return language_list
 
-    def per_capita_field(field_data):
-        """Take data as str and return it as a list of int.
 
-        Args:
-            field_data (str): data for the current field.
+def ethnicity_field(country, field_data, field_name):
+    """Take data as str and return it as list of lists.
 
-        Returns:
-            List of int.
+    Args:
+        country (str): for handling exceptions and forming return.
+        field_data (str): data for current field.
+        field_name (str): for passing to split_percents() func.
+
+    Return:
+        List of lists.
+
+        Each nested list contains four elements: country name as str,
+        ethnicity name as str, share of population for ethnicity as
+        float and year of the last update of data as int.
+
+    Example:
+        >>>print(ethnicity_field('DENMARK', 'Danish (includes
+        Greenlandic (who are predominantly Inuit) and Faroese)
+        86.3%, Turkish 1.1%, other 12.6% (largest groups are Polish,
+        Syrian, German, Iraqi, and Romanian) (2018 est.) note: data
+        represent population by ancestry', 'Ethnicity'))
+
+        [['DENMARK', 'Danish', 86.3, '2018'],
+        ['DENMARK', 'Turkish', 1.1, '2018'],
+        ['DENMARK', 'other', 12.6, '2018']]
+    """
+    ethnicity_list = field_data.replace(" %", "%")
 
-        Example:
-            >>>print(per_capita_field('$15,100 (2017 est.)'))
-            [2017, 15100]
-        """
-        try:
-            per_capita = field_data.split(" (")[0]
-            per_capita_year = field_data.split(" (")[1][:5]
-            per_capita_year = per_capita_year.strip().replace(")", "")
-        except AttributeError:
-            per_capita, per_capita_year = None, None
+    match = ETHNICITY_YEAR_PATTERN.search(ethnicity_list)
 
-        if per_capita is not None and per_capita_year is not None:
-            per_capita = int(per_capita[1:].replace(",", ""))
-            per_capita_year = int(per_capita_year)
+    try:
+        year = match[1].strip()
+        ethnicity_list = ethnicity_list.replace(match[0], "")
+    except TypeError:
+        year = None
 
-        return [per_capita_year, per_capita]
+    matches = ETHNICITY_NOTE_PATTERN.finditer(ethnicity_list)
 
-    def natural_resources_field(country, field_data):
-        """Take data as str and return it as a list of lists.
+    for inst in matches:
+        ethnicity_list = ethnicity_list.replace(inst.group(0), " ")
 
-        Args:
-            country (str): country name forming return.
-            field_data (str): data for the current field.
+    # exception in formating for some countries
+    if country == "DENMARK":
+        ethnicity_list = ethnicity_list.replace("and Faroese)", "")
+    elif country == "BURUNDI":
+        ethnicity_list = ethnicity_list.replace(",000", "000")
+    elif country == "GHANA":
+        ethnicity_list = ethnicity_list.replace("47.5", "47.5%")
 
-        Returns:
-            List of lists.
+    ethnicity_list = ethnicity_list.split("note")[0]
+    ethnicity_list = ethnicity_list.replace(";", ",")
 
-            Each nested list contains two elements - country name and
-            resource name, both as str.
+    ethnicity_list = [
+        ethnicity.strip() for ethnicity in ethnicity_list.split(",")
+    ]
 
-        Example:
-            >>>print(natural_resources_field('URUGUAY', hydropower,
-            minor minerals'))
-            [['URUGUAY', 'hydropower'], ['URUGUAY', 'minor minerals']]
-        """
-        resource_list = field_data.split("note")[0]
-        resource_list = [resource.strip()
-                         for resource in resource_list.split(",")]
+    # more exceptions
+    if country == "PORTUGAL":
+        ethnicity_list[1:3] = [",".join(ethnicity_list[1:3])]
+        ethnicity_list = ethnicity_list[:2]
 
-        temp_resources = []
+    elif country == "REPUBLIC OF THE CONGO":
+        ethnicity_list[1:1] = ethnicity_list[1].split("% ")[:2]
+        ethnicity_list[1] = ethnicity_list[1] + "%"
+        del ethnicity_list[3]
+    elif country == "MALDIVES":
+        ethnicity_list = [
+            ", ".join(ethnicity_list).split(" resulting")[0]]
+    elif country == "DEMOCRATIC REPUBLIC OF THE CONGO":
+        ethnicity_list = [ethnicity_list[0]]
 
-        for resource in resource_list:
+    ethnicity_list = split_percents(field_name, ethnicity_list)
+    for ethnos in ethnicity_list:
+        ethnos[:0] = [country]
+        ethnos.append(year)
+    return ethnicity_list
 
-            if resource[:4] == "and ":
-                resource = resource[4:]
 
-            if ";" in resource:
-                temp_resources.extend(resource.split(";"))
-            elif "(" in resource:
-                temp_resources.append(resource[: resource.find(" (")])
-            else:
-                temp_resources.append(resource)
+def other_fields(field_data):
+    """Take data as str and return this str inside a list.
 
-        resource_list = [[country, item.strip()]
-                         for item in temp_resources if item != '']
+    Args:
+        field_data (str): data for current field.
 
-        return resource_list
+    Return:
+        List with a single element.
 
-    def religion_field(country, field_data, field_name):
-        """Take data as str and return it as list of lists.
+    Example:
+        >>>print(other_fields('Ambassador Carla SANDS'))
+        ['Ambassador Carla SANDS']
+    """
+    try:
+        field_data = field_data.replace(
+            "'", "’")
+    except AttributeError:
+        pass
+    return [field_data]
 
-        Args:
-            country (str): for handling exceptions and forming return.
-            field_data (str): data for current field.
-            field_name (str): for passing to split_percents() func.
 
-        Return:
-            List of lists.
+class FieldParser:
+    """Parser of a single field with its arguments and statistics.
 
-            Each nested list contains four elements: country name as str,
-            religion name as str, share of population for religion as
-            float and year of the last update of data as int.
+    Examples:
+        >>>parser = FieldParser(gdp_ppp_field, ("field_data",))
+        >>>print(parser("PERU", "$20.44 billion (2017 est.)", "GDP"))
+        [2017, 20440000000]
+    """
 
-        Example:
-            >>>print(religion_field('CHAD', 'Muslim 52%, Christian 44%
-            (2014-15 est.)', 'Religion'))
-            [['CHAD', 'Muslim', 52.0, 2014],
-            ['CHAD', 'Christian', 44.0, 2014]]
-        """
+    def __init__(self, func, args):
+        #: function: parsing function
+        self.func = func
+        #: tuple of str: arguments of func, out of "country",
+        #: "field_data" and "field_name"
+        self.args = args
+        #: int: number of calls
+        self.calls = 0
+        #: float: time spent in calls, seconds
+        self.seconds = 0.0
+
+    def __call__(self, country, field_data, field_name):
+        start = time.perf_counter()
         try:
-            religion_list = field_data.split("note")[0]
-        except AttributeError:
-            religion_list = field_data
+            return self.parse(country, field_data, field_name)
+        finally:
+            self.record(time.perf_counter() - start)
+
+    def parse(self, country, field_data, field_name):
+        """Parse field without counting the call, see record()."""
+        values = {"country": country, "field_data": field_data,
+                  "field_name": field_name}
+        return self.func(*[values[arg] for arg in self.args])
+
+    def record(self, seconds):
+        """Count one call, which took given time."""
+        self.calls += 1
+        self.seconds += seconds
+
+
+# parser of every field, built once at import, fields without own
+# parser use OTHER_FIELDS_PARSER
+FIELD_PARSERS = {
+    "Literacy": FieldParser(literacy_field, ("field_data",)),
+    "Urbanization": FieldParser(urbanization_field, ("field_data",)),
+    "Population Growth": FieldParser(population_growth_field,
+                                     ("field_data",)),
+    "Population": FieldParser(population_field, ("country", "field_data")),
+    "Imports": FieldParser(imports_exports_field,
+                           ("country", "field_data", "field_name")),
+    "Exports": FieldParser(imports_exports_field,
+                           ("country", "field_data", "field_name")),
+    "Area": FieldParser(area_field, ("country", "field_data")),
+    "GDP (Purchasing Power Parity)": FieldParser(gdp_ppp_field,
+                                                 ("field_data",)),
+    "GDP per capita (Purchasing Power Parity)": FieldParser(
+        per_capita_field, ("field_data",)),
+    "Natural Resources": FieldParser(natural_resources_field,
+                                     ("country", "field_data")),
+    "Religion": FieldParser(religion_field,
+                            ("country", "field_data", "field_name")),
+    "Language": FieldParser(language_field,
+                            ("country", "field_data", "field_name")),
+    "Ethnicity": FieldParser(ethnicity_field,
+                             ("country", "field_data", "field_name")),
+}
+OTHER_FIELDS_PARSER = FieldParser(other_fields, ("field_data",))
+
+
+def field_parser(field_name):
+    """Return FieldParser of field."""
+    return FIELD_PARSERS.get(field_name, OTHER_FIELDS_PARSER)
 
-        pattern = re.compile(r"\d\d\d\d")
-        match = re.search(pattern, str(religion_list))
 
-        try:
-            year = int(match[0].strip())
-        except TypeError:
-            year = None
-
-        # handles specific formating for ukraine
-        if country == "UKRAINE":
-            religion_list = re.sub(r"\(.*?\)\)", "", religion_list)
-        # cleans code of things in parenthesis
-        if religion_list is not None:
-            religion_list = re.sub(r"\(.*?\)1?", "", religion_list)
-
-            religion_list = [
-                relig.strip() for relig in religion_list.split(",")
-            ]
-
-        religion_list = split_percents(field_name, religion_list)
-
-        for religion in religion_list:
-            religion[:0] = [country]
-            religion.append(year)
-
-        return religion_list
-
-    def language_field(country, field_data, field_name):
-        """Take data as str and return it as list of lists.
-
-        Args:
-            country (str): for handling exceptions and forming return.
-            field_data (str): data for current field.
-            field_name (str): for passing to split_percents() func.
-
-        Return:
-            List of lists.
-
-            Each nested list contains five elements: country name as str,
-            language name as str, share of population for language as
-            float, official status for language in country as bool and
-            year of the last update of data as int.
-
-        Example:
-            >>>print(language_field('CHILE', 'Spanish 99.5% (official),
-            English 10.2%, indigenous 1%, other 2.3%, unspecified 0.2%1
-            (2012 est.)', 'Language'))
-            [['CHILE', 'Spanish', 99.5, True, 2012],
-            ['CHILE', 'English', 10.2, False, 2012],
-            ['CHILE', 'indigenous', 1.0, False, 2012],
-            ['CHILE', 'other', 2.3, False, 2012],
-            ['CHILE', 'unspecified', 0.2, False, 2012]]
-        """
-        language_list = field_data
-
-        pattern = re.compile(r"\s\((\d\d\d\d) (est.|census)\)")
-        matches = re.search(pattern, str(language_list))
+def format_field_data(field_name):
+    """Take field name and return appropriate function to format data.
 
-        try:
-            year = int(matches[1].strip())
-            language_list = re.sub(pattern, "", language_list)
-        except TypeError:
-            year = None
+    Args:
+        field_name (str): name of the current field.
 
-        try:
-            language_list = language_list.split(" note")[0]
-            language_list = language_list.replace(";", ",")
-        except AttributeError:
-            pass
+    Returns:
+        Another function.
+    """
+    return field_parser(field_name).func
 
-        pattern = re.compile(r"\(.*?\)")
-        matches = re.finditer(pattern, str(language_list))
 
-        for inst in matches:
-            language_list = language_list.replace(
-                inst.group(0), inst.group(0).replace(",", ";")
-            )
-        try:
-            language_list = language_list.replace("%1", "%")
-            language_list = [i.strip()
-                             for i in language_list.split(",")]
-
-        except AttributeError:
-            language_list = None
-
-        # handles exception with formating on some countries
-        if country == "SPAIN":
-            language_list[4:] = [" ".join(language_list[4:])]
-        elif country == "KAZAKHSTAN":
-            language_list = language_list[0].split(
-                " and ") + language_list[1:]
-        elif country == "MOZAMBIQUE":
-            language_list[3] = language_list[3] + "%"
-
-        language_list = split_percents(field_name, language_list)
-        for language in language_list:
-            language[:0] = [country]
-            language.append(year)
-
-        return language_list
-
-    def ethnicity_field(country, field_data, field_name):
-        """Take data as str and return it as list of lists.
-
-        Args:
-            country (str): for handling exceptions and forming return.
-            field_data (str): data for current field.
-            field_name (str): for passing to split_percents() func.
-
-        Return:
-            List of lists.
-
-            Each nested list contains four elements: country name as str,
-            ethnicity name as str, share of population for ethnicity as
-            float and year of the last update of data as int.
-
-        Example:
-            >>>print(ethnicity_field('DENMARK', 'Danish (includes
-            Greenlandic (who are predominantly Inuit) and Faroese)
-            86.3%, Turkish 1.1%, other 12.6% (largest groups are Polish,
-            Syrian, German, Iraqi, and Romanian) (2018 est.) note: data
-            represent population by ancestry', 'Ethnicity'))
-
-            [['DENMARK', 'Danish', 86.3, '2018'],
-            ['DENMARK', 'Turkish', 1.1, '2018'],
-            ['DENMARK', 'other', 12.6, '2018']]
-        """
-        ethnicity_list = field_data.replace(" %", "%")
-
-        pattern = re.compile(r"\s\((\d\d\d\d).*?\)1?")
-        match = re.search(pattern, ethnicity_list)
+def parser_stats():
+    """Return calls and time of every field parser in this process.
 
-        try:
-            year = match[1].strip()
-            ethnicity_list = ethnicity_list.replace(match[0], "")
-        except TypeError:
-            year = None
+    Returns:
+        list of tuples made of field names, number of calls and time,
+        seconds, slowest first. Imports and Exports share a function,
+        but are counted apart.
+    """
+    parsers = dict(FIELD_PARSERS, **{"other fields": OTHER_FIELDS_PARSER})
+    return sorted(((name, parser.calls, parser.seconds)
+                   for name, parser in parsers.items()),
+                  key=lambda item: -item[2])
 
-        pattern = re.compile(r"\s?\(.*?\)\s?")
-        matches = re.finditer(pattern, ethnicity_list)
 
-        for inst in matches:
-            ethnicity_list = ethnicity_list.replace(inst.group(0), " ")
+def print_parser_stats():
+    """Print calls and time of every field parser."""
+    stats = parser_stats()
+    total = sum(item[2] for item in stats) or 1e-9
+    for name, calls, seconds in stats:
+        print(f"{name}: {calls} calls, {seconds * 1000:.1f} ms, "
+              f"{seconds / total:.0%}")
 
-        # exception in formating for some countries
-        if country == "DENMARK":
-            ethnicity_list = ethnicity_list.replace("and Faroese)", "")
-        elif country == "BURUNDI":
-            ethnicity_list = ethnicity_list.replace(",000", "000")
-        elif country == "GHANA":
-            ethnicity_list = ethnicity_list.replace("47.5", "47.5%")
 
-        ethnicity_list = ethnicity_list.split("note")[0]
-        ethnicity_list = ethnicity_list.replace(";", ",")
+def extract_pdf_text(pdf_file, text_cache=None, regions=None,
+                     backend=DEFAULT_BACKEND):
+    """Convert PDF to text with pdfminer.
 
-        ethnicity_list = [
-            ethnicity.strip() for ethnicity in ethnicity_list.split(",")
-        ]
+    Args:
+        pdf_file (str or file object): path to PDF or PDF opened in
+            binary mode.
+        text_cache (TextCache): cache of extracted text, optional.
+        regions (dict): page number as a key, list of boxes holding the
+            fields as value, see scripts.region_extract. Optional; whole
+            PDF is extracted if None. Works only with default backend.
+        backend (str): name of backend converting PDF to text.
 
-        # more exceptions
-        if country == "PORTUGAL":
-            ethnicity_list[1:3] = [",".join(ethnicity_list[1:3])]
-            ethnicity_list = ethnicity_list[:2]
-
-        elif country == "REPUBLIC OF THE CONGO":
-            ethnicity_list[1:1] = ethnicity_list[1].split("% ")[:2]
-            ethnicity_list[1] = ethnicity_list[1] + "%"
-            del ethnicity_list[3]
-        elif country == "MALDIVES":
-            ethnicity_list = [
-                ", ".join(ethnicity_list).split(" resulting")[0]]
-        elif country == "DEMOCRATIC REPUBLIC OF THE CONGO":
-            ethnicity_list = [ethnicity_list[0]]
-
-        ethnicity_list = split_percents(field_name, ethnicity_list)
-        for ethnos in ethnicity_list:
-            ethnos[:0] = [country]
-            ethnos.append(year)
-        return ethnicity_list
-
-    def other_fields(field_data):
-        """Take data as str and return this str inside a list.
-
-        Args:
-            field_data (str): data for current field.
-
-        Return:
-            List with a single element.
-
-        Example:
-            >>>print(other_fields('Ambassador Carla SANDS'))
-            ['Ambassador Carla SANDS']
-        """
-        try:
-            field_data = field_data.replace(
-                "'", "’")
-        except AttributeError:
-            pass
-        return [field_data]
+    Returns:
+        str: text of the PDF.
+    """
+    if regions is not None and backend != DEFAULT_BACKEND:
+        raise ValueError(f"regions aren't supported by {backend} backend")
 
-    func_dict = {"Literacy": literacy_field,
-                 "Urbanization": urbanization_field,
-                 "Population Growth": population_growth_field,
-                 "Population": population_field,
-                 "Imports": imports_exports_field,
-                 "Exports": imports_exports_field,
-                 "Area": area_field,
-                 "GDP (Purchasing Power Parity)": gdp_ppp_field,
-                 "GDP per capita (Purchasing Power Parity)": per_capita_field,
-                 "Natural Resources": natural_resources_field,
-                 "Religion": religion_field,
-                 "Language": language_field,
-                 "Ethnicity": ethnicity_field}
+    if text_cache is not None:
+        params = TEXT_PARAMS
+        if backend != DEFAULT_BACKEND:
+            params += ";backend=" + backend
+        if regions is not None:
+            params += ";regions=" + json.dumps(regions, sort_keys=True) \
+                + ";fields=" + "|".join(FIELDS)
+        return text_cache.get_or_extract(
+            pdf_file, params,
+            lambda pdf: extract_pdf_text(pdf, None, regions, backend))
 
-    return_func = func_dict.get(field_name, other_fields)
+    if backend != DEFAULT_BACKEND:
+        # pylint: disable=import-outside-toplevel
+        from scripts.text_backends import get_backend
+        return get_backend(backend)(pdf_file)
 
-    return return_func
+    if regions is not None:
+        # pylint: disable=import-outside-toplevel
+        from scripts.region_extract import extract_region_text
+        return extract_region_text(pdf_file, regions, FIELDS)
 
+    return high_level.extract_text(pdf_file, laparams=LA_PARAMS)
 
-def scrape_pdf(path_to_pdf):
-    """Convert PDF to text and scrape data from text.
+
+def segment_text(text):
+    """Find country name, date of last update and text of every field.
 
     Args:
-        path_to_pdf (str): path to folder, containing PDFs.
+        text (str): text of the PDF, as returned by extract_pdf_text().
 
     Returns:
-        List of lists. Each nested list contains class objects as
-        elements.
+        Tuple of country name, date of last update and dict with field
+        name as a key and text of the field as value, None for missing
+        field.
     """
+    # here we extract country name from text
+    text = text.split("\n", 1)
+    country_id = text.pop(0)
+    if country_id == "SAO TOMEAND PRINCIPE":
+        country_id = "SAO TOME AND PRINCIPE"
+
+    # date of last update and spans of fields are found in one pass
+    segments = SEGMENTER.segment(text[0].split(), country_id)
+    contents = segments.contents(FIELDS)
+    field_texts = {}
+
+    for field_name in FIELDS:
+
+        # this handles some expections for Sudan and Chad, where
+        # fields Chief of State and Head of Government are joined
+        if contents[field_name] is None and field_name == "Chief of State":
+            field_data = segments.text((segments.position(5),
+                                        segments.first_name()))
+
+        # some countries don't have some fields, like Literacy
+        # so with such countries we set value for this fields to None
+        elif contents[field_name] is None:
+            field_data = None
+
+        # This is main part, that works with most of the text.
+        # Content of a field runs from its name to the name of the
+        # nearest field after it, see Segments.contents()
 
-    # making parameters for PDFminer for this specific PDFs
-    la_params = layout.LAParams(
-        line_overlap=0.4,
-        char_margin=3.0,
-        line_margin=1.0,
-        word_margin=0.15,
-        boxes_flow=0.3,
-        detect_vertical=False,
-        all_texts=False,
-    )
-    # defining fields
-    fields = [
-        "Chief of State",
-        "Head of Government",
-        "Government Type",
-        "Capital",
-        "Legislature",
-        "Judiciary",
-        "Ambassador to US",
-        "US Ambassador",
-        "Area",
-        "Climate",
-        "Natural Resources",
-        "Economic Overview",
-        "GDP (Purchasing Power Parity)",
-        "GDP per capita (Purchasing Power Parity)",
-        "Exports",
-        "Imports",
-        "Population",
-        "Population Growth",
-        "Ethnicity",
-        "Language",
-        "Religion",
-        "Urbanization",
-        "Literacy",
-    ]
+        else:
+            field_data = segments.text(contents[field_name])
+
+        if field_data in ("NA", "N/A"):
+            field_data = None
+
+        field_texts[field_name] = field_data
+
+    return country_id, segments.last_update, field_texts
+
+
+def scrape_text(text):
+    """Scrape data for a single country from text of its PDF.
+
+    Args:
+        text (str): text of the PDF, as returned by extract_pdf_text().
+
+    Returns:
+        List of lists, in the same order as scrape_pdf() returns them.
+        Each nested list contains class objects for this country.
+    """
+    country_id, last_update, field_texts = segment_text(text)
+
+    # parser takes only arguments of its signature
+    values = {field_name: field_parser(field_name)(
+        country_id, field_texts[field_name], field_name)
+        for field_name in FIELDS[::-1]}
+
+    return build_records(country_id, last_update, values)
 
-    country_general = []
+
+def build_records(country_id, last_update, values):
+    """Make class objects of a country from parsed values of its fields.
+
+    Args:
+        country_id (str): name of the country.
+        last_update (str): date of last update of its PDF.
+        values (dict): field name as a key, value returned by parser of
+            the field as value.
+
+    Returns:
+        List of lists, in the same order as scrape_pdf() returns them.
+    """
+    temp_general = [last_update]
     country_natural_resources = []
     country_language = []
     country_religion = []
@@ -962,123 +1219,251 @@ def scrape_pdf(path_to_pdf):
     country_import_partners = []
     country_export_partners = []
 
-    for name in os.listdir(path_to_pdf):
+    # we work with fieldnames in reverse order, since we need to parse
+    # text from end to begining
+    for field_name in FIELDS[::-1]:
+        temp = values[field_name]
 
-        temp_general = []
-        filepath = os.path.join(path_to_pdf, name)
+        if field_name == "Imports":
+            temp_general.extend(temp[0])
+            temp_list = [sc.CountryImportPartners(*item) for item in temp[1]]
+            country_import_partners.extend(temp_list)
 
-        # scraping unformatted text using pdfminer.six
-        text = high_level.extract_text(filepath, laparams=la_params)
+        elif field_name == "Exports":
+            temp_general.extend(temp[0])
+            temp_list = [sc.CountryExportPartners(*item) for item in temp[1]]
+            country_export_partners.extend(temp_list)
 
-        # here we extract country name from text
-        text = text.split("\n", 1)
-        country_id = text.pop(0)
-        if country_id == "SAO TOMEAND PRINCIPE":
-            country_id = "SAO TOME AND PRINCIPE"
+        elif field_name == "Ethnicity":
+            temp_list = [sc.CountryEthnicity(*item) for item in temp]
+            country_ethnicity.extend(temp_list)
 
-        text = text[0].split()
+        elif field_name == "Religion":
+            temp_list = [sc.CountryReligion(*item) for item in temp]
+            country_religion.extend(temp_list)
 
-        # searching for the date of last update for PDF and removing it
-        last_update_index = [
-            (i, i + 2) for i in range(len(text))
-            if text[i: i + 2] == ["as", "of"]
-        ]
+        elif field_name == 'Language':
+            temp_list = [sc.CountryLanguage(*item) for item in temp]
+            country_language.extend(temp_list)
 
-        last_update = " ".join(
-            text[last_update_index[0][1]: last_update_index[0][1] + 2]
-        )
-        last_update = last_update.strip()
-        del text[last_update_index[0][0]: last_update_index[0][0] + 4]
+        elif field_name == "Natural Resources":
+            temp_list = [sc.CountryNaturalResources(*item) for item in temp]
+            country_natural_resources.extend(temp_list)
 
-        temp_general.append(last_update)
+        else:
+            temp_general.extend(temp)
 
-        # We index text with get_index function
-        index_dict = create_index(fields, text, country_id)
+    temp_general.append(country_id)
+    temp_general = sc.CountryGeneral(*temp_general[::-1])
 
-        # we work with fieldnames in reverse order, since we need to parse
-        # text from end to begining
-        for field_name in fields[::-1]:
+    return [[temp_general],
+            country_natural_resources,
+            country_export_partners,
+            country_import_partners,
+            country_ethnicity,
+            country_language,
+            country_religion]
 
-            field_func = format_field_data(field_name)
-            # this handles some expections for Sudan and Chad, where
-            # fields Chief of State and Head of Government are joined
-            if index_dict[field_name] == [] and field_name == "Chief of State":
-                field_data = " ".join(text[5:])
 
-            # some countries don't have some fields, like Literacy
-            # so with such countries we set value for this fields to None
-            elif index_dict[field_name] == []:
-                field_data = None
+def scrape_document(path_to_pdf, name, text_cache=None, regions=None,
+                    backend=DEFAULT_BACKEND):
+    """Scrape single PDF from folder or archive in a worker process.
 
-            # This is main part, that works with most of the text.
-            # It starts with the end of text and finds the last field
-            # based on index that we got from get_index function
+    Corpus is opened once per process and reused for next documents.
 
-            else:
-                start_field = index_dict[field_name][0]
-                start_content = index_dict[field_name][1]
+    Args:
+        path_to_pdf (str): path to folder or archive with PDFs.
+        name (str): name of PDF in the folder or archive.
+        text_cache (TextCache): cache of extracted text, optional.
+        regions (dict): boxes holding the fields, optional.
+        backend (str): name of backend converting PDF to text.
 
-                field_data = " ".join(text[start_content:])
-                del text[start_field:]
+    Returns:
+        Tuple of result of scrape_text(), id of the worker process, time
+        spent on the document, seconds, and True if its text was taken
+        from text_cache.
+    """
+    start = time.perf_counter()
+    hits = 0 if text_cache is None else text_cache.stats["hits"]
 
-            if field_data in ("NA", "N/A"):
-                field_data = None
+    if path_to_pdf not in _CORPORA:
+        _CORPORA[path_to_pdf] = pdf_archive.open_corpus(path_to_pdf)
 
-            three_arg_fields = ["Imports", "Exports",
-                                "Religion", "Ethnicity", "Language"]
-            two_arg_fields = ["Population", "Area", "Natural Resources"]
+    try:
+        with _CORPORA[path_to_pdf].open(name) as pdf_file:
+            result = scrape_text(extract_pdf_text(pdf_file, text_cache,
+                                                  regions, backend))
+    except Exception as error:
+        # traceback of worker process doesn't travel with the error,
+        # formatted one does
+        error.trace = traceback.format_exc()
+        raise
 
-            if field_name in three_arg_fields:
-                temp = field_func(country_id, field_data, field_name)
+    cached = text_cache is not None and text_cache.stats["hits"] > hits
+    return result, os.getpid(), time.perf_counter() - start, cached
 
-                if field_name == "Imports":
-                    temp_general.extend(temp[0])
-                    temp_list = [sc.CountryImportPartners(
-                        *item) for item in temp[1]]
-                    country_import_partners.extend(temp_list)
 
-                elif field_name == "Exports":
-                    temp_general.extend(temp[0])
-                    temp_list = [sc.CountryExportPartners(
-                        *item) for item in temp[1]]
-                    country_export_partners.extend(temp_list)
+def print_utilization(busy, wall):
+    """Print share of wall time every worker spent scraping.
 
-                elif field_name == "Ethnicity":
-                    temp_list = [sc.CountryEthnicity(*item) for item in temp]
-                    country_ethnicity.extend(temp_list)
+    Args:
+        busy (dict): process id as a key, busy time, seconds, as value.
+        wall (float): wall time of the whole scraping, seconds.
+    """
+    for number, pid in enumerate(sorted(busy), 1):
+        print(f"Worker {number} (pid {pid}): busy {busy[pid]:.2f}s, "
+              f"utilization {busy[pid] / wall:.0%}")
+
+
+def iter_countries(path_to_pdf, workers=1, text_cache=None, regions=None,
+                   backend=DEFAULT_BACKEND, costs=None, names=None,
+                   on_error=None, max_held=None):
+    """Convert PDFs to text and yield data of one country at a time.
+
+    Countries are yielded sorted by name of PDF, whatever order they
+    are scraped in. Name of the country is known only after its PDF is
+    scraped, so sorting by it would hold the whole corpus in memory.
+    With more than one worker, PDFs are scraped in a pool of processes,
+    longest first, so the slowest PDF doesn't delay the end of the run.
+    Countries scraped ahead of their turn wait in memory until they are
+    yielded, at most max_held of them with those being scraped. Once
+    the limit is reached, the PDF due next is scraped whatever its
+    cost.
 
-                elif field_name == "Religion":
-                    temp_list = [sc.CountryReligion(*item) for item in temp]
-                    country_religion.extend(temp_list)
+    Args:
+        path_to_pdf (str): path to folder, containing PDFs, or to zip,
+            tar or pack archive with PDFs.
+        workers (int): number of worker processes.
+        text_cache (TextCache): cache of extracted text, optional.
+        regions (dict): boxes holding the fields, optional. See
+            scripts.region_extract.
+        backend (str): name of backend converting PDF to text.
+        costs (CostHistory): scraping time of earlier runs, used to
+            order PDFs and updated with measured time, with more than
+            one worker only. Time of PDFs, whose text was taken from
+            text_cache, isn't recorded. Optional.
+        names (list of str): names of PDFs to scrape, all PDFs of the
+            corpus if None.
+        on_error (callable): called with name of PDF, exception and
+            formatted traceback or None when PDF fails to scrape, and
+            the PDF is skipped. Exception is raised if None.
+        max_held (int): number of countries waiting for their turn and
+            being scraped, 4 per worker if None.
+
+    Yields:
+        CountryBundle objects.
+    """
+    history = costs if costs is not None else CostHistory()
 
-                elif field_name == 'Language':
-                    temp_list = [sc.CountryLanguage(*item) for item in temp]
-                    country_language.extend(temp_list)
+    with pdf_archive.open_corpus(path_to_pdf) as corpus:
+        names = sorted(corpus.names if names is None else names)
 
-            elif field_name in two_arg_fields:
-                temp = field_func(country_id, field_data)
+        if workers <= 1:
+            for name in names:
+                try:
+                    with corpus.open(name) as pdf_file:
+
+                        # scraping unformatted text using pdfminer.six
+                        text = extract_pdf_text(pdf_file, text_cache,
+                                                regions, backend)
+                        result = scrape_text(text)
+                except Exception as error:  # pylint: disable=broad-except
+                    if on_error is None:
+                        raise
+                    on_error(name, error, traceback.format_exc())
+                    continue
+
+                yield sc.CountryBundle.from_lists(result, name)
+            return
+
+        # only the order of parallel scraping depends on costs
+        stats = {name: document_stats(corpus, name) for name in names}
+
+    order = sorted(names, key=lambda name: -history.predict(name,
+                                                            *stats[name]))
+    max_held = 4 * workers if max_held is None else max(1, max_held)
+    busy = {}
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # few documents are submitted ahead, so queue of the pool is
+        # kept in order of cost
+        pending = {}
+        finished = {}
+
+        for name in names:
+            while name not in finished:
+                # too many countries are held, the one due next is
+                # scraped now, whatever its predicted cost
+                if name in order and \
+                        len(finished) + len(pending) >= max_held:
+                    order.remove(name)
+                    order.insert(0, name)
+
+                while order and len(pending) < 2 * workers and (
+                        len(finished) + len(pending) < max_held
+                        or order[0] == name):
+                    submitted = order.pop(0)
+                    pending[executor.submit(
+                        scrape_document, path_to_pdf, submitted, text_cache,
+                        regions, backend)] = submitted
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    done_name = pending.pop(future)
+                    try:
+                        result, pid, seconds, cached = future.result()
+                    except Exception as error:  # pylint: disable=broad-except
+                        if on_error is None:
+                            raise
+                        on_error(done_name, error,
+                                 getattr(error, "trace", None))
+                        finished[done_name] = None
+                        continue
+                    busy[pid] = busy.get(pid, 0.0) + seconds
+                    # reading cached text costs nothing like extraction
+                    if not cached:
+                        history.record(done_name, *stats[done_name],
+                                       seconds)
+                    finished[done_name] = sc.CountryBundle.from_lists(
+                        result, done_name)
+
+            bundle = finished.pop(name)
+            if bundle is not None:
+                yield bundle
+
+    history.save()
+    print_utilization(busy, time.perf_counter() - start)
+
+
+def scrape_pdf(path_to_pdf, workers=1, text_cache=None, regions=None,
+               backend=DEFAULT_BACKEND, on_error=None):
+    """Convert PDF to text and scrape data from text.
 
-                if field_name == "Natural Resources":
-                    temp_list = [sc.CountryNaturalResources(
-                        *item) for item in temp]
-                    country_natural_resources.extend(temp_list)
+    Collects everything iter_countries() yields into lists.
 
-                else:
-                    temp_general.extend(temp)
+    Args:
+        path_to_pdf (str): path to folder, containing PDFs, or to zip,
+            tar or pack archive with PDFs.
+        workers (int): number of worker processes.
+        text_cache (TextCache): cache of extracted text, optional.
+        regions (dict): boxes holding the fields, optional. See
+            scripts.region_extract.
+        backend (str): name of backend converting PDF to text.
+        on_error (callable): called for every PDF failing to scrape,
+            see iter_countries(). Failure stops scraping if None.
 
-            else:
-                temp = field_func(field_data)
-                temp_general.extend(temp)
+    Returns:
+        List of lists. Each nested list contains class objects as
+        elements.
+    """
+    # one list for every table in DB
+    data_containers = [[] for _ in range(7)]
 
-        temp_general.append(country_id)
-        temp_general = sc.CountryGeneral(*temp_general[::-1])
-        country_general.append(temp_general)
+    for bundle in iter_countries(path_to_pdf, workers, text_cache, regions,
+                                 backend, on_error=on_error):
+        for container, items in zip(data_containers, bundle.tables()):
+            container.extend(items)
 
     print("Finished scraping PDF")
-    return [country_general,
-            country_natural_resources,
-            country_export_partners,
-            country_import_partners,
-            country_ethnicity,
-            country_language,
-            country_religion]
+    return data_containers
@@ -0,0 +1,176 @@
+"""Module with content-addressed storage for downloaded PDF files."""
+import hashlib
+import json
+import os
+import shutil
+import threading
+from datetime import datetime, timezone
+from scripts.sidecar import sidecar_path
+
+
+def file_sha256(file_path):
+    """Return SHA-256 of file content as hex str.
+
+    Args:
+        file_path (str): path to the file.
+
+    Returns:
+        str: hex digest.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def utc_now():
+    """Return current UTC time as ISO 8601 str."""
+    return datetime.now(timezone.utc).isoformat()
+
+
+class PdfStore:
+    """Class storing PDF blobs by SHA-256 with a manifest of countries.
+
+    Blobs are kept in `blobs/<first two hex chars>/<sha256>.pdf`. The
+    manifest maps every country to hash, source URL, fetch time and time
+    of the last change of its document. Identical documents share one
+    blob, and files in PDF folder are hard links to blobs.
+    """
+
+    def __init__(self, store_folder):
+        #: str: path to folder with blobs and manifest
+        self.store_folder = store_folder
+        #: str: path to JSON manifest
+        self.manifest_file = os.path.join(store_folder, "manifest.json")
+        #: dict: manifest with "countries" and "last_run" keys
+        self.manifest = {"countries": {}, "last_run": None}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.join(store_folder, "blobs"), exist_ok=True)
+
+        if os.path.exists(self.manifest_file):
+            with open(self.manifest_file, encoding="utf-8") as file:
+                self.manifest = json.load(file)
+
+    @classmethod
+    def for_folder(cls, path_to_folder):
+        """Return store kept next to PDF folder.
+
+        Args:
+            path_to_folder (str): path to folder with PDF files.
+
+        Returns:
+            PdfStore object.
+        """
+        return cls(sidecar_path(path_to_folder, "store"))
+
+    def blob_path(self, sha256):
+        """Return path to blob with given hash."""
+        return os.path.join(self.store_folder, "blobs", sha256[:2],
+                            sha256 + ".pdf")
+
+    def get(self, country):
+        """Return manifest entry for country or None."""
+        with self._lock:
+            return self.manifest["countries"].get(country)
+
+    def add(self, country, file_path, link, target_path):
+        """Move downloaded file to store and link it to target path.
+
+        If country's document didn't change, target isn't rewritten.
+
+        Args:
+            country (str): name of country.
+            file_path (str): path to verified downloaded file, the file
+                is consumed.
+            link (str): source URL of the file.
+            target_path (str): path of the file in PDF folder.
+
+        Returns:
+            bool: True if document of the country changed.
+        """
+        sha256 = file_sha256(file_path)
+        blob = self.blob_path(sha256)
+        now = utc_now()
+
+        if os.path.exists(blob):
+            os.remove(file_path)
+        else:
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            os.replace(file_path, blob)
+
+        previous = self.get(country)
+        changed = (previous is None or previous["sha256"] != sha256
+                   or not os.path.exists(target_path))
+
+        if changed:
+            link_file(blob, target_path)
+
+        with self._lock:
+            self.manifest["countries"][country] = {
+                "sha256": sha256,
+                "url": link,
+                "size": os.path.getsize(blob),
+                "fetched_at": now,
+                "changed_at": now if changed else previous["changed_at"],
+            }
+
+        return changed
+
+    def begin_run(self):
+        """Mark start of a new run.
+
+        Returns:
+            str: start time of the run. Passed to changed_since() it
+            gives countries changed during the run.
+        """
+        with self._lock:
+            self.manifest["last_run"] = utc_now()
+            return self.manifest["last_run"]
+
+    def changed_since(self, since):
+        """Return countries whose documents changed since given time.
+
+        Args:
+            since (str): ISO 8601 UTC time, None means all countries.
+
+        Returns:
+            Sorted list of country names.
+        """
+        with self._lock:
+            return sorted(
+                country for country, entry
+                in self.manifest["countries"].items()
+                if since is None or entry["changed_at"] > since)
+
+    def save(self):
+        """Write manifest to JSON file, replacing the old one atomically."""
+        temp_file = self.manifest_file + ".tmp"
+
+        with self._lock:
+            with open(temp_file, "w", encoding="utf-8") as file:
+                json.dump(self.manifest, file, indent=1, sort_keys=True)
+
+        os.replace(temp_file, self.manifest_file)
+
+
+def link_file(source, target):
+    """Atomically replace target with hard link to source.
+
+    Falls back to copying if file system doesn't support hard links.
+
+    Args:
+        source (str): path to existing file.
+        target (str): path to created file.
+    """
+    temp_target = target + ".tmp"
+    if os.path.exists(temp_target):
+        os.remove(temp_target)
+
+    try:
+        os.link(source, temp_target)
+    except OSError:
+        shutil.copyfile(source, temp_target)
+
+    os.replace(temp_target, target)
@@ -0,0 +1,279 @@
+"""Module with overlapped download, scrape and load pipeline.
+
+Stages are connected with bounded queues: PDF is scraped as soon as it
+is downloaded, and rows of a country are written to DB as soon as it is
+scraped. Bounded queues keep memory flat whatever the corpus size.
+"""
+import os
+import queue
+import sqlite3
+import threading
+import time
+import traceback
+import scripts.sqlite as sq
+from scripts.download_engine import DownloadEngine, print_timings
+from scripts.pdf_scraper import PARSER_VERSION, extract_pdf_text, scrape_text
+from scripts.text_cache import pdf_sha256
+
+#: object put to a queue after the last item
+DONE = None
+
+
+class StageTimer:
+    """Class accumulating busy time of a pipeline stage."""
+
+    def __init__(self, name):
+        #: str: name of the stage
+        self.name = name
+        #: float: time spent doing work, seconds
+        self.busy = 0.0
+        #: int: number of processed items
+        self.items = 0
+
+    def add(self, seconds):
+        """Add time spent on one item."""
+        self.busy += seconds
+        self.items += 1
+
+
+def drain(in_queue):
+    """Take items from queue until DONE, so its producer never blocks."""
+    while in_queue.get() is not DONE:
+        pass
+
+
+def scrape_stage(in_queue, out_queue, timer, errors, on_error=None):
+    """Scrape downloaded PDFs until DONE is received.
+
+    If the stage itself fails, error is added to errors and the rest of
+    in_queue is drained, so the download stage doesn't block on it.
+
+    Args:
+        in_queue (queue.Queue): paths to downloaded PDFs.
+        out_queue (queue.Queue): tuples of name of PDF, its SHA-256 and
+            lists of class objects for a country.
+        timer (StageTimer): timer of the stage.
+        errors (list): errors, which stopped a stage.
+        on_error (callable): called with name of PDF, exception and
+            traceback when PDF fails to scrape, optional.
+    """
+    done = False
+    try:
+        while not done:
+            file_path = in_queue.get()
+            if file_path is DONE:
+                done = True
+                continue
+
+            name = os.path.basename(file_path)
+            start = time.perf_counter()
+            try:
+                sha256 = pdf_sha256(file_path)
+                result = scrape_text(extract_pdf_text(file_path))
+            # one broken PDF shouldn't stop the pipeline
+            except Exception as error:  # pylint: disable=broad-except
+                print(f"{name}: failed to scrape ({error!r})")
+                if on_error is not None:
+                    on_error(name, error, traceback.format_exc())
+            else:
+                out_queue.put((name, sha256, result))
+            timer.add(time.perf_counter() - start)
+    except Exception as error:  # pylint: disable=broad-except
+        errors.append(error)
+        if not done:
+            drain(in_queue)
+    finally:
+        out_queue.put(DONE)
+
+
+def load_country(cur, name, sha256, data_containers):
+    """Replace rows of a country and record its PDF in the manifest.
+
+    Both are committed together, or DB is left as it was and
+    sqlite3.Error is raised.
+
+    Args:
+        cur (sqlite3.Cursor): cursor outside of a transaction.
+        name (str): name of the PDF.
+        sha256 (str): hex SHA-256 of the PDF.
+        data_containers (list): lists of class instances for a single
+            country, in order of sq.TABLES.
+    """
+    cur.execute("SAVEPOINT load_country")
+    try:
+        sq.replace_country(cur, data_containers)
+        sq.write_manifest(cur, name, data_containers[0][0].name, sha256,
+                          PARSER_VERSION)
+    except sqlite3.Error:
+        cur.execute("ROLLBACK TO load_country")
+        cur.execute("RELEASE load_country")
+        raise
+    cur.execute("RELEASE load_country")
+
+
+def load_stage(in_queue, db_file, timer, errors, on_error=None,
+               loaded=None):
+    """Write scraped countries to DB until DONE is received.
+
+    If the stage itself fails, error is added to errors and the rest of
+    in_queue is drained, so the scrape stage doesn't block on it.
+
+    Args:
+        in_queue (queue.Queue): tuples of name of PDF, its SHA-256 and
+            lists of class objects for a country.
+        db_file (str): path to DB file.
+        timer (StageTimer): timer of the stage.
+        errors (list): errors, which stopped a stage.
+        on_error (callable): called with name of PDF, exception and
+            traceback when country fails to write, optional.
+        loaded (list): names of written PDFs are appended to it,
+            optional.
+    """
+    done = False
+    try:
+        with sq.connect_to_db(db_file) as conn:
+            cur = conn.cursor()
+            while not done:
+                item = in_queue.get()
+                if item is DONE:
+                    done = True
+                    continue
+
+                name, sha256, data_containers = item
+                start = time.perf_counter()
+                try:
+                    load_country(cur, name, sha256, data_containers)
+                except sqlite3.Error as error:
+                    print(f"{data_containers[0][0].name}: failed to write "
+                          f"({error!r})")
+                    if on_error is not None:
+                        on_error(name, error, traceback.format_exc())
+                else:
+                    if loaded is not None:
+                        loaded.append(name)
+                timer.add(time.perf_counter() - start)
+    except Exception as error:  # pylint: disable=broad-except
+        errors.append(error)
+        if not done:
+            drain(in_queue)
+
+
+def needs_scrape(file_path, manifest, quarantine=None,
+                 retry_quarantined=False):
+    """Return True if PDF, which didn't change upstream, is scraped.
+
+    It is scraped if it isn't in DB yet, was scraped by an older parser
+    or from other content, or is quarantined.
+
+    Args:
+        file_path (str): path to the PDF.
+        manifest (dict): manifest read from DB, see sq.read_manifest().
+        quarantine (Quarantine): quarantine of failed PDFs, optional.
+        retry_quarantined (bool): scrape only quarantined PDFs.
+
+    Returns:
+        bool.
+    """
+    name = os.path.basename(file_path)
+    if not os.path.exists(file_path):
+        return False
+    if quarantine is not None and quarantine.get(name) is not None:
+        return True
+    if retry_quarantined:
+        return False
+
+    entry = manifest.get(name)
+    return (entry is None or entry["parser_version"] != PARSER_VERSION
+            or entry["sha256"] != pdf_sha256(file_path))
+
+
+def run_pipeline(links, pdf_folder, db_file, queue_size=8, quarantine=None,
+                 retry_quarantined=False, **engine_args):
+    """Download, scrape and load all PDFs with overlapped stages.
+
+    PDFs downloaded in this run are scraped. Unchanged ones are scraped
+    only if needs_scrape() says so, the manifest in DB records what the
+    pipeline loaded. If a stage fails, the others finish and its error
+    is raised.
+
+    Args:
+        links (list): each element is a list made of two str - country
+            name and link to corresponding PDF file.
+        pdf_folder (str): path to folder for saving PDF.
+        db_file (str): path to DB file.
+        queue_size (int): capacity of queues between stages.
+        quarantine (Quarantine): keeps PDFs failing to scrape or load,
+            and releases them once they are loaded, optional.
+        retry_quarantined (bool): scrape only quarantined PDFs.
+        **engine_args: passed to DownloadEngine.
+
+    Returns:
+        List of DownloadResult objects.
+    """
+    sq.create_db(db_file)
+    with sq.connect_to_db(db_file) as conn:
+        cur = conn.cursor()
+        sq.create_manifest(cur)
+        manifest = sq.read_manifest(cur)
+
+    scrape_queue = queue.Queue(queue_size)
+    load_queue = queue.Queue(queue_size)
+    timers = [StageTimer("download"), StageTimer("scrape"),
+              StageTimer("load")]
+    errors = []
+    loaded = []
+
+    def on_result(result):
+        timers[0].add(result.seconds)
+        file_path = os.path.join(pdf_folder, result.country + ".pdf")
+        # nothing more is scraped once a stage failed
+        if errors:
+            return
+        if result.status == "downloaded" and not retry_quarantined:
+            scrape_queue.put(file_path)
+        elif result.status != "failed" and needs_scrape(
+                file_path, manifest, quarantine, retry_quarantined):
+            scrape_queue.put(file_path)
+
+    def quarantine_failure(stage):
+        if quarantine is None:
+            return None
+
+        def on_error(name, error, trace):
+            quarantine.add(pdf_folder, name, stage, error, trace)
+        return on_error
+
+    scraper = threading.Thread(target=scrape_stage,
+                               args=(scrape_queue, load_queue, timers[1],
+                                     errors, quarantine_failure("scrape")))
+    loader = threading.Thread(target=load_stage,
+                              args=(load_queue, db_file, timers[2], errors,
+                                    quarantine_failure("load"), loaded))
+    scraper.start()
+    loader.start()
+
+    start = time.perf_counter()
+    try:
+        results = DownloadEngine(**engine_args).download(links, pdf_folder,
+                                                         on_result)
+    finally:
+        scrape_queue.put(DONE)
+        scraper.join()
+        loader.join()
+
+        # every country is committed as it is written
+        if quarantine is not None:
+            for name in loaded:
+                quarantine.remove(name)
+
+    if errors:
+        raise errors[0]
+    wall = time.perf_counter() - start
+
+    print_timings(results)
+    for timer in timers:
+        print(f"Stage {timer.name}: {timer.items} items, "
+              f"busy {timer.busy:.2f}s")
+    print(f"Pipeline finished in {wall:.2f}s")
+
+    return results
@@ -0,0 +1,118 @@
+"""Module with quarantine of PDFs that failed to scrape or load.
+
+Copy of every failed PDF is kept next to a JSON record with the stage,
+error and traceback, so the PDF can be inspected and retried later
+without scraping the whole corpus again.
+"""
+import json
+import os
+import traceback
+from scripts import pdf_archive
+from scripts.pdf_store import utc_now
+from scripts.sidecar import sidecar_path
+from scripts.text_cache import pdf_sha256
+
+
+def format_error(error):
+    """Return traceback of exception as str.
+
+    Traceback of exception raised in worker process is included, as
+    concurrent.futures attaches it as the cause.
+    """
+    return "".join(traceback.format_exception(type(error), error,
+                                              error.__traceback__))
+
+
+class Quarantine:
+    """Class keeping failed PDFs with records of their errors."""
+
+    def __init__(self, folder):
+        #: str: path to quarantine folder
+        self.folder = folder
+
+    @classmethod
+    def for_folder(cls, path_to_folder):
+        """Return quarantine kept next to PDF folder or archive."""
+        return cls(sidecar_path(path_to_folder, "quarantine"))
+
+    def record_path(self, name):
+        """Return path to JSON record of PDF."""
+        return os.path.join(self.folder, name + ".json")
+
+    def add(self, path_to_pdf, name, stage, error, trace=None):
+        """Copy failed PDF to quarantine and write its error record.
+
+        If the PDF can't be read, which may be the failure itself, the
+        record is written anyway, with the copy marked as unavailable.
+
+        Args:
+            path_to_pdf (str): path to folder or archive with the PDF.
+            name (str): name of the PDF.
+            stage (str): "scrape" or "load".
+            error (Exception): raised exception.
+            trace (str): formatted traceback, taken from error if None.
+
+        Returns:
+            dict: written record.
+        """
+        # pylint: disable=import-outside-toplevel
+        from scripts.pdf_scraper import PARSER_VERSION
+
+        os.makedirs(self.folder, exist_ok=True)
+        copy_path = os.path.join(self.folder, name)
+
+        copy_error = None
+        try:
+            with pdf_archive.open_corpus(path_to_pdf) as corpus:
+                with corpus.open(name) as pdf_file, \
+                        open(copy_path, "wb") as copy:
+                    copy.write(pdf_file.read())
+        # called from error handlers, which must not fail themselves
+        except Exception as failure:  # pylint: disable=broad-except
+            copy_error = repr(failure)
+            if os.path.exists(copy_path):
+                os.remove(copy_path)
+
+        previous = self.get(name) or {}
+        record = {
+            "document": name,
+            "source": path_to_pdf,
+            "copied": copy_error is None,
+            "copy_error": copy_error,
+            "sha256": None if copy_error else pdf_sha256(copy_path),
+            "stage": stage,
+            "error_type": type(error).__name__,
+            "message": str(error),
+            "traceback": trace or format_error(error),
+            "parser_version": PARSER_VERSION,
+            "failed_at": utc_now(),
+            "attempts": previous.get("attempts", 0) + 1,
+        }
+
+        temp_file = self.record_path(name) + ".tmp"
+        with open(temp_file, "w", encoding="utf-8") as file:
+            json.dump(record, file, indent=1, sort_keys=True)
+        os.replace(temp_file, self.record_path(name))
+        return record
+
+    def get(self, name):
+        """Return error record of PDF or None."""
+        if not os.path.exists(self.record_path(name)):
+            return None
+        with open(self.record_path(name), encoding="utf-8") as file:
+            return json.load(file)
+
+    def names(self):
+        """Return sorted names of quarantined PDFs."""
+        if not os.path.isdir(self.folder):
+            return []
+        return sorted(file_name[: -len(".json")]
+                      for file_name in os.listdir(self.folder)
+                      if file_name.endswith(".json"))
+
+    def remove(self, name):
+        """Release PDF from quarantine after it was processed."""
+        for path in (self.record_path(name),
+                     os.path.join(self.folder, name)):
+            if os.path.exists(path):
+                os.remove(path)
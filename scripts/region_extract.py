@@ -0,0 +1,412 @@
+"""Module for extracting text only from regions holding the fields.
+
+One-page summaries have a fixed layout, so layout analysis of the whole
+page is mostly spent on text, which is never scraped. Characters outside
+the regions are dropped before layout analysis, pages without regions
+aren't interpreted at all and extraction stops as soon as all fields are
+found. If a field is still missing after the pages with regions, the
+whole document is extracted instead.
+
+Regions are learned from a sample of PDFs with learn_regions() and kept
+as JSON: page number as a key, list of [x0, y0, x1, y1] boxes in PDF
+points as value.
+
+Run from the project root with `python -m scripts.region_extract pdf1`
+to learn regions and report layout time saved for every PDF.
+"""
+import argparse
+import json
+import time
+from io import StringIO
+from pdfminer.converter import TextConverter
+from pdfminer.high_level import extract_pages
+from pdfminer.layout import LTTextBox
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+from pdfminer.utils import open_filename
+from scripts import pdf_archive
+from scripts.pdf_scraper import FIELDS, LA_PARAMS, scrape_text
+from scripts.segmenter import TokenAutomaton
+
+#: float: distance between boxes joined to one region, PDF points
+REGION_GAP = 12.0
+
+#: float: space added around every learned region, PDF points
+REGION_MARGIN = 2.0
+
+# automatons of field names, tuple of fields is a key
+_FIELD_AUTOMATA = {}
+
+
+def in_regions(bbox, regions):
+    """Return True if center of bbox is inside any of regions.
+
+    Args:
+        bbox (tuple): x0, y0, x1, y1 of an object.
+        regions (list): list of x0, y0, x1, y1 boxes.
+
+    Returns:
+        bool.
+
+    Examples:
+        >>>print(in_regions((1, 1, 3, 3), [[0, 0, 10, 10]]))
+        True
+    """
+    x_center = (bbox[0] + bbox[2]) / 2
+    y_center = (bbox[1] + bbox[3]) / 2
+    return any(x0 <= x_center <= x1 and y0 <= y_center <= y1
+               for x0, y0, x1, y1 in regions)
+
+
+def field_automaton(fields):
+    """Return automaton of field names and longer names of every name.
+
+    Args:
+        fields (list of str): names of fields.
+
+    Returns:
+        Tuple of TokenAutomaton and list of lists of numbers of fields,
+        whose names start with the name of the field.
+    """
+    key = tuple(fields)
+    if key not in _FIELD_AUTOMATA:
+        patterns = [field.split() for field in fields]
+        longer = [[other for other, pattern in enumerate(patterns)
+                   if len(pattern) > len(name)
+                   and pattern[:len(name)] == name]
+                  for name in patterns]
+        _FIELD_AUTOMATA[key] = TokenAutomaton(patterns), longer
+    return _FIELD_AUTOMATA[key]
+
+
+def fields_complete(text, fields):
+    """Return True if text has every field name and content after them.
+
+    Names are matched as whole words, as the segmenter of scrape_text()
+    matches them. Name, which only starts a longer field name, such as
+    "Population" of "Population Growth", isn't the field.
+
+    Args:
+        text (str): text extracted so far.
+        fields (list of str): names of fields.
+
+    Returns:
+        bool.
+
+    Examples:
+        >>>print(fields_complete("Population Growth 1%", ["Population",
+        "Population Growth"]))
+        False
+    """
+    words = text.split()
+    automaton, longer = field_automaton(fields)
+    found = automaton.find_all(words)
+
+    ends = []
+    for number, starts in enumerate(found):
+        starts = [start for start in starts
+                  if not any(start in found[other]
+                             for other in longer[number])]
+        if not starts:
+            return False
+        ends.append(starts[0] + len(automaton.patterns[number]))
+
+    # content of the last field must not be cut by the end of page
+    return max(ends) < len(words)
+
+
+class RegionTextConverter(TextConverter):
+    """TextConverter dropping characters outside of regions.
+
+    Characters are dropped before layout analysis, so they cost only
+    PDF interpretation.
+    """
+
+    def __init__(self, rsrcmgr, outfp, laparams=None, regions=None):
+        super().__init__(rsrcmgr, outfp, laparams=laparams)
+        #: dict: page number as a key, list of boxes as value, or None
+        #: to keep everything
+        self.regions = regions
+        #: dict: numbers of kept and dropped characters, layout time
+        self.stats = {"kept": 0, "dropped": 0, "layout": 0.0}
+        self._page_regions = None
+
+    def begin_page(self, page, ctm):
+        super().begin_page(page, ctm)
+        if self.regions is not None:
+            self._page_regions = self.regions.get(self.pageno - 1, [])
+
+    def render_char(self, matrix, font, fontsize, scaling, rise, cid, ncs,
+                    graphicstate):
+        advance = super().render_char(matrix, font, fontsize, scaling, rise,
+                                      cid, ncs, graphicstate)
+
+        # chars in figures are kept, they are dropped with the figure
+        if self._page_regions is not None and not self._stack:
+            char = self.cur_item._objs[-1]  # pylint: disable=protected-access
+            if not in_regions(char.bbox, self._page_regions):
+                self.cur_item._objs.pop()  # pylint: disable=protected-access
+                self.stats["dropped"] += 1
+                return advance
+
+        self.stats["kept"] += 1
+        return advance
+
+    def end_page(self, page):
+        # same as PDFLayoutAnalyzer.end_page, with timed analysis
+        start = time.perf_counter()
+        if self.laparams is not None:
+            self.cur_item.analyze(self.laparams)
+        self.stats["layout"] += time.perf_counter() - start
+
+        self.pageno += 1
+        self.receive_layout(self.cur_item)
+
+
+def extract_region_text(pdf_file, regions=None, fields=None, stats=None):
+    """Convert PDF to text, analysing layout only inside regions.
+
+    Regions are learned from a sample, so text of another PDF may lie
+    outside of them. If fields are given and some of them aren't found
+    in text of regions, whole document is extracted instead.
+
+    Args:
+        pdf_file (str or file object): path to PDF or PDF opened in
+            binary mode.
+        regions (dict): page number as a key, list of x0, y0, x1, y1
+            boxes as value. Pages without regions are skipped. If None,
+            whole document is extracted.
+        fields (list of str): names of fields; extraction stops after
+            the page on which all of them are found. Optional.
+        stats (dict): filled with numbers of pages, kept and dropped
+            characters, layout time, seconds, and whether whole
+            document was extracted after regions. Optional.
+
+    Returns:
+        str: text of the PDF.
+    """
+    with open_filename(pdf_file, "rb") as file:
+        text, found = convert_pages(file, regions, fields)
+        fallback = (regions is not None and bool(fields)
+                    and not fields_complete(text, fields))
+        if fallback:
+            file.seek(0)
+            text, full = convert_pages(file, None, None)
+            found = {name: found[name] + full[name]
+                     for name in ("kept", "dropped", "layout", "pages")}
+
+    if stats is not None:
+        stats.update(found, fallback=fallback)
+    return text
+
+
+def convert_pages(file, regions, fields):
+    """Convert pages of PDF to text, see extract_region_text().
+
+    Returns:
+        Tuple of text and dict with numbers of pages, kept and dropped
+        characters and layout time.
+    """
+    page_numbers = None if regions is None else sorted(regions)
+
+    with StringIO() as output:
+        manager = PDFResourceManager()
+        device = RegionTextConverter(manager, output, LA_PARAMS, regions)
+        interpreter = PDFPageInterpreter(manager, device)
+        pages = 0
+
+        for number, page in enumerate(PDFPage.get_pages(file)):
+            if page_numbers is not None and (not page_numbers
+                                             or number > page_numbers[-1]):
+                break
+            # pageno of device counts skipped pages as well
+            device.pageno = number + 1
+            if page_numbers is not None and number not in page_numbers:
+                continue
+
+            interpreter.process_page(page)
+            pages += 1
+            if fields and fields_complete(output.getvalue(), fields):
+                break
+
+        return output.getvalue(), dict(device.stats, pages=pages)
+
+
+def learn_regions(pdf_files, fields=FIELDS, gap=REGION_GAP,
+                  margin=REGION_MARGIN):
+    """Return regions holding header and fields of sample PDFs.
+
+    In every PDF, text boxes containing the header or a field name are
+    taken as seeds. Every seed grows by boxes of the same column lying
+    closer than gap, so content of the fields is included as well.
+    Regions of all PDFs are merged. Text of other PDFs may run lower
+    or wider than in the sample, so every region reaches the bottom of
+    the page and, sideways, the next region or the edge of the page.
+
+    Args:
+        pdf_files (list): paths to PDFs or PDFs opened in binary mode.
+        fields (list of str): names of fields.
+        gap (float): distance between boxes joined to one region.
+        margin (float): space added around every region.
+
+    Returns:
+        dict: page number as a key, list of x0, y0, x1, y1 boxes as
+        value.
+    """
+    regions = {}
+    pages = {}
+
+    for pdf_file in pdf_files:
+        for number, page in enumerate(extract_pages(pdf_file,
+                                                    laparams=LA_PARAMS)):
+            pages[number] = page.bbox
+            boxes = [item for item in page if isinstance(item, LTTextBox)]
+            seeds = [list(box.bbox) for index, box in enumerate(boxes)
+                     if index == 0 or "as of" in box.get_text()
+                     or any(field in " ".join(box.get_text().split())
+                            for field in fields)]
+            if not seeds:
+                continue
+
+            found = [grow_region(seed, boxes, gap) for seed in seeds]
+            found = [[x0, page.y0, x1, y1] for x0, _, x1, y1 in found]
+            regions[number] = merge_boxes(regions.get(number, []) + found)
+
+    return {number: widen_regions(
+        [[x0, y0, x1, y1 + margin] for x0, y0, x1, y1 in boxes],
+        pages[number]) for number, boxes in regions.items()}
+
+
+def grow_region(region, boxes, gap):
+    """Return region grown by boxes of its column closer than gap."""
+    grown = True
+    while grown:
+        grown = False
+        for box in boxes:
+            x0, y0, x1, y1 = box.bbox
+            overlap = min(x1, region[2]) - max(x0, region[0])
+            distance = max(y0 - region[3], region[1] - y1, 0)
+            inside = (region[0] <= x0 and x1 <= region[2]
+                      and region[1] <= y0 and y1 <= region[3])
+            if (not inside and distance < gap
+                    and overlap > 0.5 * min(x1 - x0, region[2] - region[0])):
+                region = [min(region[0], x0), min(region[1], y0),
+                          max(region[2], x1), max(region[3], y1)]
+                grown = True
+    return region
+
+
+def widen_regions(boxes, page_box):
+    """Return boxes widened to the page bottom and to their neighbours.
+
+    Every box reaches down to the bottom of the page. Sideways it grows
+    up to the nearest box beside it, or to the edge of the page.
+
+    Examples:
+        >>>print(widen_regions([[10, 50, 20, 90]], (0, 0, 100, 100)))
+        [[0, 0, 100, 90]]
+    """
+    widened = []
+    for x0, _, x1, y1 in boxes:
+        # all boxes reach the bottom, so every other box is beside
+        left = [other[2] for other in boxes if other[2] <= x0]
+        right = [other[0] for other in boxes if other[0] >= x1]
+        widened.append([max(left, default=page_box[0]), page_box[1],
+                        min(right, default=page_box[2]), y1])
+    return widened
+
+
+def merge_boxes(boxes):
+    """Return boxes with every group of overlapping boxes merged."""
+    merged = []
+    for box in sorted(boxes):
+        for other in merged:
+            if (box[0] <= other[2] and other[0] <= box[2]
+                    and box[1] <= other[3] and other[1] <= box[3]):
+                other[:] = [min(box[0], other[0]), min(box[1], other[1]),
+                            max(box[2], other[2]), max(box[3], other[3])]
+                break
+        else:
+            merged.append(list(box))
+
+    # merging may create new overlaps
+    return merged if len(merged) == len(boxes) else merge_boxes(merged)
+
+
+def load_regions(regions_file):
+    """Return regions read from JSON file, with int page numbers."""
+    with open(regions_file, encoding="utf-8") as file:
+        return {int(number): boxes for number, boxes in
+                json.load(file).items()}
+
+
+def main():
+    """Learn regions and report layout time saved for every PDF."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("corpus", help="folder or archive with PDFs")
+    parser.add_argument("--regions", default=None,
+                        help="JSON file with regions, learned if missing")
+    parser.add_argument("--sample", type=int, default=20,
+                        help="number of PDFs regions are learned from")
+    parser.add_argument("--save-regions", default=None,
+                        help="write learned regions to this JSON file")
+    args = parser.parse_args()
+
+    with pdf_archive.open_corpus(args.corpus) as corpus:
+        names = sorted(corpus.names)
+
+        if args.regions:
+            regions = load_regions(args.regions)
+        else:
+            sample = [corpus.open(name) for name in names[: args.sample]]
+            regions = learn_regions(sample)
+            for pdf_file in sample:
+                pdf_file.close()
+        print(f"Regions: {json.dumps(regions)}")
+
+        if args.save_regions:
+            with open(args.save_regions, "w", encoding="utf-8") as file:
+                json.dump(regions, file)
+
+        totals = {"full": 0.0, "region": 0.0, "same": 0, "docs": 0,
+                  "fallback": 0}
+        for name in names:
+            full, restricted = {}, {}
+            with corpus.open(name) as pdf_file:
+                full_text = extract_region_text(pdf_file, stats=full)
+                pdf_file.seek(0)
+                text = extract_region_text(pdf_file, regions, FIELDS,
+                                           restricted)
+
+            same = scraped(full_text) == scraped(text)
+            totals["full"] += full["layout"]
+            totals["region"] += restricted["layout"]
+            totals["same"] += same
+            totals["docs"] += 1
+            totals["fallback"] += restricted["fallback"]
+            print(f"{name}: layout {full['layout'] * 1000:.1f} ms -> "
+                  f"{restricted['layout'] * 1000:.1f} ms, pages "
+                  f"{full['pages']} -> {restricted['pages']}, dropped "
+                  f"{restricted['dropped']} of "
+                  f"{full['kept']} chars, "
+                  f"{'same' if same else 'DIFFERENT'} data"
+                  f"{', whole page' if restricted['fallback'] else ''}")
+
+    saved = totals["full"] - totals["region"]
+    print(f"Layout time {totals['full']:.2f}s -> {totals['region']:.2f}s, "
+          f"saved {saved:.2f}s "
+          f"({saved / max(totals['full'], 1e-9):.0%}), "
+          f"{totals['same']} of {totals['docs']} PDFs give same data, "
+          f"{totals['fallback']} extracted whole after regions")
+
+
+def scraped(text):
+    """Return scraped data of text as comparable values, or error."""
+    try:
+        return [[vars(item) for item in items] for items in scrape_text(text)]
+    except Exception as error:  # pylint: disable=broad-except
+        return repr(error)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""Module with rate limiting and retry scheduling for HTTP requests."""
+import email.utils
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+#: tuple of int: response statuses worth retrying
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+#: float: overall deadline of a download run, seconds
+DEFAULT_DEADLINE = 2 * 60 * 60.0
+
+
+class TokenBucket:
+    """Token bucket limiting rate of requests to a single host."""
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        #: float: tokens added per second
+        self.rate = rate
+        #: float: maximum number of tokens, size of allowed burst
+        self.capacity = capacity
+        #: float: tokens available right now
+        self.tokens = capacity
+        self._clock = clock
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take one token and return how long to wait before using it.
+
+        Returns:
+            float: seconds to wait, 0 if token is available right away.
+        """
+        with self._lock:
+            now = self._clock()
+            self.tokens = min(self.capacity,
+                              self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self.tokens -= 1
+
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+def parse_retry_after(value, now=None):
+    """Return delay from Retry-After header value in seconds.
+
+    Args:
+        value (str): header value, number of seconds or HTTP date.
+        now (float): current time as UNIX timestamp, optional.
+
+    Returns:
+        float or None if value can't be parsed.
+
+    Examples:
+        >>>print(parse_retry_after("120"))
+        120.0
+    """
+    if value is None:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    now = time.time() if now is None else now
+    return max(0.0, date.timestamp() - now)
+
+
+class RequestScheduler:
+    """Scheduler pacing, retrying and timing out HTTP requests.
+
+    Every host has its own token bucket. Failed requests are retried
+    with exponential backoff and jitter, server's Retry-After header is
+    honored up to backoff_max, and no request is started after the
+    overall deadline.
+    """
+
+    def __init__(self, rate=4.0, burst=4, retries=5, backoff_base=0.5,
+                 backoff_max=30.0, timeout=30.0, deadline=DEFAULT_DEADLINE,
+                 sleep=time.sleep, clock=time.monotonic):
+        #: float: requests per second allowed for each host
+        self.rate = rate
+        #: int: number of requests allowed in a burst for each host
+        self.burst = burst
+        #: int: number of retries for a single request
+        self.retries = retries
+        #: float: delay before the first retry, seconds
+        self.backoff_base = backoff_base
+        #: float: upper bound for a delay between retries, seconds
+        self.backoff_max = backoff_max
+        #: float: timeout for a single request, seconds
+        self.timeout = timeout
+        #: float: length of the overall deadline, seconds, no deadline
+        #: if None
+        self.deadline_seconds = deadline
+        #: float: time, by clock, after which no request is started
+        self.deadline = None if deadline is None else clock() + deadline
+        #: dict: counters of requests, retries and throttling waits
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "throttle_waits": 0,
+            "throttle_seconds": 0.0,
+        }
+        self._sleep = sleep
+        self._clock = clock
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self.stats[name] += value
+
+    def _bucket(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate, self.burst,
+                                                  self._clock)
+            return self._buckets[host]
+
+    def _check_deadline(self, delay=0.0):
+        if self.deadline is not None and \
+                self._clock() + delay > self.deadline:
+            raise TimeoutError("deadline for downloads is exceeded")
+
+    def start_deadline(self):
+        """Count the overall deadline from now, for a new download run.
+
+        Scheduler is shared by the whole process, so a long-running
+        process restarts the deadline for every run. Run starts with
+        scrape_pdf_links(), DownloadEngine.download() restarts it too,
+        as the engine can be used without the index page.
+        """
+        if self.deadline_seconds is not None:
+            self.deadline = self._clock() + self.deadline_seconds
+
+    def throttle(self, url):
+        """Wait until host of URL can receive another request.
+
+        Args:
+            url (str): URL about to be requested.
+        """
+        delay = self._bucket(url).reserve()
+        if delay > 0:
+            self._check_deadline(delay)
+            self._count("throttle_waits")
+            self._count("throttle_seconds", delay)
+            self._sleep(delay)
+
+    def wait_before_retry(self, attempt, retry_after=None):
+        """Sleep before next attempt or raise if no attempts are left.
+
+        Args:
+            attempt (int): number of the failed attempt, starting with 0.
+            retry_after (float): delay requested by server, optional.
+                Longer delay than backoff_max is cut to backoff_max, so
+                a server can't stall downloads for hours.
+
+        Returns:
+            bool: True if request should be retried.
+        """
+        if attempt >= self.retries:
+            return False
+
+        if retry_after is None:
+            delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+            # full jitter spreads retries of concurrent downloads
+            delay = random.uniform(0, delay)
+        else:
+            delay = min(self.backoff_max, retry_after)
+
+        self._check_deadline(delay)
+        self._count("retries")
+        self._sleep(delay)
+        return True
+
+    def get(self, session, url, **kwargs):
+        """Send GET request with pacing, retries and timeout.
+
+        Args:
+            session (requests.Session): session used for the request.
+            url (str): requested URL.
+            **kwargs: passed to session.get().
+
+        Returns:
+            Response object. Response with status from RETRY_STATUSES is
+            returned when all retries are used.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+
+        while True:
+            self._check_deadline()
+            self.throttle(url)
+            self._count("requests")
+
+            try:
+                response = session.get(url, **kwargs)
+            # requests exceptions are subclasses of IOError
+            except OSError:
+                if self.wait_before_retry(attempt):
+                    attempt += 1
+                    continue
+                raise
+
+            if response.status_code not in RETRY_STATUSES:
+                return response
+
+            retry_after = parse_retry_after(
+                response.headers.get("Retry-After"))
+            if not self.wait_before_retry(attempt, retry_after):
+                return response
+
+            response.close()
+            attempt += 1
+
+    def print_stats(self):
+        """Print counters of requests, retries and throttling waits."""
+        print(f"Requests: {self.stats['requests']}, "
+              f"retries: {self.stats['retries']}, "
+              f"throttling waits: {self.stats['throttle_waits']} "
+              f"({self.stats['throttle_seconds']:.2f}s)")
@@ -0,0 +1,115 @@
+"""Module with history of scraping time used to order work.
+
+Documents are scraped longest first, so a slow PDF never starts last
+and dominates the end of a parallel run. Cost of a document is its
+scraping time measured on earlier runs or, for new and changed PDFs,
+an estimate from its page count or size. Runs, which took text from
+the text cache, don't measure extraction and aren't recorded.
+"""
+import json
+import os
+import re
+from scripts.sidecar import sidecar_path
+
+#: float: scraping time per byte used before anything is measured
+DEFAULT_SECONDS_PER_BYTE = 1e-6
+
+# page objects, but not the page tree nodes
+PAGE_PATTERN = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+
+
+def count_pages(content):
+    """Return number of page objects in PDF content.
+
+    Pages inside compressed object streams aren't visible, so result
+    may be 0 for PDFs using them.
+
+    Args:
+        content (bytes): content of PDF file.
+
+    Returns:
+        int.
+
+    Examples:
+        >>>print(count_pages(b"<< /Type /Pages >> << /Type /Page >>"))
+        1
+    """
+    return len(PAGE_PATTERN.findall(content))
+
+
+def document_stats(corpus, name):
+    """Return size and page count of PDF in corpus.
+
+    Args:
+        corpus: corpus object returned by pdf_archive.open_corpus().
+        name (str): name of PDF.
+
+    Returns:
+        Tuple of two int.
+    """
+    with corpus.open(name) as pdf_file:
+        content = pdf_file.read()
+    return len(content), count_pages(content)
+
+
+class CostHistory:
+    """Class storing size, page count and scraping time of documents."""
+
+    def __init__(self, cost_file=None):
+        #: str: path to JSON file with history, history is only kept in
+        #: memory if None
+        self.cost_file = cost_file
+        #: dict: name of PDF as a key, dict with size, pages and
+        #: seconds as value
+        self.entries = {}
+
+        if cost_file is not None and os.path.exists(cost_file):
+            with open(cost_file, encoding="utf-8") as file:
+                self.entries = json.load(file)
+
+    @classmethod
+    def for_folder(cls, path_to_folder):
+        """Return history stored next to PDF folder or archive."""
+        return cls(sidecar_path(path_to_folder, "scrape_costs.json"))
+
+    def predict(self, name, size, pages):
+        """Return expected scraping time of document.
+
+        Args:
+            name (str): name of PDF.
+            size (int): size of PDF, bytes.
+            pages (int): number of pages in PDF.
+
+        Returns:
+            float: time, seconds.
+        """
+        entry = self.entries.get(name)
+        if entry is not None and entry["size"] == size:
+            return entry["seconds"]
+
+        # rates over all measured documents
+        seconds = sum(item["seconds"] for item in self.entries.values())
+        if pages and any(item["pages"] for item in self.entries.values()):
+            return pages * seconds / sum(item["pages"]
+                                         for item in self.entries.values())
+        if self.entries:
+            return size * seconds / max(1, sum(item["size"] for item
+                                               in self.entries.values()))
+        return size * DEFAULT_SECONDS_PER_BYTE
+
+    def record(self, name, size, pages, seconds):
+        """Store measured scraping time of document."""
+        self.entries[name] = {"size": size, "pages": pages,
+                              "seconds": seconds}
+
+    def save(self):
+        """Write history to JSON file, replacing the old one atomically."""
+        if self.cost_file is None:
+            return
+
+        temp_file = self.cost_file + ".tmp"
+
+        with open(temp_file, "w", encoding="utf-8") as file:
+            json.dump(self.entries, file, indent=1, sort_keys=True)
+
+        os.replace(temp_file, self.cost_file)
@@ -0,0 +1,303 @@
+"""Module splitting words of a PDF text into fields in a single pass.
+
+Field names, section headers and the "as of" date marker are compiled
+once into an automaton over words (Aho-Corasick over tokens instead of
+characters). Every word of the text is read once, and all occurrences
+of all patterns, overlapping ones included, are found together.
+
+Headers and the date are then dropped from the text by their indexes,
+without copying the words, and contents of fields are kept as spans
+of words until a parser needs them as text.
+"""
+from bisect import bisect_left
+
+#: list of str: words of the date marker, date follows as two words
+AS_OF = ["as", "of"]
+
+#: list of lists: section headers dropped from text before fields are
+#: searched, in order of dropping
+SECTION_HEADERS = [["GOVERNMENT"], ["GEOGRAPHY"], ["PEOPLE", "&", "SOCIETY"]]
+
+# economy header is dropped only when the overview field is named
+ECONOMY = ["ECONOMY"]
+ECONOMIC_OVERVIEW = ["Economic", "Overview"]
+
+
+class TokenAutomaton:
+    """Automaton finding all occurrences of word sequences in one pass.
+
+    Examples:
+        >>>automaton = TokenAutomaton([["as", "of"], ["of"]])
+        >>>print(automaton.find_all("as of May".split()))
+        [[0], [1]]
+    """
+
+    def __init__(self, patterns):
+        #: list of lists: patterns as lists of words
+        self.patterns = patterns
+        # state is index in these lists, 0 is the root
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+
+        for number, pattern in enumerate(patterns):
+            state = 0
+            for word in pattern:
+                if word not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][word] = len(self._goto) - 1
+                state = self._goto[state][word]
+            self._output[state].append(number)
+
+        # breadth-first, so fail state of parent is ready before child
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for word, child in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and word not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(word, 0)
+                self._output[child] = (self._output[child]
+                                       + self._output[self._fail[child]])
+                queue.append(child)
+
+    def find_all(self, words):
+        """Return start indexes of every pattern in words.
+
+        Args:
+            words (list of str): text split to words.
+
+        Returns:
+            list of lists of int, one list for every pattern, in order
+            of patterns.
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        lengths = [len(pattern) for pattern in self.patterns]
+        found = [[] for _ in self.patterns]
+        state = 0
+
+        for position, word in enumerate(words):
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            for number in output[state]:
+                found[number].append(position - lengths[number] + 1)
+
+        return found
+
+
+class FieldSegmenter:
+    """Class finding fields, headers and date in words of a PDF text.
+
+    Country aliases are patterns of their own, used instead of the field
+    name for that country only.
+    """
+
+    def __init__(self, fields, aliases=None):
+        #: list of str: names of fields
+        self.fields = fields
+        #: dict: tuple of country and field as a key, field name as it
+        #: is misspelled in PDF of that country as value
+        self.aliases = aliases or {}
+
+        patterns = [AS_OF, ECONOMY, ECONOMIC_OVERVIEW] + SECTION_HEADERS
+        patterns += [field.split() for field in fields]
+        patterns += [alias.split() for alias in self.aliases.values()]
+        #: TokenAutomaton: automaton compiled from all patterns
+        self.automaton = TokenAutomaton(patterns)
+
+        # first pattern of fields and aliases in list of patterns
+        self._field_start = 3 + len(SECTION_HEADERS)
+        self._alias_pattern = {
+            key: self._field_start + len(fields) + number
+            for number, key in enumerate(self.aliases)}
+
+    def segment(self, words, country_id):
+        """Find date of last update and fields in words of PDF text.
+
+        Args:
+            words (list of str): text of PDF without the first line,
+                split to words.
+            country_id (str): name of the country, selects aliases.
+
+        Returns:
+            Segments: date and spans of field names in words. Date and
+            section headers are dropped from the text.
+
+        Raises:
+            IndexError: if date or "PEOPLE & SOCIETY" header is missing.
+            ValueError: if other section header is missing.
+        """
+        found = self.automaton.find_all(words)
+        dropped = set()
+
+        def occurrences(number, length):
+            # spans of pattern in text without words dropped so far
+            spans = {(start, start + length) for start in found[number]
+                     if dropped.isdisjoint(range(start, start + length))}
+            if length > 1 and dropped:
+                spans.update(self._across_gaps(words, dropped).get(number,
+                                                                   ()))
+            return sorted(spans)
+
+        def first(number, length, missing):
+            spans = occurrences(number, length)
+            if not spans:
+                raise missing
+            return spans[0]
+
+        as_of = first(0, 2, IndexError("list index out of range"))[0]
+        last_update = " ".join(words[as_of + 2: as_of + 4]).strip()
+        dropped.update(range(as_of, min(as_of + 4, len(words))))
+
+        for number, header in enumerate(SECTION_HEADERS, 3):
+            missing = (ValueError(f"'{header[0]}' is not in list")
+                       if len(header) == 1
+                       else IndexError("list index out of range"))
+            dropped.update(range(*first(number, len(header), missing)))
+
+        if occurrences(2, 2):
+            dropped.add(first(1, 1, ValueError("'ECONOMY' is not in "
+                                               "list"))[0])
+
+        across = self._across_gaps(words, dropped)
+        names = {}
+
+        for number, field in enumerate(self.fields, self._field_start):
+            number = self._alias_pattern.get((country_id, field), number)
+            length = len(self.automaton.patterns[number])
+            spans = sorted(
+                {(start, start + length) for start in found[number]
+                 if dropped.isdisjoint(range(start, start + length))}
+                | across.get(number, set()))
+
+            # name of US Ambassador field is mentioned in other field
+            # first, for the rest the first occurrence is the field
+            if len(spans) > 1 and field == "US Ambassador":
+                names[field] = list(spans[1])
+            elif spans:
+                names[field] = list(spans[0])
+            else:
+                names[field] = []
+
+        return Segments(words, dropped, last_update, names)
+
+    def _across_gaps(self, words, dropped):
+        """Return patterns, which words join only after dropping.
+
+        Args:
+            words (list of str): words of PDF text.
+            dropped (set of int): indexes of dropped words.
+
+        Returns:
+            dict: number of pattern as a key, set of spans of words of
+            occurrences around dropped words as value.
+        """
+        longest = max(len(pattern) for pattern in self.automaton.patterns)
+        across = {}
+
+        for position in sorted(dropped):
+            # every run of dropped words is checked once
+            if position - 1 in dropped:
+                continue
+
+            before = []
+            index = position - 1
+            while index >= 0 and len(before) < longest - 1:
+                if index not in dropped:
+                    before.insert(0, index)
+                index -= 1
+            after = []
+            index = position
+            while index < len(words) and len(after) < longest - 1:
+                if index not in dropped:
+                    after.append(index)
+                index += 1
+
+            window = before + after
+            found = self.automaton.find_all([words[index]
+                                             for index in window])
+            for number, starts in enumerate(found):
+                last = len(self.automaton.patterns[number]) - 1
+                for start in starts:
+                    if start < len(before) <= start + last:
+                        across.setdefault(number, set()).add(
+                            (window[start], window[start + last] + 1))
+
+        return across
+
+
+class Segments:
+    """Date and fields of PDF text as spans of its words.
+
+    Words are never copied or deleted, dropped words are only skipped
+    when text of a span is made.
+    """
+
+    def __init__(self, words, dropped, last_update, names):
+        #: list of str: words of PDF text
+        self.words = words
+        #: list of int: sorted indexes of words of date and headers
+        self.dropped = sorted(dropped)
+        #: str: date of last update
+        self.last_update = last_update
+        #: dict: field name as a key, list of index of the first word of
+        #: field name and index +1 of its last word as value, empty list
+        #: for missing field
+        self.names = names
+
+    def contents(self, fields):
+        """Return span of content of every field.
+
+        Content runs from the end of field name to the nearest start of
+        a name of any later field, text is cut at the first of them.
+
+        Args:
+            fields (list of str): names of fields in order of PDF.
+
+        Returns:
+            dict: field name as a key, tuple of start and end index of
+            words as value, None for missing field.
+        """
+        spans = {}
+        end = len(self.words)
+
+        for field in reversed(fields):
+            if not self.names[field]:
+                spans[field] = None
+                continue
+            start, content = self.names[field]
+            spans[field] = (content, max(content, end))
+            end = min(end, start)
+
+        return spans
+
+    def first_name(self):
+        """Return index of the first word of the earliest field name."""
+        return min([len(self.words)] + [name[0] for name
+                                         in self.names.values() if name])
+
+    def position(self, index):
+        """Return index in words of a word counted without dropped ones.
+
+        Examples:
+            >>>print(Segments(["as", "of", "May", "2020", "x"], {0, 1, 2, 3},
+            "May 2020", {}).position(0))
+            4
+        """
+        for dropped in self.dropped:
+            if dropped > index:
+                break
+            index += 1
+        return min(index, len(self.words))
+
+    def text(self, span):
+        """Return words of span joined with spaces, without dropped ones."""
+        start, end = span
+        if bisect_left(self.dropped, start) == bisect_left(self.dropped, end):
+            return " ".join(self.words[start:end])
+        dropped = set(self.dropped)
+        return " ".join(self.words[index] for index in range(start, end)
+                        if index not in dropped)
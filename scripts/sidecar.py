@@ -0,0 +1,27 @@
+"""Module for locating files stored next to the PDF folder."""
+import os
+
+
+def sidecar_path(path_to_folder, name):
+    """Return path to a file kept in the metadata folder of PDF folder.
+
+    Metadata lives in a sibling folder named `<folder>.meta`, so files
+    in the PDF folder itself are only PDFs.
+
+    Args:
+        path_to_folder (str): path to folder with PDF files.
+        name (str): name of the metadata file or folder.
+
+    Returns:
+        str: path inside the metadata folder.
+
+    Examples:
+        >>>print(sidecar_path("pdf1", "http_cache.json"))
+        pdf1.meta/http_cache.json
+    """
+    meta_folder = os.path.normpath(path_to_folder) + ".meta"
+
+    if not os.path.exists(meta_folder):
+        os.makedirs(meta_folder, exist_ok=True)
+
+    return os.path.join(meta_folder, name)
@@ -1,6 +1,20 @@
 """This module will contain all function for working with sqlite DB."""
 import sqlite3
 
+#: list of str: names of tables, in order of lists returned by scrape_pdf
+TABLES = [
+    "Country overview",
+    "Natural resources",
+    "Export partners",
+    "Import partners",
+    "Ethnicity",
+    "Language",
+    "Religion",
+]
+
+#: str: name of table with source PDF of every country, see create_manifest
+MANIFEST_TABLE = "Scrape manifest"
+
 
 def create_db(dbfile):
     """Create sqlite DB with 7 tables.
@@ -139,3 +153,100 @@ def write_to_db(executor, table, instances_container):
         placeholder = str(placeholder).replace("\'", "")
         executor.execute(
             f"INSERT INTO '{table}' values {placeholder}", vars(item))
+
+
+def delete_country(executor, country_id):
+    """Delete rows of a single country from all tables.
+
+    Args:
+        executor (sqlite3.Cursor): sqlite3 cursor object.
+        country_id (str): name of the country.
+    """
+    for table in TABLES:
+        executor.execute(
+            f"DELETE FROM '{table}' WHERE country_id = ?", (country_id,))
+
+
+def replace_country(executor, data_containers):
+    """Replace all rows of a country with freshly scraped data.
+
+    Either all rows of the country are replaced or, if any row can't be
+    written, DB is left as it was and sqlite3.Error is raised.
+
+    Args:
+        executor (sqlite3.Cursor): sqlite3 cursor object.
+        data_containers (list): lists of class instances for a single
+            country, in order of TABLES.
+    """
+    # savepoint makes replacement of a country all or nothing
+    executor.execute("SAVEPOINT replace_country")
+    try:
+        for country in data_containers[0]:
+            delete_country(executor, country.name)
+
+        for table, instances_container in zip(TABLES, data_containers):
+            write_to_db(executor, table, instances_container)
+    except sqlite3.Error:
+        executor.execute("ROLLBACK TO replace_country")
+        executor.execute("RELEASE replace_country")
+        raise
+    executor.execute("RELEASE replace_country")
+
+
+def create_manifest(executor):
+    """Create table recording which PDF every country was scraped from.
+
+    Args:
+        executor (sqlite3.Cursor): sqlite3 cursor object.
+    """
+    executor.execute(
+        f"""CREATE TABLE IF NOT EXISTS '{MANIFEST_TABLE}' (
+                document text primary key,
+                country_id text,
+                sha256 text,
+                parser_version integer)
+                """
+    )
+
+
+def read_manifest(executor):
+    """Return manifest of scraped PDFs.
+
+    Args:
+        executor (sqlite3.Cursor): sqlite3 cursor object.
+
+    Returns:
+        dict: name of PDF as a key, dict with country_id, sha256 and
+        parser_version as value.
+    """
+    executor.execute(f"SELECT document, country_id, sha256, parser_version "
+                     f"FROM '{MANIFEST_TABLE}'")
+    return {row[0]: {"country_id": row[1], "sha256": row[2],
+                     "parser_version": row[3]}
+            for row in executor.fetchall()}
+
+
+def write_manifest(executor, document, country_id, sha256, parser_version):
+    """Record that rows of a country were scraped from given PDF.
+
+    Args:
+        executor (sqlite3.Cursor): sqlite3 cursor object.
+        document (str): name of PDF in folder or archive.
+        country_id (str): name of the country.
+        sha256 (str): hex SHA-256 of PDF content.
+        parser_version (int): version of the parser.
+    """
+    executor.execute(
+        f"INSERT OR REPLACE INTO '{MANIFEST_TABLE}' VALUES (?, ?, ?, ?)",
+        (document, country_id, sha256, parser_version))
+
+
+def delete_manifest(executor, document):
+    """Delete manifest entry of PDF.
+
+    Args:
+        executor (sqlite3.Cursor): sqlite3 cursor object.
+        document (str): name of PDF in folder or archive.
+    """
+    executor.execute(f"DELETE FROM '{MANIFEST_TABLE}' WHERE document = ?",
+                     (document,))
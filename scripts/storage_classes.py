@@ -196,3 +196,57 @@ class CountryExportPartners:
         self.export_percent = export_percent
         #: int: year of the last update of exports data.
         self.export_year = export_year
+
+
+class CountryBundle:
+    """Class for storing all records scraped for a single country."""
+
+    def __init__(self, general, natural_resources, export_partners,
+                 import_partners, ethnicity, language, religion,
+                 source=None):
+        #: CountryGeneral: general info of the country
+        self.general = general
+        #: list of CountryNaturalResources: natural resources
+        self.natural_resources = natural_resources
+        #: list of CountryExportPartners: export partners
+        self.export_partners = export_partners
+        #: list of CountryImportPartners: import partners
+        self.import_partners = import_partners
+        #: list of CountryEthnicity: ethnicities
+        self.ethnicity = ethnicity
+        #: list of CountryLanguage: languages
+        self.language = language
+        #: list of CountryReligion: religions
+        self.religion = religion
+        #: str: name of PDF the country was scraped from
+        self.source = source
+
+    @classmethod
+    def from_lists(cls, data_containers, source=None):
+        """Return bundle made of lists returned by scrape_text().
+
+        Args:
+            data_containers (list): lists of class objects for a single
+                country, first list holds single CountryGeneral.
+            source (str): name of PDF the country was scraped from.
+
+        Returns:
+            CountryBundle object.
+        """
+        return cls(data_containers[0][0], *data_containers[1:],
+                   source=source)
+
+    @property
+    def name(self):
+        """str: name of the country."""
+        return self.general.name
+
+    def tables(self):
+        """Return records as lists in order of DB tables.
+
+        Returns:
+            List of seven lists, same as scrape_text() returns.
+        """
+        return [[self.general], self.natural_resources,
+                self.export_partners, self.import_partners, self.ethnicity,
+                self.language, self.religion]
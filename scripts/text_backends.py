@@ -0,0 +1,119 @@
+"""Module with interchangeable backends converting PDF to text.
+
+Every backend is a function taking path to PDF or PDF opened in binary
+mode and returning its text. Field parsers only see the text, so a
+backend can be swapped after scripts.compare_backends proves that it
+gives the same data.
+
+Backends using libraries outside of requirements.txt are imported on
+first use and listed by available_backends() only if installed.
+"""
+import importlib.util
+from io import StringIO
+from pdfminer import high_level
+from pdfminer.converter import TextConverter
+from pdfminer.layout import LTChar
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+from pdfminer.utils import open_filename
+from scripts.pdf_scraper import DEFAULT_BACKEND, LA_PARAMS
+
+#: float: gap between chars read as a space, share of char width
+WORD_GAP = LA_PARAMS.word_margin
+
+#: float: shift of baseline read as a new line, share of char height
+LINE_SHIFT = 0.5
+
+
+def extract_layout(pdf_file):
+    """Return text made by pdfminer with full layout analysis."""
+    return high_level.extract_text(pdf_file, laparams=LA_PARAMS)
+
+
+class PlainTextConverter(TextConverter):
+    """TextConverter writing chars in content stream order.
+
+    Layout isn't analysed. New line starts when baseline moves and space
+    is added for gaps between chars, so text has the same words and
+    lines as long as the PDF draws text line by line.
+    """
+
+    def receive_layout(self, ltpage):
+        last = None
+        for item in ltpage:
+            if not isinstance(item, LTChar):
+                continue
+
+            if last is not None:
+                if abs(item.y0 - last.y0) > LINE_SHIFT * last.height:
+                    self.write_text("\n")
+                elif (item.x0 - last.x1 > WORD_GAP * last.width
+                      and item.get_text() != " "
+                      and last.get_text() != " "):
+                    self.write_text(" ")
+
+            self.write_text(item.get_text())
+            last = item
+
+        self.write_text("\n\f")
+
+
+def extract_no_layout(pdf_file):
+    """Return text made by pdfminer without layout analysis."""
+    with open_filename(pdf_file, "rb") as file, StringIO() as output:
+        manager = PDFResourceManager()
+        device = PlainTextConverter(manager, output, laparams=None)
+        interpreter = PDFPageInterpreter(manager, device)
+        for page in PDFPage.get_pages(file):
+            interpreter.process_page(page)
+        return output.getvalue()
+
+
+def extract_pymupdf(pdf_file):
+    """Return text made by PyMuPDF."""
+    import fitz  # pylint: disable=import-outside-toplevel
+
+    with open_filename(pdf_file, "rb") as file:
+        with fitz.open(stream=file.read(), filetype="pdf") as document:
+            return "\f".join(page.get_text() for page in document)
+
+
+def extract_pdftotext(pdf_file):
+    """Return text made by poppler through pdftotext package."""
+    import pdftotext  # pylint: disable=import-outside-toplevel
+
+    with open_filename(pdf_file, "rb") as file:
+        return "\f".join(pdftotext.PDF(file))
+
+
+#: dict: name of backend as a key, function and module it needs as value
+BACKENDS = {
+    DEFAULT_BACKEND: (extract_layout, None),
+    "pdfminer-nolayout": (extract_no_layout, None),
+    "pymupdf": (extract_pymupdf, "fitz"),
+    "pdftotext": (extract_pdftotext, "pdftotext"),
+}
+
+
+def available_backends():
+    """Return names of backends, which libraries are installed."""
+    return [name for name, (_, module) in BACKENDS.items()
+            if module is None or importlib.util.find_spec(module)]
+
+
+def get_backend(name):
+    """Return function of backend with given name.
+
+    Args:
+        name (str): name of backend, key of BACKENDS.
+
+    Returns:
+        callable converting PDF to text.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"unknown text backend {name!r}, choose from "
+                         f"{', '.join(BACKENDS)}")
+    if name not in available_backends():
+        raise ValueError(f"text backend {name!r} needs "
+                         f"{BACKENDS[name][1]} to be installed")
+    return BACKENDS[name][0]
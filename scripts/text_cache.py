@@ -0,0 +1,207 @@
+"""Module with persistent cache of text extracted from PDFs.
+
+Text is stored in a sqlite file, keyed by SHA-256 of PDF content and by
+every parameter of layout analysis, so a changed PDF or changed LAParams
+never hit a stale entry. sqlite handles locking, so one cache file can
+be shared by processes scraping in parallel.
+"""
+import hashlib
+import os
+import sqlite3
+import time
+
+#: int: default limit of cached text size, bytes
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+#: int: size of chunks PDF is hashed by, bytes
+HASH_CHUNK = 1024 * 1024
+
+
+def params_key(laparams, *extra):
+    """Return stable string made of all LAParams attributes.
+
+    Args:
+        laparams (pdfminer.layout.LAParams): parameters of layout
+            analysis.
+        *extra: other values text depends on, like pdfminer version.
+
+    Returns:
+        str.
+
+    Examples:
+        >>>print(params_key(LAParams(), "20200517"))
+        all_texts=False;boxes_flow=0.5;...;word_margin=0.1;20200517
+    """
+    items = [f"{name}={value!r}"
+             for name, value in sorted(vars(laparams).items())]
+    return ";".join(items + [str(value) for value in extra])
+
+
+def pdf_sha256(pdf_file):
+    """Return hex SHA-256 of PDF given as path or binary file object.
+
+    File object is rewound to the start afterwards.
+    """
+    digest = hashlib.sha256()
+
+    if isinstance(pdf_file, (str, os.PathLike)):
+        with open(pdf_file, "rb") as file:
+            for chunk in iter(lambda: file.read(HASH_CHUNK), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    pdf_file.seek(0)
+    for chunk in iter(lambda: pdf_file.read(HASH_CHUNK), b""):
+        digest.update(chunk)
+    pdf_file.seek(0)
+    return digest.hexdigest()
+
+
+class TextCache:
+    """Class storing extracted text of PDFs in a sqlite file.
+
+    Least recently used entries are evicted when total size of text is
+    over the limit. Object can be passed to worker processes: every
+    process opens its own connection on first use.
+    """
+
+    def __init__(self, cache_file, max_bytes=DEFAULT_MAX_BYTES):
+        #: str: path to sqlite file with cached text
+        self.cache_file = cache_file
+        #: int: limit of total size of cached text, bytes
+        self.max_bytes = max_bytes
+        #: dict: numbers of hits and misses in this process
+        self.stats = {"hits": 0, "misses": 0}
+        self._conn = None
+        self._pid = None
+
+    @classmethod
+    def for_folder(cls, path_to_folder, max_bytes=DEFAULT_MAX_BYTES):
+        """Return cache stored next to PDF folder or archive.
+
+        Args:
+            path_to_folder (str): path to folder or archive with PDFs.
+            max_bytes (int): limit of total size of cached text, bytes.
+
+        Returns:
+            TextCache object.
+        """
+        # pylint: disable=import-outside-toplevel
+        from scripts.sidecar import sidecar_path
+        return cls(sidecar_path(path_to_folder, "text_cache.sqlite"),
+                   max_bytes)
+
+    def __getstate__(self):
+        # connection can't be pickled, worker opens its own
+        state = self.__dict__.copy()
+        state["_conn"] = None
+        state["_pid"] = None
+        return state
+
+    def _connection(self):
+        """Return connection opened in this process."""
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.cache_file, timeout=60,
+                                         isolation_level=None)
+            self._pid = os.getpid()
+            # readers don't block the writer and the other way round
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS texts ("
+                               "sha256 TEXT NOT NULL, "
+                               "params TEXT NOT NULL, "
+                               "text TEXT NOT NULL, "
+                               "size INTEGER NOT NULL, "
+                               "used_at REAL NOT NULL, "
+                               "PRIMARY KEY (sha256, params))")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS texts_used_at "
+                               "ON texts (used_at)")
+        return self._conn
+
+    def get(self, sha256, params):
+        """Return cached text or None.
+
+        Args:
+            sha256 (str): hex SHA-256 of PDF content.
+            params (str): key of extraction parameters, see params_key().
+
+        Returns:
+            str or None.
+        """
+        conn = self._connection()
+        row = conn.execute("SELECT text FROM texts "
+                           "WHERE sha256 = ? AND params = ?",
+                           (sha256, params)).fetchone()
+        if row is None:
+            self.stats["misses"] += 1
+            return None
+
+        self.stats["hits"] += 1
+        conn.execute("UPDATE texts SET used_at = ? "
+                     "WHERE sha256 = ? AND params = ?",
+                     (time.time(), sha256, params))
+        return row[0]
+
+    def put(self, sha256, params, text):
+        """Store text and evict old entries if cache is over the limit.
+
+        Args:
+            sha256 (str): hex SHA-256 of PDF content.
+            params (str): key of extraction parameters, see params_key().
+            text (str): extracted text.
+        """
+        conn = self._connection()
+        size = len(text.encode("utf-8"))
+
+        # text bigger than the whole cache isn't stored
+        if size > self.max_bytes:
+            return
+
+        # one write transaction, so parallel writers evict consistently
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("INSERT OR REPLACE INTO texts VALUES (?, ?, ?, ?, ?)",
+                         (sha256, params, text, size, time.time()))
+            (total,) = conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM texts").fetchone()
+
+            if total > self.max_bytes:
+                rows = conn.execute("SELECT sha256, params, size FROM texts "
+                                    "ORDER BY used_at").fetchall()
+                for old_sha256, old_params, old_size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    conn.execute("DELETE FROM texts "
+                                 "WHERE sha256 = ? AND params = ?",
+                                 (old_sha256, old_params))
+                    total -= old_size
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get_or_extract(self, pdf_file, params, extract):
+        """Return cached text of PDF, extracting and storing it on miss.
+
+        Args:
+            pdf_file (str or file object): path to PDF or PDF opened in
+                binary mode.
+            params (str): key of extraction parameters, see params_key().
+            extract (callable): function converting pdf_file to text.
+
+        Returns:
+            str: text of the PDF.
+        """
+        sha256 = pdf_sha256(pdf_file)
+        text = self.get(sha256, params)
+
+        if text is None:
+            text = extract(pdf_file)
+            self.put(sha256, params, text)
+
+        return text
+
+    def close(self):
+        """Close connection of this process."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,49 @@
+"""Fixtures shared by tests of the downloader."""
+import pytest
+import scripts.download_engine as de
+from scripts.fake_factbook import make_fake_pdfs
+from scripts.request_scheduler import RequestScheduler
+
+
+class FakeClock:
+    """Clock, which moves only when sleep() is called."""
+
+    def __init__(self):
+        #: float: current time, seconds
+        self.now = 0.0
+        #: list of float: delays passed to sleep()
+        self.sleeps = []
+        #: callable: called on every sleep(), optional
+        self.on_sleep = None
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        """Move clock forward instead of sleeping."""
+        self.sleeps.append(seconds)
+        self.now += seconds
+        if self.on_sleep is not None:
+            self.on_sleep()
+
+
+@pytest.fixture(name="clock")
+def fixture_clock():
+    return FakeClock()
+
+
+@pytest.fixture(name="scheduler")
+def fixture_scheduler(clock, monkeypatch):
+    """Unpaced scheduler on fake clock, shared by the whole process."""
+    scheduler = RequestScheduler(rate=1e6, burst=1e6, sleep=clock.sleep,
+                                 clock=clock, deadline=60.0)
+    monkeypatch.setattr(de, "_SCHEDULER", scheduler)
+    return scheduler
+
+
+@pytest.fixture(name="pdf_folder")
+def fixture_pdf_folder(tmp_path):
+    """Folder with six fake PDFs served by FakeFactbookServer."""
+    folder = tmp_path / "served"
+    make_fake_pdfs(str(folder), 6, 4096)
+    return str(folder)
@@ -0,0 +1,61 @@
+"""Tests of pack files and archives of PDFs."""
+import os
+import tarfile
+import pytest
+from scripts import pdf_archive
+
+
+def write_pdf(file_path, payload):
+    with open(file_path, "wb") as pdf_file:
+        pdf_file.write(b"%PDF-1.4\n" + payload + b"\n%%EOF\n")
+
+
+def test_rewritten_pack_is_compacted(tmp_path):
+    pack_path = str(tmp_path / "corpus.pack")
+    pdf_path = str(tmp_path / "source.pdf")
+    sizes = []
+
+    for cycle in range(6):
+        with pdf_archive.PackWriter(pack_path) as writer:
+            for number in range(4):
+                # only one file changes after the first cycle
+                if cycle == 0 or number == 0:
+                    write_pdf(pdf_path, os.urandom(4096) + bytes([cycle]))
+                    writer.add(f"{number}.pdf", pdf_path)
+        sizes.append(os.path.getsize(pack_path))
+
+    with pdf_archive.open_corpus(pack_path) as corpus:
+        assert sorted(corpus.names) == ["0.pdf", "1.pdf", "2.pdf", "3.pdf"]
+        with corpus.open("0.pdf") as pdf_file:
+            assert pdf_file.read()[-8:-7] == bytes([5])
+
+    assert max(sizes) < 2 * sizes[0]
+    assert not os.path.exists(pack_path + ".tmp")
+
+
+def test_killed_writer_keeps_previous_files(tmp_path):
+    pack_path = str(tmp_path / "corpus.pack")
+    pdf_path = str(tmp_path / "source.pdf")
+    write_pdf(pdf_path, b"first")
+    with pdf_archive.PackWriter(pack_path) as writer:
+        writer.add("first.pdf", pdf_path)
+
+    writer = pdf_archive.PackWriter(pack_path)
+    writer.add("second.pdf", pdf_path)
+    # writer is killed before close()
+    writer._file.close()  # pylint: disable=protected-access
+
+    with pdf_archive.open_corpus(pack_path) as corpus:
+        assert corpus.names == ["first.pdf"]
+
+
+def test_tar_with_same_file_name_twice_is_rejected(tmp_path):
+    pdf_path = str(tmp_path / "source.pdf")
+    write_pdf(pdf_path, b"content")
+    tar_path = str(tmp_path / "corpus.tar")
+    with tarfile.open(tar_path, "w") as tar:
+        tar.add(pdf_path, "2019/Chad.pdf")
+        tar.add(pdf_path, "2020/Chad.pdf")
+
+    with pytest.raises(ValueError):
+        pdf_archive.open_corpus(tar_path)
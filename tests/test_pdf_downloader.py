@@ -0,0 +1,98 @@
+"""Tests of index page and PDF downloads against local stand-in server."""
+import os
+import pytest
+import scripts.download_engine as de
+import scripts.pdf_downloader as pd
+from scripts.fake_factbook import FakeFactbookServer
+from scripts.http_cache import HttpCache
+
+
+def test_broken_index_page_is_requested_again(scheduler, clock, pdf_folder,
+                                              tmp_path):
+    cache = HttpCache(str(tmp_path / "cache.json"))
+    with FakeFactbookServer(pdf_folder, reset_rate=1.0) as server:
+        # only the first response is cut in the middle
+        def stop_resets():
+            server.reset_rate = 0.0
+        clock.on_sleep = stop_resets
+
+        links = sum(pd.scrape_pdf_links(server.index_url, cache), [])
+
+    assert len(links) == 6
+    assert server.stats["resets"] == 1
+    assert scheduler.stats["retries"] == 1
+    assert cache.get(server.index_url)["links"] == links
+
+
+def test_incomplete_index_page_is_not_cached(scheduler, pdf_folder,
+                                             tmp_path):
+    cache = HttpCache(str(tmp_path / "cache.json"))
+    with FakeFactbookServer(pdf_folder, reset_rate=1.0) as server:
+        with pytest.raises(ConnectionError):
+            pd.scrape_pdf_links(server.index_url, cache)
+
+    assert scheduler.stats["retries"] == scheduler.retries
+    assert cache.get(server.index_url) is None
+
+
+def read(file_path):
+    with open(file_path, "rb") as file:
+        return file.read()
+
+
+def test_broken_download_is_resumed_with_range(scheduler, clock, pdf_folder,
+                                               tmp_path):
+    folder = tmp_path / "downloaded"
+    folder.mkdir()
+    with FakeFactbookServer(pdf_folder, reset_rate=1.0) as server:
+        def stop_resets():
+            server.reset_rate = 0.0
+        clock.on_sleep = stop_resets
+
+        status, _ = de.fetch_pdf(de.get_session(), "COUNTRY 000",
+                                 server.base_url + "/docs/COUNTRY%20000.pdf",
+                                 str(folder))
+
+    assert status == "downloaded"
+    assert server.stats["ranges"] == 1
+    assert scheduler.stats["retries"] == 1
+    assert read(folder / "COUNTRY 000.pdf") == read(
+        os.path.join(pdf_folder, "COUNTRY 000.pdf"))
+    assert not os.path.exists(folder / ".COUNTRY 000.pdf.part")
+
+
+def test_partial_file_not_matching_server_is_dropped(scheduler, pdf_folder,
+                                                     tmp_path):
+    folder = tmp_path / "downloaded"
+    folder.mkdir()
+    # partial file longer than the file on server, range can't be served
+    (folder / ".COUNTRY 001.pdf.part").write_bytes(b"x" * 10000)
+
+    with FakeFactbookServer(pdf_folder) as server:
+        status, size = de.fetch_pdf(
+            de.get_session(), "COUNTRY 001",
+            server.base_url + "/docs/COUNTRY%20001.pdf", str(folder))
+
+    assert status == "downloaded"
+    assert size == 4096
+    assert server.stats["files"] == 1
+    assert read(folder / "COUNTRY 001.pdf") == read(
+        os.path.join(pdf_folder, "COUNTRY 001.pdf"))
+
+
+def test_unchanged_file_is_not_downloaded_again(scheduler, pdf_folder,
+                                                tmp_path):
+    folder = tmp_path / "downloaded"
+    folder.mkdir()
+    cache = HttpCache(str(tmp_path / "cache.json"))
+
+    with FakeFactbookServer(pdf_folder) as server:
+        link = server.base_url + "/docs/COUNTRY%20002.pdf"
+        first = de.fetch_pdf(de.get_session(), "COUNTRY 002", link,
+                             str(folder), cache)
+        second = de.fetch_pdf(de.get_session(), "COUNTRY 002", link,
+                              str(folder), cache)
+
+    assert first == ("downloaded", 4096)
+    assert second == ("not modified", 0)
+    assert server.stats["not_modified"] == 1
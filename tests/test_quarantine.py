@@ -0,0 +1,32 @@
+"""Tests of quarantine of failed PDFs."""
+import os
+from scripts.quarantine import Quarantine
+
+
+def test_failed_pdf_is_copied_with_record(tmp_path):
+    folder = tmp_path / "pdf"
+    folder.mkdir()
+    (folder / "Chad.pdf").write_bytes(b"%PDF-1.4 broken")
+    quarantine = Quarantine.for_folder(str(folder))
+
+    record = quarantine.add(str(folder), "Chad.pdf", "scrape",
+                            ValueError("no fields"))
+
+    assert record["copied"]
+    assert quarantine.names() == ["Chad.pdf"]
+    assert os.path.exists(os.path.join(quarantine.folder, "Chad.pdf"))
+
+
+def test_unreadable_pdf_is_recorded_without_copy(tmp_path):
+    folder = tmp_path / "pdf"
+    folder.mkdir()
+    quarantine = Quarantine.for_folder(str(folder))
+
+    # opening the PDF was the failure itself
+    record = quarantine.add(str(folder), "Chad.pdf", "scrape",
+                            FileNotFoundError("Chad.pdf"), "trace")
+
+    assert not record["copied"]
+    assert "FileNotFoundError" in record["copy_error"]
+    assert quarantine.get("Chad.pdf")["traceback"] == "trace"
+    assert not os.path.exists(os.path.join(quarantine.folder, "Chad.pdf"))
@@ -0,0 +1,125 @@
+"""Tests of request scheduler against local stand-in server."""
+import socket
+import pytest
+import scripts.download_engine as de
+import scripts.pdf_downloader as pd
+from scripts.fake_factbook import FakeFactbookServer
+from scripts.request_scheduler import (RequestScheduler, TokenBucket,
+                                       parse_retry_after)
+
+
+def make_scheduler(clock, **kwargs):
+    """Return unpaced scheduler on fake clock."""
+    kwargs.setdefault("rate", 1e6)
+    kwargs.setdefault("burst", 1e6)
+    return RequestScheduler(sleep=clock.sleep, clock=clock, **kwargs)
+
+
+def closed_port_url():
+    """Return URL of local port nobody listens on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/"
+
+
+def test_connection_errors_are_retried_with_backoff(clock):
+    scheduler = make_scheduler(clock, retries=4, backoff_base=0.5,
+                               backoff_max=1.5)
+
+    with pytest.raises(OSError):
+        scheduler.get(de.get_session(), closed_port_url())
+
+    assert scheduler.stats["requests"] == 5
+    assert scheduler.stats["retries"] == 4
+    # full jitter: delay is anywhere up to the exponential bound
+    bounds = [0.5, 1.0, 1.5, 1.5]
+    assert all(0 <= delay <= bound
+               for delay, bound in zip(clock.sleeps, bounds))
+
+
+def test_server_errors_are_retried_until_success(clock, pdf_folder):
+    scheduler = make_scheduler(clock, retries=5)
+    with FakeFactbookServer(pdf_folder, error_rate=1.0) as server:
+        # server recovers after the second retry
+        def recover():
+            if len(clock.sleeps) == 2:
+                server.error_rate = 0.0
+        clock.on_sleep = recover
+
+        response = scheduler.get(de.get_session(), server.index_url)
+
+    assert response.status_code == 200
+    assert server.stats["errors"] == 2
+    assert scheduler.stats["retries"] == 2
+
+
+def test_last_error_response_is_returned(clock, pdf_folder):
+    scheduler = make_scheduler(clock, retries=2)
+    with FakeFactbookServer(pdf_folder, error_rate=1.0) as server:
+        response = scheduler.get(de.get_session(), server.index_url)
+
+    assert response.status_code == 503
+    assert server.stats["requests"] == 3
+
+
+def test_retry_after_is_honored_up_to_backoff_max(clock, pdf_folder):
+    scheduler = make_scheduler(clock, retries=3, backoff_max=30.0,
+                               deadline=None)
+    with FakeFactbookServer(pdf_folder, error_rate=1.0,
+                            retry_after=3600) as server:
+        scheduler.get(de.get_session(), server.index_url)
+        server.retry_after = 7
+        scheduler.get(de.get_session(), server.index_url)
+
+    assert clock.sleeps == [30.0] * 3 + [7.0] * 3
+
+
+def test_retry_after_as_http_date():
+    assert parse_retry_after("Thu, 01 Jan 1970 00:02:00 GMT", 60.0) == 60.0
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after("soon") is None
+
+
+def test_no_request_is_started_after_deadline(clock, pdf_folder):
+    scheduler = make_scheduler(clock, retries=10, backoff_max=30.0,
+                               deadline=60.0)
+    with FakeFactbookServer(pdf_folder, error_rate=1.0,
+                            retry_after=25) as server:
+        with pytest.raises(TimeoutError):
+            scheduler.get(de.get_session(), server.index_url)
+
+    # third wait would end after the deadline, it isn't even started
+    assert clock.sleeps == [25.0, 25.0]
+    assert server.stats["requests"] == 3
+
+
+def test_requests_to_host_are_paced(clock, pdf_folder):
+    scheduler = make_scheduler(clock, rate=2.0, burst=2)
+    with FakeFactbookServer(pdf_folder) as server:
+        for _ in range(4):
+            scheduler.get(de.get_session(), server.index_url).close()
+
+    # burst goes through, then one request every half a second
+    assert scheduler.stats["throttle_waits"] == 2
+    assert clock.now == pytest.approx(1.0)
+
+
+def test_token_bucket_refills_with_time(clock):
+    bucket = TokenBucket(rate=1.0, capacity=1, clock=clock)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(1.0)
+    clock.now += 10.0
+    assert bucket.reserve() == 0.0
+
+
+def test_every_run_gets_whole_deadline(scheduler, clock, pdf_folder):
+    with FakeFactbookServer(pdf_folder) as server:
+        assert len(sum(pd.scrape_pdf_links(server.index_url), [])) == 6
+
+        # next cycle of the daemon, long after the first deadline
+        clock.now += 24 * 60 * 60
+        links = sum(pd.scrape_pdf_links(server.index_url), [])
+
+    assert len(links) == 6
+    assert scheduler.deadline == clock.now + 60.0